@@ -0,0 +1,306 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from OCR_Modules.engines import engine_lease, engine_module, load_engine
+from OCR_Modules.frames import is_multi_frame, read_frames
+from OCR_Modules.grid import build_layout, layout_to_grid
+from OCR_Modules.languages import LanguageModels
+from OCR_Modules.lexicon import correct_tokens
+from OCR_Modules.threads import ThreadBudget
+from OCR_Modules.tokens import OCRTokens, as_tokens
+from OCR_Modules.tracing import job_context, job_timings, stage
+from OCR_Modules.watcher import is_candidate
+from OCR_Modules.writers import WRITERS, write_outputs
+
+logger = logging.getLogger(__name__)
+
+# Per-file states, in pipeline order
+QUEUED = "queued"
+OCR_DONE = "ocr_done"
+WRITTEN = "written"
+FAILED = "failed"
+
+
+class Journal:
+    """Write-ahead journal of a batch run, one JSON line per state change.
+
+    A state is appended and fsynced only after the work it describes is on
+    disk, so after a crash the latest line of every file tells what can be
+    kept. A torn last line is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.latest = {}  # path -> latest record
+        self.elapsed = 0.0  # seconds spent writing the journal
+        self._lock = threading.Lock()
+        lines = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.latest[record["path"]] = record
+        if lines > 2 * len(self.latest) + 100:
+            self._compact()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _compact(self):
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            for record in self.latest.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + ".tmp", self.path)
+
+    def append(self, records):
+        # Several records, one fsync
+        start = time.perf_counter()
+        with self._lock:
+            for record in records:
+                record["time"] = time.time()
+                self.latest[record["path"]] = record
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.elapsed += time.perf_counter() - start
+
+    def record(self, path, state, stat, **fields):
+        self.append([{"path": path, "state": state, "size": stat.st_size, "mtime": stat.st_mtime, **fields}])
+
+    def close(self):
+        self._file.close()
+
+
+def save_tokens(tokens, path):
+    # Written under a temporary name, so a token file that exists is complete
+    partial = path[: -len(".npz")] + ".part.npz"
+    tokens.save_npz(partial)
+    os.replace(partial, path)
+
+
+def collect_images(paths):
+    # Files as given, folders expanded to the images they contain
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                images.extend(sorted(entry.path for entry in entries if entry.is_file() and is_candidate(entry.path)))
+        else:
+            images.append(path)
+    return [os.path.abspath(path) for path in images]
+
+
+class BatchRun:
+    """OCR a list of images, resumable from the journal after a crash.
+
+    Every file goes through OCR (tokens saved next to the outputs) and
+    output writing, each recorded in the journal once complete. On a new
+    run, files whose outputs were written are skipped, files whose OCR
+    finished only have their outputs written again, and everything else,
+    including files changed since, is processed from scratch.
+    """
+
+    def __init__(
+        self,
+        paths,
+        output_dir,
+        engine="PaddleOCR",
+        formats=("xlsx",),
+        workers=2,
+        green_threshold=0.97,
+        yellow_threshold=0.92,
+        tesseract_path=None,
+        lexicon=None,
+        history=None,
+        journal_path=None,
+        budget=None,
+    ):
+        self.paths = list(paths)
+        self.output_dir = os.path.abspath(output_dir)
+        self.engine = engine
+        self.formats = list(formats)
+        self.thresholds = (green_threshold, yellow_threshold)
+        self.tesseract_path = tesseract_path
+        self.lexicon = lexicon
+        self.history = history
+        self.budget = budget or ThreadBudget()
+        self.max_workers = workers
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.journal = Journal(journal_path or os.path.join(self.output_dir, ".ocr_batch_journal.jsonl"))
+        self.counts = {"skipped": 0, "resumed": 0, "processed": 0, "failed": 0}
+        self._counts_lock = threading.Lock()
+
+    def output_base(self, path):
+        base_filename = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.output_dir, base_filename + "_output")
+
+    def resume_point(self, path, stat):
+        """What is left for ``path``: None (finished), OCR_DONE (outputs
+        only) or QUEUED (everything)."""
+        record = self.journal.latest.get(path)
+        if record is None or (record["size"], record["mtime"]) != (stat.st_size, stat.st_mtime):
+            return QUEUED
+        if record["state"] == WRITTEN and record.get("engine") == self.engine:
+            outputs = record.get("outputs", {})
+            if all(name in outputs and os.path.exists(outputs[name]) for name in self.formats):
+                return None
+        if record["state"] in (OCR_DONE, WRITTEN) and record.get("engine") == self.engine:
+            if record.get("tokens") and os.path.exists(record["tokens"]):
+                return OCR_DONE
+        return QUEUED
+
+    def remove_partial_outputs(self):
+        """Delete the leftovers of writes interrupted by a crash: every
+        ``*_output*.part.<suffix>`` in the output directory, whatever file or
+        frame it was written for."""
+        suffixes = tuple(".part" + suffix for suffix, _, _ in WRITERS.values()) + (".part.npz",)
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and "_output" in entry.name and entry.name.endswith(suffixes):
+                    logger.info(f"Removing partial output {entry.path}")
+                    os.remove(entry.path)
+
+    def run(self):
+        self.remove_partial_outputs()
+        todo = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                logger.warning(f"Skipping {path}: file not found")
+                continue
+            point = self.resume_point(path, stat)
+            if point is None:
+                self.counts["skipped"] += 1
+                continue
+            todo.append((path, stat, point))
+
+        # Queued states of the whole batch in one write
+        self.journal.append(
+            [
+                {"path": path, "state": QUEUED, "size": stat.st_size, "mtime": stat.st_mtime, "engine": self.engine}
+                for path, stat, point in todo
+                if point == QUEUED
+            ]
+        )
+        start = time.perf_counter()
+        if todo:
+            n_workers, threads = self.budget.plan(len(todo), self.max_workers)
+            logger.info(
+                f"Batch: {len(todo)} file(s) to do, {self.counts['skipped']} already finished, "
+                f"{n_workers} worker(s) x {threads} thread(s)"
+            )
+            jobs = queue.Queue()
+            for item in todo:
+                jobs.put(item)
+            workers = [
+                threading.Thread(target=self._worker, args=(jobs, threads), name=f"ocr-batch-{i}")
+                for i in range(n_workers)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        self.journal.close()
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Batch finished in {elapsed:.1f} s: {self.counts['processed']} processed, "
+            f"{self.counts['resumed']} resumed, {self.counts['skipped']} skipped, {self.counts['failed']} failed; "
+            f"journal writes took {self.journal.elapsed * 1000:.0f} ms"
+        )
+        return self.counts
+
+    def _count(self, name):
+        with self._counts_lock:
+            self.counts[name] += 1
+
+    def _worker(self, jobs, threads):
+        # The engine is loaded only if a file still needs OCR
+        module = ocr = None
+        while True:
+            try:
+                path, stat, point = jobs.get_nowait()
+            except queue.Empty:
+                return
+            with job_context(self.engine):
+                try:
+                    if point == QUEUED and ocr is None:
+                        module = engine_module(self.engine)
+                        ocr = LanguageModels(
+                            self.engine,
+                            load_engine(self.engine, threads, self.tesseract_path),
+                            lambda language: load_engine(self.engine, threads, self.tesseract_path, language),
+                        )
+                    engine_ocr = ocr.model() if ocr is not None else None
+                    with engine_lease(self.budget, self.engine, module, engine_ocr, threads) as granted:
+                        if module is not None:
+                            module.set_num_threads(granted)
+                        self.process_file(path, stat, point, module, ocr)
+                    self._count("resumed" if point == OCR_DONE else "processed")
+                except Exception as e:
+                    logger.error(f"Failed to process {path}: {e}", exc_info=True)
+                    self.journal.record(path, FAILED, stat, engine=self.engine, error=str(e))
+                    self._count("failed")
+
+    def process_file(self, path, stat, point, module, ocr):
+        if point == OCR_DONE:
+            output_base = self.output_base(path)
+            tokens_path = output_base + "_tokens.npz"
+            logger.info(f"Resuming {path}: OCR already done, writing outputs")
+            outputs = self.write_frame(path, stat, OCRTokens.load_npz(tokens_path), output_base)
+            self.journal.record(path, WRITTEN, stat, engine=self.engine, tokens=tokens_path, outputs=outputs)
+            return
+
+        # Frames of multi-frame files are processed one at a time, each with
+        # its own outputs; they are only resumed as a whole
+        multi_frame = is_multi_frame(path)
+        tokens_path = outputs = None
+        for frame, image in read_frames(path):
+            output_base = self.output_base(frame)
+            tokens_path = output_base + "_tokens.npz"
+            with stage("ocr"):
+                tokens = ocr.process_array(image, module)
+                del image
+            if self.lexicon is not None:
+                with stage("lexicon"):
+                    tokens = correct_tokens(as_tokens(tokens), self.lexicon, self.thresholds[1])
+            tokens = as_tokens(tokens)
+            save_tokens(tokens, tokens_path)
+            if not multi_frame:
+                self.journal.record(path, OCR_DONE, stat, engine=self.engine, tokens=tokens_path)
+            outputs = self.write_frame(frame, stat, tokens, output_base)
+        if outputs is None:
+            raise ValueError("No frames in file!")
+        if multi_frame:
+            # The last frame's outputs stand for the file: frames finish in order
+            tokens_path = None
+        self.journal.record(path, WRITTEN, stat, engine=self.engine, tokens=tokens_path, outputs=outputs)
+
+    def write_frame(self, path, stat, tokens, output_base):
+        with stage("layout"):
+            layout = build_layout(tokens)
+            rows = layout_to_grid(layout)
+        with stage("outputs"):
+            outputs = write_outputs(
+                self.formats, rows, output_base, *self.thresholds, layout=layout, atomic=True
+            )
+        if self.history is not None:
+            # Keyed by file version, so a resumed file replaces its entry
+            self.history.record(
+                layout,
+                path,
+                self.engine,
+                job_id=f"batch:{path}:{stat.st_mtime}",
+                output_base=output_base,
+                timings=job_timings(),
+            )
+        return outputs
@@ -0,0 +1,94 @@
+import logging
+import os
+import time
+
+import numpy as np
+
+from OCR_Modules.tokens import OCRTokens
+
+logger = logging.getLogger(__name__)
+
+# Engines from cheapest to most accurate; OCR_CASCADE overrides the order
+DEFAULT_TIERS = ("ONNX Runtime", "PaddleOCR", "Tesseract", "EasyOCR")
+
+
+def cascade_tiers(loaded):
+    names = os.getenv("OCR_CASCADE")
+    order = [name.strip() for name in names.split(",")] if names else DEFAULT_TIERS
+    return [name for name in order if name in loaded]
+
+
+def align(boxes, tokens):
+    # Index into ``boxes`` of each recognized token, by nearest center.
+    # Recognizers may drop empty results or return them in another order.
+    if len(tokens) == 0:
+        return np.zeros(0, dtype=np.intp)
+    centers = boxes.mean(axis=1)
+    distances = np.linalg.norm(tokens.centers[:, None, :] - centers[None, :, :], axis=2)
+    return distances.argmin(axis=1)
+
+
+def run_cascade(image, tiers, yellow_threshold, full, recognize):
+    """OCR ``image`` with the first tier and escalate weak tokens.
+
+    ``full(engine, image)`` runs a whole engine on the page and
+    ``recognize(engine, image, boxes)`` re-reads given boxes. Tokens below
+    ``yellow_threshold`` are re-recognized by each following tier in turn and
+    the higher-confidence reading is kept. Returns the tokens and one stats
+    dict per tier.
+    """
+    if not tiers:
+        raise ValueError("No OCR engine is loaded for the cascade.")
+
+    start = time.perf_counter()
+    tokens = full(tiers[0], image)
+    stats = [
+        {
+            "engine": tiers[0],
+            "tokens": len(tokens),
+            "improved": 0,
+            "resolved": int((tokens.confidences >= yellow_threshold).sum()),
+            "ms": (time.perf_counter() - start) * 1000,
+        }
+    ]
+
+    texts = list(tokens.texts)
+    confidences = tokens.confidences.copy()
+    for engine in tiers[1:]:
+        low = np.flatnonzero(confidences < yellow_threshold)
+        if len(low) == 0:
+            break
+
+        start = time.perf_counter()
+        boxes = tokens.boxes[low]
+        reread = recognize(engine, image, boxes)
+        improved = 0
+        for token_index, box_index in enumerate(align(boxes, reread)):
+            index = low[box_index]
+            confidence = float(reread.confidences[token_index])
+            if confidence > confidences[index]:
+                texts[index] = reread.texts[token_index]
+                confidences[index] = confidence
+                improved += 1
+        stats.append(
+            {
+                "engine": engine,
+                "tokens": len(low),
+                "improved": improved,
+                "resolved": int((confidences[low] >= yellow_threshold).sum()),
+                "ms": (time.perf_counter() - start) * 1000,
+            }
+        )
+
+    for tier in stats:
+        logger.info(
+            f"Cascade {tier['engine']}: {tier['tokens']} tokens, {tier['improved']} improved, "
+            f"{tier['resolved']} above threshold, {tier['ms']:.0f} ms"
+        )
+    return OCRTokens(tokens.boxes, confidences, texts, tokens.centers), stats
+
+
+def format_stats(stats):
+    return "Cascade: " + "; ".join(
+        f"{tier['engine']} {tier['resolved']}/{tier['tokens']} ({tier['ms']:.0f} ms)" for tier in stats
+    )
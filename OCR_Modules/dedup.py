@@ -0,0 +1,132 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(gray, hash_size=8):
+    """64-bit difference hash of a grayscale image."""
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def to_gray(image):
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def estimate_offset(cached_gray, gray):
+    """Estimate where ``gray`` sits inside ``cached_gray``.
+
+    Both images are cut to their common size and aligned with phase
+    correlation. Returns ``(dx, dy, error)`` where a pixel ``(u, v)`` of the
+    new image matches ``(u + dx, v + dy)`` in the cached one and ``error`` is
+    the mean absolute difference over the overlap (0-255).
+    """
+    height = min(cached_gray.shape[0], gray.shape[0])
+    width = min(cached_gray.shape[1], gray.shape[1])
+    a = np.float32(cached_gray[:height, :width])
+    b = np.float32(gray[:height, :width])
+    (shift_x, shift_y), _ = cv2.phaseCorrelate(b, a)
+    dx, dy = int(round(shift_x)), int(round(shift_y))
+
+    # Overlap of the new image (moved into cached coordinates) and the cached image
+    x1, y1 = max(0, dx), max(0, dy)
+    x2 = min(cached_gray.shape[1], gray.shape[1] + dx)
+    y2 = min(cached_gray.shape[0], gray.shape[0] + dy)
+    if x2 <= x1 or y2 <= y1:
+        return dx, dy, 255.0
+    diff = cv2.absdiff(cached_gray[y1:y2, x1:x2], gray[y1 - dy : y2 - dy, x1 - dx : x2 - dx])
+    return dx, dy, float(diff.mean())
+
+
+class ScreenshotCache:
+    """Recent screenshots indexed by perceptual hash, with their OCR tokens.
+
+    A new snip whose hash is within ``max_distance`` bits of a cached one is
+    aligned against it; if the cached snip covers at least ``min_coverage`` of
+    the new one, the cached tokens are moved to the new offset and reused.
+    """
+
+    def __init__(self, max_distance=None, capacity=16, min_coverage=0.97, max_error=8.0):
+        if max_distance is None:
+            max_distance = int(os.getenv("SCREENSHOT_DEDUP_MAX_DISTANCE", "12"))
+        self.max_distance = max_distance
+        self.capacity = capacity
+        self.min_coverage = min_coverage
+        self.max_error = max_error
+        self.entries = OrderedDict()  # hash -> list of (engine, gray, tokens)
+        self.hits = 0
+        self.misses = 0
+
+    def _candidates(self, image_hash):
+        # Linear scan over a handful of 64-bit ints, nearest first
+        distances = [
+            ((image_hash ^ cached_hash).bit_count(), cached_hash)
+            for cached_hash in self.entries
+        ]
+        return [h for d, h in sorted(distances) if d <= self.max_distance]
+
+    def lookup(self, image, engine):
+        start = time.perf_counter()
+        gray = to_gray(image)
+        image_hash = dhash(gray)
+
+        candidates = self._candidates(image_hash)
+        index_us = (time.perf_counter() - start) * 1e6
+
+        for cached_hash in candidates:
+            for cached_engine, cached_gray, tokens in self.entries[cached_hash]:
+                if cached_engine != engine:
+                    continue
+                result = self._remap(cached_gray, gray, tokens)
+                if result is not None:
+                    self.entries.move_to_end(cached_hash)
+                    self.hits += 1
+                    self._log("hit", start, index_us)
+                    return result
+
+        self.misses += 1
+        self._log("miss", start, index_us)
+        return None
+
+    def _remap(self, cached_gray, gray, tokens):
+        dx, dy, error = estimate_offset(cached_gray, gray)
+        if error > self.max_error:
+            return None
+
+        height, width = gray.shape[:2]
+        overlap_w = min(cached_gray.shape[1], width + dx) - max(0, dx)
+        overlap_h = min(cached_gray.shape[0], height + dy) - max(0, dy)
+        coverage = max(overlap_w, 0) * max(overlap_h, 0) / float(width * height)
+        if coverage < self.min_coverage:
+            return None
+
+        # Keep the tokens that still lie entirely inside the new snip
+        moved = tokens.shifted(-dx, -dy)
+        xs, ys = moved.boxes[:, :, 0], moved.boxes[:, :, 1]
+        inside = (xs.min(axis=1) >= 0) & (ys.min(axis=1) >= 0)
+        inside &= (xs.max(axis=1) <= width) & (ys.max(axis=1) <= height)
+        return moved.take(inside)
+
+    def add(self, image, engine, tokens):
+        gray = to_gray(image).copy()
+        self.entries.setdefault(dhash(gray), []).append((engine, gray, tokens))
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def _log(self, outcome, start, index_us):
+        total = self.hits + self.misses
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Screenshot cache {outcome}: hash index {index_us:.0f} us, "
+            f"total {elapsed_ms:.1f} ms "
+            f"(hit rate {self.hits}/{total} = {self.hits / total:.0%})"
+        )
@@ -0,0 +1,85 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from OCR_Modules.tokens import OCRTokens
+
+logger = logging.getLogger(__name__)
+
+# Engines whose detector is used for the shared stage, best first
+DETECTOR_PREFERENCE = ("PaddleOCR", "ONNX Runtime", "EasyOCR", "Tesseract")
+
+
+def image_key(image):
+    # Content key of a decoded image; cheap next to any detector
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(memoryview(image).cast("B"), digest_size=16).hexdigest()
+    return f"{image.shape}:{digest}"
+
+
+def crop_box(image, box):
+    # Perspective-correct crop of one detected box; tall crops are rotated
+    width = int(max(np.linalg.norm(box[0] - box[1]), np.linalg.norm(box[2] - box[3])))
+    height = int(max(np.linalg.norm(box[0] - box[3]), np.linalg.norm(box[1] - box[2])))
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    matrix = cv2.getPerspectiveTransform(box.astype(np.float32), target)
+    crop = cv2.warpPerspective(
+        image, matrix, (max(width, 1), max(height, 1)), borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC
+    )
+    if crop.shape[0] / max(crop.shape[1], 1) >= 1.5:
+        crop = np.rot90(crop)
+    return np.ascontiguousarray(crop)
+
+
+def tokens_from_lines(boxes, texts, confidences):
+    # Tokens for recognized line boxes, dropping lines without text. Centers
+    # are the diagonal midpoint, as for PaddleOCR.
+    keep = [i for i, text in enumerate(texts) if text and text.strip()]
+    if not keep:
+        return OCRTokens.empty()
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)[keep]
+    centers = (boxes[:, 0] + boxes[:, 2]) / 2
+    return OCRTokens(boxes, [confidences[i] for i in keep], [texts[i].strip() for i in keep], centers)
+
+
+class DetectionCache:
+    """Text-line boxes per image and detector.
+
+    Detection is the expensive half of most engines; with the boxes cached,
+    running another engine on the same image only pays for recognition.
+    """
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # (image key, detector) -> (N, 4, 2) boxes
+
+    def boxes(self, image, detector, detect):
+        key = (image_key(image), detector)
+        boxes = self.entries.get(key)
+        if boxes is not None:
+            self.entries.move_to_end(key)
+            logger.info(f"Reusing {len(boxes)} {detector} text boxes")
+            return boxes
+
+        start = time.perf_counter()
+        boxes = np.asarray(detect(image), dtype=np.float32).reshape(-1, 4, 2)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"{detector} detection found {len(boxes)} text boxes in {elapsed_ms:.0f} ms")
+
+        self.entries[key] = boxes
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return boxes
+
+
+def recognize(image, boxes, engine, module, ocr):
+    # Recognition stage of the shared pipeline
+    start = time.perf_counter()
+    tokens = module.recognize_boxes(image, boxes, ocr) if len(boxes) else OCRTokens.empty()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"{engine} recognized {len(boxes)} text boxes in {elapsed_ms:.0f} ms")
+    return tokens
@@ -2,29 +2,124 @@ import easyocr
 import cv2
 import logging
 import numpy as np
-import openpyxl
-from openpyxl.styles import PatternFill
-from openpyxl.utils import get_column_letter
 import os
-from PIL import Image, ImageDraw, ImageFont
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+from OCR_Modules.detection import tokens_from_lines
+from OCR_Modules.tokens import OCRTokens
+from OCR_Modules.warmup import compiled_cache_enabled, synthetic_image
+
 logger = logging.getLogger(__name__)
 
-def initialize_easyocr():
-    logger.info("Initializing EasyOCR...")
-    # Initialize the reader with desired languages
-    reader = easyocr.Reader(['en'])  # You can specify other languages if needed
+# Frozen TorchScript traces of the detector and recognizer
+TORCHSCRIPT_DIR = os.path.join(os.path.expanduser('~'), '.EasyOCR', 'torchscript')
+LANGUAGES = ['en']
+# Language -> reader languages; English is kept for units and abbreviations
+LANGUAGE_CODES = {
+    'en': ['en'], 'fr': ['fr', 'en'], 'de': ['de', 'en'], 'es': ['es', 'en'], 'it': ['it', 'en'],
+    'pt': ['pt', 'en'], 'ru': ['ru', 'en'], 'ar': ['ar', 'en'], 'zh': ['ch_sim', 'en'],
+    'ja': ['ja', 'en'], 'ko': ['ko', 'en'],
+}
+
+def artifact_paths(languages=LANGUAGES):
+    import torch
+
+    key = f"easyocr{easyocr.__version__}-torch{torch.__version__}-{'_'.join(languages)}"
+    return {
+        name: os.path.join(TORCHSCRIPT_DIR, f'{name}-{key}.pt')
+        for name in ('detector', 'recognizer')
+    }
+
+def initialize_easyocr(language='en'):
+    logger.info(f"Initializing EasyOCR ({language})...")
+    reader = easyocr.Reader(LANGUAGE_CODES.get(language, LANGUAGES))
+    if compiled_cache_enabled():
+        load_artifacts(reader)
     return reader
 
-def process_image(file_path, reader):
+def load_artifacts(reader):
+    import torch
+
+    paths = artifact_paths(reader.lang_list)
+    if not all(os.path.exists(path) for path in paths.values()):
+        return
+    for name, path in paths.items():
+        setattr(reader, name, torch.jit.load(path, map_location='cpu'))
+    logger.info(f"Using TorchScript models from {TORCHSCRIPT_DIR}")
+
+def cache_artifacts(reader):
+    # Trace detector and recognizer on the inputs of a real call, check the
+    # traces reproduce the eager outputs, then freeze and save them
+    import torch
+
+    if not compiled_cache_enabled() or isinstance(reader.detector, torch.jit.ScriptModule):
+        return
+    inputs = {}
+    hooks = [
+        getattr(reader, name).register_forward_hook(
+            lambda module, args, output, name=name: inputs.setdefault(name, args)
+        )
+        for name in ('detector', 'recognizer')
+    ]
     try:
-        # Read image
-        image = cv2.imread(file_path)
-        if image is None:
-            raise ValueError("Could not open image!")
+        reader.readtext(cv2.cvtColor(synthetic_image(), cv2.COLOR_BGR2RGB))
+    finally:
+        for hook in hooks:
+            hook.remove()
+
+    os.makedirs(TORCHSCRIPT_DIR, exist_ok=True)
+    paths = artifact_paths(reader.lang_list)
+    with torch.no_grad():
+        for name, path in paths.items():
+            model, args = getattr(reader, name).eval(), inputs[name]
+            traced = torch.jit.freeze(torch.jit.trace(model, args, check_trace=False))
+            expected, actual = model(*args), traced(*args)
+            expected = expected if isinstance(expected, tuple) else (expected,)
+            actual = actual if isinstance(actual, tuple) else (actual,)
+            if not all(torch.allclose(e, a, atol=1e-4) for e, a in zip(expected, actual)):
+                logger.warning(f"TorchScript trace of the EasyOCR {name} differs, not saved")
+                return
+            traced.save(path + '.tmp')
+            os.replace(path + '.tmp', path)
+    logger.info(f"Saved TorchScript EasyOCR models to {TORCHSCRIPT_DIR}")
+
+def set_num_threads(threads):
+    # Intra-op threads are process wide in torch
+    import torch
+
+    if torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+
+def detect_array(image, reader):
+    # CRAFT text boxes only, for the shared detection stage
+    horizontal_list, free_list = reader.detect(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    boxes = [
+        [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+        for x_min, x_max, y_min, y_max in horizontal_list[0]
+    ]
+    boxes += [list(box) for box in free_list[0]]
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+
+def recognize_boxes(image, boxes, reader):
+    # Recognize already detected boxes; every box goes through the
+    # perspective-corrected (free) path so any detector's boxes work
+    grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    free_list = np.round(boxes).astype(int).tolist()
+    result = reader.recognize(grey, horizontal_list=[], free_list=free_list)
+    if not result:
+        return OCRTokens.empty()
+    bboxes, texts, confidences = zip(*result)
+    return tokens_from_lines(bboxes, texts, confidences)
 
+def process_image(file_path, reader):
+    # Read image
+    image = cv2.imread(file_path)
+    if image is None:
+        raise ValueError("Could not open image!")
+    return process_array(image, reader)
+
+def process_array(image, reader):
+    # OCR an already decoded BGR image, either a full page or a crop of one
+    try:
         logger.info("Processing image with EasyOCR...")
 
         # Convert to RGB
@@ -33,112 +128,13 @@ def process_image(file_path, reader):
         # Perform OCR
         result = reader.readtext(image_rgb)
 
-        extracted_data = []
-
-        for res in result:
-            bbox, text, confidence = res
-            # Calculate the center point of the bounding box
-            x = sum([point[0] for point in bbox]) / 4.0
-            y = sum([point[1] for point in bbox]) / 4.0
-            extracted_data.append({'x': x, 'y': y, 'text': text.strip(), 'confidence': confidence, 'bbox': bbox})
+        if not result:
+            return OCRTokens.empty()
 
-        return extracted_data
+        bboxes, texts, confidences = zip(*result)
+        # Centers default to the mean of the four corners
+        return OCRTokens(bboxes, confidences, [text.strip() for text in texts])
 
     except Exception as e:
         logger.error(f"Error processing image: {str(e)}")
         raise
-
-def group_into_rows(data, y_threshold=10):
-    # Sort data by y-coordinate
-    data_sorted = sorted(data, key=lambda k: k['y'])
-
-    # Group text into rows
-    rows = []
-    current_row = []
-    last_y = None
-
-    for item in data_sorted:
-        x = item['x']
-        y = item['y']
-        text = item['text']
-        confidence = item['confidence']
-        if last_y is None or abs(y - last_y) > y_threshold:
-            if current_row:
-                rows.append(sorted(current_row, key=lambda k: k[0]))
-            current_row = [(x, text, confidence)]
-            last_y = y
-        else:
-            current_row.append((x, text, confidence))
-
-    # Add the last row
-    if current_row:
-        rows.append(sorted(current_row, key=lambda k: k[0]))
-
-    # Return rows with text and confidence
-    return [[(text, confidence) for x, text, confidence in row] for row in rows]
-
-def save_as_xlsx(rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-
-    for row_index, row in enumerate(rows, start=1):
-        for col_index, cell in enumerate(row, start=1):
-            text, confidence = cell
-            ws.cell(row=row_index, column=col_index, value=text)
-
-            if confidence >= green_threshold:
-                # Green for confidence >= green_threshold
-                fill_color = '00FF00'
-            elif confidence >= yellow_threshold:
-                # Yellow for confidence >= yellow_threshold
-                fill_color = 'FFFF00'
-            else:
-                # Red for confidence below yellow_threshold
-                fill_color = 'FF0000'
-
-            fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-            ws.cell(row=row_index, column=col_index).fill = fill
-
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    wb.save(output_xlsx)
-    logger.info(f"Excel file has been saved at: {output_xlsx}")
-
-def draw_bounding_boxes(image_path, data, output_image_path):
-    image = Image.open(image_path)
-    # Convert image to RGB mode
-    image = image.convert('RGB')
-    draw = ImageDraw.Draw(image)
-    try:
-        font = ImageFont.truetype("arial.ttf", 16)  # Use a true type font
-    except:
-        font = ImageFont.load_default()
-
-    for item in data:
-        bbox = item['bbox']
-        text = item['text']
-        confidence = item['confidence']
-
-        # Convert bbox coordinates to integer tuples
-        bbox = [(int(point[0]), int(point[1])) for point in bbox]
-
-        # Draw bounding box
-        draw.polygon(bbox, outline='green')
-
-        # Put text and confidence
-        x, y = bbox[0][0], bbox[0][1]
-        draw.text((x, y - 20), f'{text} ({confidence:.2f})', fill='red', font=font)
-
-    image.save(output_image_path)
-    logger.info(f"Image with bounding boxes saved at: {output_image_path}")
@@ -0,0 +1,64 @@
+import importlib
+
+# Engine name shown in the UI -> module implementing the process_array contract
+ENGINE_MODULES = {
+    "PaddleOCR": "OCR_Modules.paddleOCR",
+    "Tesseract": "OCR_Modules.tesseractOCR",
+    "EasyOCR": "OCR_Modules.easyOCR",
+    "ONNX Runtime": "OCR_Modules.onnxOCR",
+    # Recorded tokens, for benchmarks and tests without models
+    "Replay": "OCR_Modules.replayOCR",
+}
+
+
+class EngineUnavailable(RuntimeError):
+    """An optional engine is not set up on this machine."""
+
+
+def engine_module(engine):
+    if engine not in ENGINE_MODULES:
+        raise ValueError("Please select an OCR engine.")
+    return importlib.import_module(ENGINE_MODULES[engine])
+
+
+def engine_lease(budget, engine, module, ocr, threads=None):
+    """Lease threads from ``budget`` for a call of ``engine``.
+
+    Engines built for a fixed thread count (``fixed_threads`` in their
+    module: Paddle, ONNX Runtime) wait until that many are free, since they
+    use them all whatever the lease; the others take ``threads`` or the
+    budget's share and apply the grant with ``set_num_threads``.
+    """
+    fixed = getattr(module, "fixed_threads", None)
+    if fixed is not None and ocr is not None:
+        return budget.lease(engine, fixed(ocr), exact=True)
+    return budget.lease(engine, threads)
+
+
+def load_engine(engine, num_threads=None, tesseract_path=None, language="en"):
+    """Initialize ``engine`` and return its OCR object.
+
+    ``language`` picks the recognition model of engines with one per
+    language (see ``OCR_Modules.languages``); the others ignore it.
+    """
+    module = engine_module(engine)
+    if engine == "PaddleOCR":
+        return module.initialize_ocr_SLANet_LCNetV2(num_threads=num_threads, language=language)
+    elif engine == "Tesseract":
+        if tesseract_path is None:
+            # Looked up only when Tesseract is used, it may not be installed
+            from utils import get_tessbin_path
+
+            tesseract_path = get_tessbin_path()
+        return module.initialize_tesseract(tesseract_path)
+    elif engine == "EasyOCR":
+        return module.initialize_easyocr(language)
+    elif engine == "ONNX Runtime":
+        if not module.models_available():
+            raise EngineUnavailable(
+                "ONNX models not found, run "
+                "'python -m OCR_Modules.onnx_models export' to enable them."
+            )
+        return module.initialize_onnx(num_threads=num_threads)
+    elif engine == "Replay":
+        return module.initialize_replay()
@@ -0,0 +1,238 @@
+"""Lazy frame reading for multi-frame TIFF and DICOM files.
+
+Frames are decoded one at a time and converted to the 8-bit BGR arrays the
+engines expect, so memory use does not grow with the number of frames.
+Uncompressed pixel data is memory-mapped: only the pages of the frame
+being converted are read. TIFF uses ``tifffile`` when installed (Pillow
+otherwise); DICOM needs ``pydicom``.
+"""
+import logging
+import os
+import struct
+from collections.abc import Sequence
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TIFF_EXTENSIONS = {".tif", ".tiff"}
+DICOM_EXTENSIONS = {".dcm", ".dicom"}
+MULTI_FRAME_EXTENSIONS = TIFF_EXTENSIONS | DICOM_EXTENSIONS
+
+DICOM_PIXEL_DATA = 0x7FE00010
+UNDEFINED_LENGTH = 0xFFFFFFFF
+
+
+def is_multi_frame(path):
+    return os.path.splitext(path)[1].lower() in MULTI_FRAME_EXTENSIONS
+
+
+def frame_path(path, index, count):
+    # scan.tif frame 3 of 12 -> scan_frame03.tif; single frames keep the name
+    if count <= 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_frame{index + 1:0{len(str(count))}d}{ext}"
+
+
+def to_uint8(frame):
+    # Stretch the frame's own range to 0-255
+    if frame.dtype == np.uint8:
+        return frame
+    if frame.dtype == np.bool_:
+        return frame.astype(np.uint8) * 255
+    low, high = float(frame.min()), float(frame.max())
+    scale = 255.0 / (high - low) if high > low else 0.0
+    pixels = (frame.astype(np.float32) - low) * scale
+    return np.clip(pixels, 0, 255).astype(np.uint8)
+
+
+def to_bgr(frame):
+    # 8-bit gray, RGB or RGBA -> BGR
+    if frame.ndim == 2:
+        return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+    if frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
+    return cv2.cvtColor(np.ascontiguousarray(frame[:, :, :3]), cv2.COLOR_RGB2BGR)
+
+
+def tiff_frames(path):
+    try:
+        import tifffile
+    except ImportError:
+        tifffile = None
+    if tifffile is None:
+        yield from pillow_frames(path)
+        return
+
+    with tifffile.TiffFile(path) as tif:
+        pages = tif.pages
+        # Do not keep every parsed page around
+        pages.cache = False
+        count = len(pages)
+        for index in range(count):
+            page = pages[index]
+            if page.is_memmappable:
+                frame = tifffile.memmap(path, page=index, mode="r")
+            else:
+                frame = page.asarray()
+            if page.planarconfig == tifffile.PLANARCONFIG.SEPARATE and page.samplesperpixel > 1:
+                # One plane per sample: (samples, H, W) -> (H, W, samples)
+                frame = np.moveaxis(frame, 0, -1)
+            image = to_uint8(frame)
+            if page.photometric == tifffile.PHOTOMETRIC.MINISWHITE:
+                image = 255 - image
+            yield index, count, to_bgr(image)
+
+
+def pillow_frames(path):
+    from PIL import Image
+
+    with Image.open(path) as image:
+        count = getattr(image, "n_frames", 1)
+        for index in range(count):
+            image.seek(index)
+            frame = image
+            if frame.mode in ("1", "P", "LA", "CMYK", "YCbCr"):
+                frame = frame.convert("RGB")
+            yield index, count, to_bgr(to_uint8(np.asarray(frame)))
+
+
+def first_value(value):
+    # Window centre/width may be multi-valued; the first pair is the default
+    if value is None:
+        return None
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        value = value[0] if len(value) else None
+    return None if value is None else float(value)
+
+
+def dicom_window(frame, ds):
+    """8-bit display values of a DICOM frame: stored bits, rescale, VOI window.
+
+    Follows the linear VOI LUT function of PS3.3 C.11.2.1.2 with the first
+    window; without one the frame's own range is used.
+    """
+    bits_allocated = int(ds.get("BitsAllocated", 8))
+    bits_stored = int(ds.get("BitsStored", bits_allocated) or bits_allocated)
+    signed = int(ds.get("PixelRepresentation", 0)) == 1
+    if not signed and bits_stored < bits_allocated and frame.dtype.kind == "u":
+        # Unused high bits may carry overlays
+        frame = frame & np.array((1 << bits_stored) - 1, dtype=frame.dtype)
+
+    pixels = frame.astype(np.float32)
+    slope = float(ds.get("RescaleSlope", 1) or 1)
+    intercept = float(ds.get("RescaleIntercept", 0) or 0)
+    if slope != 1 or intercept != 0:
+        pixels = pixels * slope + intercept
+
+    center = first_value(ds.get("WindowCenter"))
+    width = first_value(ds.get("WindowWidth"))
+    if center is None or width is None or width <= 1:
+        image = to_uint8(pixels)
+    else:
+        pixels = ((pixels - (center - 0.5)) / (width - 1) + 0.5) * 255.0
+        image = np.clip(pixels, 0, 255).astype(np.uint8)
+    if ds.get("PhotometricInterpretation") == "MONOCHROME1":
+        image = 255 - image
+    return image
+
+
+def pixel_data_location(f, ds):
+    """``(offset, length)`` of the Pixel Data value in the open file ``f``,
+    just read up to it with ``stop_before_pixels``; None if encapsulated."""
+    syntax = ds.file_meta.TransferSyntaxUID
+    header = f.read(8 if syntax.is_implicit_VR else 12)
+    tag = struct.unpack("<HH", header[:4])
+    if len(header) < 8 or (tag[0] << 16 | tag[1]) != DICOM_PIXEL_DATA:
+        return None
+    # Explicit VR OB/OW: tag, VR, 2 reserved bytes, 4-byte length
+    length = struct.unpack("<I", header[-4:])[0]
+    if length == UNDEFINED_LENGTH:
+        return None
+    return f.tell(), length
+
+
+def dicom_memmap(path, ds, location, count):
+    # All frames of uncompressed little-endian pixel data as one memmap, or None
+    syntax = ds.file_meta.TransferSyntaxUID
+    if location is None or syntax.is_compressed or syntax.is_deflated or not syntax.is_little_endian:
+        return None
+    bits = int(ds.BitsAllocated)
+    if bits not in (8, 16, 32):
+        return None
+    signed = int(ds.get("PixelRepresentation", 0)) == 1
+    dtype = np.dtype(f"<{'i' if signed else 'u'}{bits // 8}")
+    rows, columns = int(ds.Rows), int(ds.Columns)
+    samples = int(ds.get("SamplesPerPixel", 1))
+    if samples == 1:
+        shape = (count, rows, columns)
+    elif int(ds.get("PlanarConfiguration", 0)) == 0:
+        shape = (count, rows, columns, samples)
+    else:
+        shape = (count, samples, rows, columns)
+    offset, length = location
+    if int(np.prod(shape)) * dtype.itemsize > length:
+        return None
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+
+def dicom_to_bgr(frame, ds):
+    samples = int(ds.get("SamplesPerPixel", 1))
+    if samples == 1:
+        return to_bgr(dicom_window(frame, ds))
+    if frame.shape[0] == samples and frame.shape[-1] != samples:
+        # Planar configuration 1: one plane per colour
+        frame = np.moveaxis(frame, 0, -1)
+    return to_bgr(to_uint8(frame))
+
+
+def dicom_frames(path):
+    try:
+        import pydicom
+    except ImportError:
+        raise ImportError("Reading DICOM files needs the optional 'pydicom' package.")
+
+    # Only the header is parsed; the pixel data stays in the file
+    with open(path, "rb") as f:
+        ds = pydicom.dcmread(f, stop_before_pixels=True)
+        location = pixel_data_location(f, ds)
+    count = int(ds.get("NumberOfFrames", 1) or 1)
+    frames = dicom_memmap(path, ds, location, count)
+    if frames is not None:
+        for index in range(count):
+            yield index, count, dicom_to_bgr(frames[index], ds)
+        return
+
+    # Compressed pixel data: decoded a frame at a time by pydicom
+    from pydicom.pixels import iter_pixels
+
+    for index, frame in enumerate(iter_pixels(path)):
+        yield index, count, dicom_to_bgr(frame, ds)
+
+
+def iter_frames(path):
+    """``(index, count, BGR image)`` for every frame of a TIFF or DICOM file."""
+    if os.path.splitext(path)[1].lower() in DICOM_EXTENSIONS:
+        return dicom_frames(path)
+    return tiff_frames(path)
+
+
+def read_frames(path):
+    """``(frame path, BGR image)`` for every frame of ``path``.
+
+    Multi-frame files give one virtual path per frame (see ``frame_path``),
+    so outputs are named per frame; other images are a single frame read
+    with OpenCV.
+    """
+    if not is_multi_frame(path):
+        image = cv2.imread(path)
+        if image is None:
+            raise ValueError("Could not open image!")
+        yield path, image
+        return
+    for index, count, image in iter_frames(path):
+        if count > 1:
+            logger.info(f"Frame {index + 1} of {count} of {path}")
+        yield frame_path(path, index, count), image
@@ -0,0 +1,289 @@
+import csv
+import logging
+
+import numpy as np
+
+from OCR_Modules.tokens import as_tokens, group_row_indices, replace_region
+
+logger = logging.getLogger(__name__)
+
+
+def token_extents(tokens):
+    # Horizontal extent (left, right) of every token box
+    xs = tokens.boxes[:, :, 0]
+    return xs.min(axis=1), xs.max(axis=1)
+
+
+def merge_intervals(starts, ends, gap=0.0):
+    """Merge overlapping ``[start, end]`` intervals.
+
+    Intervals closer than ``gap`` pixels are merged as well. Returns the
+    merged spans as two sorted arrays ``(starts, ends)``.
+    """
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+
+    order = np.argsort(starts, kind="stable")
+    starts = np.asarray(starts)[order]
+    ends = np.asarray(ends)[order]
+
+    # A new span starts wherever the interval begins past the running maximum
+    # end of everything before it.
+    running_end = np.maximum.accumulate(ends)
+    breaks = np.flatnonzero(starts[1:] > running_end[:-1] + gap) + 1
+    first = np.concatenate(([0], breaks))
+    last = np.concatenate((breaks - 1, [len(starts) - 1]))
+    return starts[first], running_end[last]
+
+
+def infer_columns(tokens, rows, wide_ratio=4.0, gap=5.0):
+    """Cluster token x-extents from all rows into column spans.
+
+    Tokens alone on their row (section titles) and tokens much wider than the
+    median token would bridge neighbouring columns, so they are left out of
+    the clustering and only assigned afterwards. Returns the span starts,
+    span ends and the mask of tokens that took part in the clustering.
+    """
+    left, right = token_extents(tokens)
+    widths = right - left
+
+    support = np.zeros(len(tokens), dtype=bool)
+    for row in rows:
+        if len(row) > 1:
+            support[row] = True
+    if support.any():
+        support &= widths <= wide_ratio * np.median(widths[support])
+    if not support.any():
+        support[:] = True
+
+    span_starts, span_ends = merge_intervals(left[support], right[support], gap)
+    return span_starts, span_ends, support
+
+
+def assign_columns(tokens, span_starts, span_ends, clustered=None):
+    # Clustered tokens whose center falls inside a span take that column; the
+    # others (wide or stray tokens) go to the column nearest to their left edge.
+    left, _ = token_extents(tokens)
+    centers = tokens.x
+
+    idx = np.searchsorted(span_starts, centers, side="right") - 1
+    idx = np.clip(idx, 0, len(span_starts) - 1)
+    inside = (centers >= span_starts[idx]) & (centers <= span_ends[idx])
+    if clustered is not None:
+        inside &= clustered
+
+    anchor = np.searchsorted(span_starts, left, side="right") - 1
+    prev_idx = np.clip(anchor, 0, len(span_starts) - 1)
+    next_idx = np.clip(anchor + 1, 0, len(span_starts) - 1)
+    prev_dist = np.where(
+        left > span_ends[prev_idx],
+        left - span_ends[prev_idx],
+        np.maximum(span_starts[prev_idx] - left, 0),
+    )
+    next_dist = np.abs(span_starts[next_idx] - left)
+    nearest = np.where(next_dist < prev_dist, next_idx, prev_idx)
+
+    return np.where(inside, idx, nearest)
+
+
+def build_layout(data, y_threshold=10, wide_ratio=4.0, gap=5.0):
+    """Compute the row and column structure of a token set.
+
+    Returns a dict holding the tokens, the per-row index arrays, the top y of
+    every row, the column of every token and the column spans. Keeping the
+    layout around lets later edits regenerate only the rows they touch.
+    """
+    tokens = as_tokens(data)
+    rows = group_row_indices(tokens, y_threshold)
+    if rows:
+        span_starts, span_ends, clustered = infer_columns(tokens, rows, wide_ratio, gap)
+        columns = assign_columns(tokens, span_starts, span_ends, clustered)
+    else:
+        span_starts = span_ends = np.empty(0, dtype=np.float32)
+        columns = np.empty(0, dtype=np.intp)
+    row_tops = np.array([tokens.y[row].min() for row in rows])
+    return {
+        "tokens": tokens,
+        "rows": rows,
+        "row_tops": row_tops,
+        "columns": columns,
+        "span_starts": span_starts,
+        "span_ends": span_ends,
+        "y_threshold": y_threshold,
+    }
+
+
+def layout_to_grid(layout, rows=None):
+    """Render layout rows as lists of ``(text, confidence)`` cells.
+
+    Every row has one cell per column; cells without a token are ``None``.
+    Tokens landing in the same cell are joined left to right and keep the
+    lowest confidence.
+    """
+    tokens = layout["tokens"]
+    texts = tokens.texts
+    confidences = tokens.confidences
+    columns = layout["columns"]
+    n_cols = len(layout["span_starts"])
+
+    grid = []
+    for row in layout["rows"] if rows is None else rows:
+        cells = [None] * n_cols
+        for i in row.tolist():
+            col = columns[i]
+            if cells[col] is None:
+                cells[col] = (texts[i], float(confidences[i]))
+            else:
+                text, confidence = cells[col]
+                cells[col] = (f"{text} {texts[i]}", min(confidence, float(confidences[i])))
+        grid.append(cells)
+    return grid
+
+
+def cell_boxes(layout, rows=None):
+    """Bounding rectangle ``[x1, y1, x2, y2]`` of every cell of ``layout_to_grid``.
+
+    Cells without a token are ``None``.
+    """
+    tokens = layout["tokens"]
+    columns = layout["columns"]
+    n_cols = len(layout["span_starts"])
+    xs, ys = tokens.boxes[:, :, 0], tokens.boxes[:, :, 1]
+    rects = np.stack(
+        [xs.min(axis=1), ys.min(axis=1), xs.max(axis=1), ys.max(axis=1)], axis=1
+    ).round(1).tolist()
+
+    boxes = []
+    for row in layout["rows"] if rows is None else rows:
+        cells = [None] * n_cols
+        for i in row.tolist():
+            col = columns[i]
+            if cells[col] is None:
+                cells[col] = rects[i]
+            else:
+                x1, y1, x2, y2 = cells[col]
+                r = rects[i]
+                cells[col] = [min(x1, r[0]), min(y1, r[1]), max(x2, r[2]), max(y2, r[3])]
+        boxes.append(cells)
+    return boxes
+
+
+def cell_notes(layout, rows=None):
+    """Corrections behind every cell of ``layout_to_grid``, as
+    ``"read -> corrected"`` text.
+
+    Cells whose tokens were not corrected are ``None``; so is the whole
+    result when no token was.
+    """
+    tokens = layout["tokens"]
+    originals = tokens.originals
+    if originals is None:
+        return None
+    texts = tokens.texts
+    columns = layout["columns"]
+    n_cols = len(layout["span_starts"])
+
+    notes = []
+    for row in layout["rows"] if rows is None else rows:
+        cells = [None] * n_cols
+        for i in row.tolist():
+            if originals[i] is None:
+                continue
+            col = columns[i]
+            note = f"{originals[i]} -> {texts[i]}"
+            cells[col] = note if cells[col] is None else f"{cells[col]}; {note}"
+        notes.append(cells)
+    return notes
+
+
+def build_grid(data, y_threshold=10, wide_ratio=4.0, gap=5.0):
+    """Group tokens into a rectangular table; see ``layout_to_grid``."""
+    layout = build_layout(data, y_threshold, wide_ratio, gap)
+    grid = layout_to_grid(layout)
+    logger.info(
+        f"Reconstructed grid with {len(grid)} rows and "
+        f"{len(layout['span_starts'])} columns"
+    )
+    return grid
+
+
+def update_region(layout, new_tokens, region):
+    """Replace the tokens inside ``region`` and regroup only the rows it touches.
+
+    The column spans of the original layout are kept, so the other rows stay
+    valid. Returns ``(layout, first, removed, band_grid)``: the updated
+    layout, the index of the first regenerated row, how many old rows it
+    replaces and the new grid rows to splice in at that position.
+    """
+    x1, y1, x2, y2 = region
+    y_threshold = layout["y_threshold"]
+    rows = layout["rows"]
+    row_tops = layout["row_tops"]
+
+    tokens, kept = replace_region(layout["tokens"], new_tokens, region)
+    remap = np.full(len(layout["tokens"]), -1, dtype=np.intp)
+    remap[kept] = np.arange(len(kept))
+
+    # Rows ending above the region and rows starting below it are untouched
+    first = int(np.searchsorted(row_tops + y_threshold, y1, side="left"))
+    last = int(np.searchsorted(row_tops, y2, side="right"))
+    band = [remap[row] for row in rows[first:last]]
+    band = [row[row >= 0] for row in band]
+    new_idx = np.arange(len(kept), len(tokens))
+    band_idx = np.concatenate(band + [new_idx]).astype(np.intp)
+
+    columns = np.empty(len(tokens), dtype=np.intp)
+    columns[: len(kept)] = layout["columns"][kept]
+    if len(layout["span_starts"]):
+        band_tokens = tokens.take(band_idx)
+        columns[band_idx] = assign_columns(
+            band_tokens, layout["span_starts"], layout["span_ends"]
+        )
+    else:
+        columns[band_idx] = 0
+
+    band_rows = [band_idx[row] for row in group_row_indices(tokens.take(band_idx), y_threshold)]
+    band_tops = np.array([tokens.y[row].min() for row in band_rows])
+
+    new_layout = dict(layout)
+    new_layout.update(
+        tokens=tokens,
+        rows=[remap[row] for row in rows[:first]] + band_rows + [remap[row] for row in rows[last:]],
+        row_tops=np.concatenate([row_tops[:first], band_tops, row_tops[last:]]),
+        columns=columns,
+    )
+    if not len(layout["span_starts"]):
+        new_layout["span_starts"] = np.array([x1], dtype=np.float32)
+        new_layout["span_ends"] = np.array([x2], dtype=np.float32)
+
+    band_grid = layout_to_grid(new_layout, band_rows)
+    logger.info(f"Regenerated rows {first}-{last} ({len(band_grid)} new rows)")
+    return new_layout, first, last - first, band_grid
+
+
+def compare_with_csv(grid, csv_path):
+    """Check a grid cell by cell against a reference CSV such as
+    ``test/1_output.csv``.
+
+    Cells are compared by position, blanks included: a value in the wrong
+    column, or a blank filled in, is a mismatch. Returns the fraction of
+    cells that are non-empty in either table and hold the same text in both.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        expected = [[c.strip() for c in row] for row in csv.reader(f)]
+    actual = [["" if cell is None else cell[0].strip() for cell in row] for row in grid]
+
+    width = max((len(row) for row in expected + actual), default=0)
+    matched = total = 0
+    for i in range(max(len(expected), len(actual))):
+        exp = expected[i] if i < len(expected) else []
+        act = actual[i] if i < len(actual) else []
+        exp = exp + [""] * (width - len(exp))
+        act = act + [""] * (width - len(act))
+        for e, a in zip(exp, act):
+            if e or a:
+                total += 1
+                matched += e == a
+    ratio = matched / total if total else 1.0
+    logger.info(f"{matched}/{total} cells match {csv_path}")
+    return ratio
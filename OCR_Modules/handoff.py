@@ -0,0 +1,126 @@
+"""Passing decoded images to worker processes through shared memory.
+
+A pickled image is copied into the pipe, out of it and into a new array
+on the other side. ``ImageRing`` instead keeps a fixed number of slots in
+one shared memory block: the producer writes the image straight into a
+free slot, sends only its small ``ImageHandle`` and the worker wraps the
+slot as a NumPy array, without copying. Slots come back to the ring when
+the worker releases them; while all are in use the producer waits, so a
+slow worker holds the producer back instead of growing a queue of images.
+
+    ring = ImageRing(slots=4, slot_bytes=3840 * 2160 * 3)
+    # pass ``ring`` to the worker processes (Process or Pool initializer args)
+    handle = ring.convert(frame, cv2.COLOR_BGRA2BGR)   # producer
+    image = ring.view(handle)                          # worker
+    ...
+    ring.release(handle)
+
+``python -m benchmarks.bench_handoff`` compares it with pickling.
+"""
+import logging
+import multiprocessing
+import queue
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Room for a 4K BGR screenshot
+DEFAULT_SLOT_BYTES = 3840 * 2160 * 3
+
+# What travels between processes: the slot and how to read it
+ImageHandle = namedtuple("ImageHandle", ["slot", "shape", "dtype"])
+
+
+class ImageRing:
+    """``slots`` reusable image buffers of ``slot_bytes`` in shared memory.
+
+    Created in the producer process; workers get it as an argument when
+    they are started and attach to the same block. Only the creator
+    unlinks the block, with ``unlink`` or on leaving a ``with`` block.
+    """
+
+    def __init__(self, slots=4, slot_bytes=DEFAULT_SLOT_BYTES, context=None):
+        context = context or multiprocessing.get_context()
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._owner = True
+        self._free = context.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        logger.info(f"Image ring: {slots} slots of {slot_bytes / 1024 / 1024:.1f} MB in {self._shm.name}")
+
+    def __getstate__(self):
+        # Workers attach by name; the free-slot queue is shared as is
+        return {"name": self._shm.name, "slots": self.slots, "slot_bytes": self.slot_bytes, "free": self._free}
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.slot_bytes = state["slot_bytes"]
+        self._free = state["free"]
+        # Processes started by multiprocessing share the creator's resource
+        # tracker, so attaching does not add a second owner
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+
+    def _array(self, slot, shape, dtype):
+        return np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+
+    def acquire(self, shape, dtype=np.uint8, timeout=None):
+        """A free slot as a writable array of ``shape``, with its handle.
+
+        Blocks while every slot is in use (``TimeoutError`` after
+        ``timeout`` seconds). Fill the array, then send the handle.
+        """
+        dtype = np.dtype(dtype)
+        shape = tuple(int(size) for size in shape)
+        if int(np.prod(shape)) * dtype.itemsize > self.slot_bytes:
+            raise ValueError(f"Image of shape {shape} does not fit a {self.slot_bytes} byte slot.")
+        try:
+            slot = self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No free image slot: workers are not keeping up.")
+        return ImageHandle(slot, shape, dtype.str), self._array(slot, shape, dtype)
+
+    def put(self, image, timeout=None):
+        # An already decoded image, copied once into a slot
+        handle, array = self.acquire(image.shape, image.dtype, timeout)
+        np.copyto(array, image)
+        return handle
+
+    def convert(self, image, code, channels=3, timeout=None):
+        """``cv2.cvtColor(image, code)`` written directly into a slot, e.g.
+        the BGRA screen grab to BGR, so the converted image is never
+        allocated outside shared memory."""
+        handle, array = self.acquire(image.shape[:2] + (channels,), image.dtype, timeout)
+        converted = cv2.cvtColor(image, code, dst=array)
+        if not np.shares_memory(converted, array):
+            # OpenCV reallocates when dst does not match its output
+            np.copyto(array, converted.reshape(array.shape))
+        return handle
+
+    def view(self, handle):
+        """The image behind ``handle``; valid until it is released."""
+        return self._array(handle.slot, handle.shape, np.dtype(handle.dtype))
+
+    def release(self, handle):
+        # The slot's memory is reused by the next image: drop any views first
+        self._free.put(handle.slot)
+
+    def close(self):
+        self._shm.close()
+
+    def unlink(self):
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
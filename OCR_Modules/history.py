@@ -0,0 +1,318 @@
+"""History of every processed document in a local SQLite database.
+
+Usage: python -m OCR_Modules.history search [TEXT] [--below N] [--above N] [--column N]
+                                             [--engine NAME] [--since DATE] [--until DATE]
+       python -m OCR_Modules.history stats
+
+``search VEMS --below 80 --column 3`` lists the documents whose VEMS row
+holds a value below 80 in the fourth column (%Theo in the spirometry
+reports).
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".ocr_history.sqlite3")
+NUMBER = re.compile(r"[-+]?\d+(?:[.,]\d+)?%?")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT UNIQUE,
+    source TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    created REAL NOT NULL,
+    output_base TEXT,
+    n_tokens INTEGER NOT NULL,
+    mean_confidence REAL,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_created ON documents(created);
+CREATE INDEX IF NOT EXISTS documents_engine_created ON documents(engine, created);
+
+CREATE TABLE IF NOT EXISTS tokens (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    value REAL,
+    x1 REAL, y1 REAL, x2 REAL, y2 REAL
+);
+CREATE INDEX IF NOT EXISTS tokens_doc_row ON tokens(doc_id, row);
+
+-- '%' and '_' are part of terms such as VEMS%CV and DLCO_SB
+CREATE VIRTUAL TABLE IF NOT EXISTS tokens_fts USING fts5(
+    text, content='tokens', content_rowid='id', tokenize="unicode61 tokenchars '%_'"
+);
+CREATE TRIGGER IF NOT EXISTS tokens_ai AFTER INSERT ON tokens BEGIN
+    INSERT INTO tokens_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_ad AFTER DELETE ON tokens BEGIN
+    INSERT INTO tokens_fts(tokens_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def history_path():
+    return os.getenv("OCR_HISTORY") or DEFAULT_HISTORY_PATH
+
+
+def parse_number(text):
+    if not NUMBER.fullmatch(text):
+        return None
+    return float(text.rstrip("%").replace(",", "."))
+
+
+def fts_query(text):
+    # Every word must appear; quoted so FTS5 syntax characters are literal,
+    # a trailing '*' still searches by prefix
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*") and len(word) > 1
+        word = word.rstrip("*")
+        terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def parse_date(text, end=False):
+    # 'YYYY-MM-DD' as a timestamp; the end of the day for upper bounds
+    day = datetime.datetime.strptime(text, "%Y-%m-%d")
+    if end:
+        day += datetime.timedelta(days=1)
+    return day.timestamp()
+
+
+class History:
+    """Tokens, boxes, confidences, engine and timings of every job.
+
+    Tokens keep their grid row and column and, for numbers, their value, so
+    searches can ask for a term and a value in the same row. An FTS5 index
+    covers the token text. Safe to share between threads.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or history_path()
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def record(self, layout, source, engine, job_id=None, output_base=None, timings=None):
+        """Store the tokens of ``layout``; a known ``job_id`` is replaced."""
+        start = time.perf_counter()
+        tokens = layout["tokens"]
+        rows = np.full(len(tokens), -1, dtype=np.intp)
+        for row_index, row in enumerate(layout["rows"]):
+            rows[row] = row_index
+        xs, ys = tokens.boxes[:, :, 0], tokens.boxes[:, :, 1]
+        rects = np.stack([xs.min(axis=1), ys.min(axis=1), xs.max(axis=1), ys.max(axis=1)], axis=1)
+        mean_confidence = float(tokens.confidences.mean()) if len(tokens) else None
+        document = (
+            source,
+            engine,
+            time.time(),
+            output_base,
+            len(tokens),
+            mean_confidence,
+            json.dumps(timings or {}),
+        )
+
+        with self._lock, self.conn:
+            existing = None
+            if job_id is not None:
+                existing = self.conn.execute("SELECT id FROM documents WHERE job_id = ?", (job_id,)).fetchone()
+            if existing:
+                doc_id = existing[0]
+                self.conn.execute("DELETE FROM tokens WHERE doc_id = ?", (doc_id,))
+                self.conn.execute(
+                    "UPDATE documents SET source = ?, engine = ?, created = ?, output_base = ?, "
+                    "n_tokens = ?, mean_confidence = ?, timings = ? WHERE id = ?",
+                    document + (doc_id,),
+                )
+            else:
+                doc_id = self.conn.execute(
+                    "INSERT INTO documents (job_id, source, engine, created, output_base, n_tokens, "
+                    "mean_confidence, timings) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id,) + document,
+                ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO tokens (doc_id, row, col, text, confidence, value, x1, y1, x2, y2) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (doc_id, row, col, text, confidence, parse_number(text), *rect)
+                    for row, col, text, confidence, rect in zip(
+                        rows.tolist(),
+                        layout["columns"].tolist(),
+                        tokens.texts,
+                        tokens.confidences.tolist(),
+                        rects.round(1).tolist(),
+                    )
+                ),
+            )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"History: {len(tokens)} tokens of {source} recorded in {elapsed_ms:.1f} ms")
+        return doc_id
+
+    def search(
+        self, text=None, below=None, above=None, column=None, engine=None, since=None, until=None, limit=100
+    ):
+        """Documents matching every given condition, newest first.
+
+        ``text`` is searched in the token text; ``below``/``above`` require a
+        number in the same row as the matched text (in any row without
+        ``text``), in grid ``column`` if given. ``since``/``until`` are
+        timestamps. Returns dicts with the document fields plus the matched
+        ``row`` and its ``row_text``.
+        """
+        value_where, value_params = [], []
+        for condition, value in (("v.value < ?", below), ("v.value > ?", above), ("v.col = ?", column)):
+            if value is not None:
+                value_where.append(condition)
+                value_params.append(value)
+        if below is None and above is None:
+            value_where = value_params = []
+        document_where, document_params = [], []
+        for condition, value in (("d.engine = ?", engine), ("d.created >= ?", since), ("d.created < ?", until)):
+            if value is not None:
+                document_where.append(condition)
+                document_params.append(value)
+
+        columns = "d.id, d.source, d.engine, d.created, d.output_base, d.n_tokens, d.mean_confidence, d.timings"
+        if text:
+            # Driven by the FTS index, newest tokens first, so the scan stops
+            # once ``limit`` documents are found
+            where = ["tokens_fts MATCH ?"] + document_where
+            params = [fts_query(text)] + document_params
+            if value_where:
+                where.append(
+                    "EXISTS (SELECT 1 FROM tokens v WHERE v.doc_id = t.doc_id AND v.row = t.row AND "
+                    + " AND ".join(value_where)
+                    + ")"
+                )
+                params += value_params
+            sql = (
+                f"SELECT {columns}, t.row FROM tokens_fts JOIN tokens t ON t.id = tokens_fts.rowid "
+                f"JOIN documents d ON d.id = t.doc_id WHERE {' AND '.join(where)} ORDER BY tokens_fts.rowid DESC"
+            )
+        elif value_where:
+            row = f"(SELECT v.row FROM tokens v WHERE v.doc_id = d.id AND {' AND '.join(value_where)} LIMIT 1)"
+            where = document_where + ["matched_row IS NOT NULL"]
+            params = value_params + document_params
+            sql = f"SELECT {columns}, {row} AS matched_row FROM documents d WHERE {' AND '.join(where)} ORDER BY d.created DESC"
+        else:
+            where = document_where or ["1"]
+            params = document_params
+            sql = f"SELECT {columns}, NULL FROM documents d WHERE {' AND '.join(where)} ORDER BY d.created DESC"
+
+        start = time.perf_counter()
+        results, seen = [], set()
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            while len(results) < limit:
+                match = cursor.fetchone()
+                if match is None:
+                    break
+                doc_id, source, engine_name, created, output_base, n_tokens, confidence, timings, row = match
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                row_text = None
+                if row is not None:
+                    row_text = " ".join(
+                        t for (t,) in self.conn.execute(
+                            "SELECT text FROM tokens WHERE doc_id = ? AND row = ? ORDER BY col, x1",
+                            (doc_id, row),
+                        )
+                    )
+                results.append(
+                    {
+                        "id": doc_id,
+                        "source": source,
+                        "engine": engine_name,
+                        "created": created,
+                        "output_base": output_base,
+                        "n_tokens": n_tokens,
+                        "mean_confidence": confidence,
+                        "timings": json.loads(timings) if timings else {},
+                        "row": row,
+                        "row_text": row_text,
+                    }
+                )
+            cursor.close()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"History search returned {len(results)} document(s) in {elapsed_ms:.1f} ms")
+        return results
+
+    def stats(self):
+        with self._lock:
+            documents, tokens = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(n_tokens), 0) FROM documents"
+            ).fetchone()
+            engines = dict(
+                self.conn.execute("SELECT engine, COUNT(*) FROM documents GROUP BY engine").fetchall()
+            )
+        return {"documents": documents, "tokens": tokens, "engines": engines}
+
+
+def format_result(result):
+    created = datetime.datetime.fromtimestamp(result["created"]).strftime("%Y-%m-%d %H:%M")
+    line = f"{created}  {result['engine']:<12}  {result['source']}"
+    if result["row_text"]:
+        line += f"\n    {result['row_text']}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the history of processed documents.")
+    parser.add_argument("--db", help=f"history database (default: {history_path()})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search")
+    search.add_argument("text", nargs="?")
+    search.add_argument("--below", type=float)
+    search.add_argument("--above", type=float)
+    search.add_argument("--column", type=int, help="grid column of the value, from 0")
+    search.add_argument("--engine")
+    search.add_argument("--since", help="YYYY-MM-DD")
+    search.add_argument("--until", help="YYYY-MM-DD, inclusive")
+    search.add_argument("--limit", type=int, default=50)
+    commands.add_parser("stats")
+    args = parser.parse_args()
+
+    history = History(args.db)
+    if args.command == "stats":
+        print(json.dumps(history.stats(), indent=2))
+        return
+    results = history.search(
+        args.text,
+        below=args.below,
+        above=args.above,
+        column=args.column,
+        engine=args.engine,
+        since=parse_date(args.since) if args.since else None,
+        until=parse_date(args.until, end=True) if args.until else None,
+        limit=args.limit,
+    )
+    for result in results:
+        print(format_result(result))
+    print(f"{len(results)} document(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Per-language recognition models, loaded on demand.
+
+EasyOCR and PaddleOCR recognize with one model per language or script; an
+engine module that supports several lists them in ``LANGUAGE_CODES``
+(language -> engine code) and takes a ``language`` when initialized.
+
+``LanguageModels`` starts from the engine's default (English) model. After
+every OCR call a sample of the tokens goes through ``detect_language``;
+when another candidate language (``OCR_LANGUAGES``, default ``en,fr``)
+reads better, its model is loaded, the image is read again with it, and it
+stays the model tried first for the next jobs. At most
+``OCR_LANGUAGE_MODELS`` models per engine are kept (default 2, the
+default model included); the least recently used other one goes first.
+"""
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+
+from OCR_Modules.tokens import as_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = "en"
+SAMPLE_TOKENS = 200
+MIN_CONFIDENCE = 0.5
+# Word and accent hits needed to leave the current language
+MIN_EVIDENCE = 2
+
+LANGUAGE_SCRIPTS = {
+    "en": "latin", "fr": "latin", "de": "latin", "es": "latin", "it": "latin", "pt": "latin",
+    "ru": "cyrillic", "ar": "arabic", "zh": "han", "ja": "kana", "ko": "hangul",
+}
+
+# Frequent short words and report vocabulary, without accents: an English
+# model reads "Prénom" as "Prenom"
+LANGUAGE_WORDS = {
+    "en": {"the", "and", "of", "to", "in", "for", "with", "on", "is", "by", "from", "name", "time",
+           "weight", "height", "age", "sex", "result", "results", "normal", "predicted", "before", "after"},
+    "fr": {"le", "la", "les", "de", "des", "du", "et", "au", "aux", "un", "une", "pour", "avec", "sur", "par",
+           "est", "heure", "nom", "prenom", "poids", "taille", "sexe", "mesure", "norme", "theo", "substance",
+           "resultat", "resultats", "avant", "apres", "medecin", "naissance"},
+    "de": {"der", "die", "das", "und", "mit", "fur", "von", "zu", "ist", "im", "uhrzeit", "datum", "gewicht",
+           "grosse", "geschlecht", "alter", "messung", "vor", "nach", "soll"},
+    "es": {"el", "la", "los", "las", "de", "del", "y", "en", "con", "por", "para", "es", "hora", "fecha",
+           "nombre", "peso", "altura", "sexo", "edad", "antes", "despues", "teorico"},
+    "it": {"il", "lo", "la", "gli", "le", "di", "del", "della", "e", "con", "per", "ora", "nome", "peso",
+           "altezza", "sesso", "eta", "prima", "dopo", "teorico"},
+    "pt": {"o", "a", "os", "as", "de", "do", "da", "e", "com", "por", "para", "hora", "data", "nome", "peso",
+           "altura", "sexo", "idade", "antes", "depois", "teorico"},
+}
+# Letters only one language of the script writes
+LANGUAGE_LETTERS = {
+    "fr": set("éèêëàâçîïôùûœ"),
+    "de": set("äöüß"),
+    "es": set("ñáíóú¿¡"),
+    "it": set("àèìòù"),
+    "pt": set("ãõâêôç"),
+}
+
+WORD = re.compile(r"[^\W\d_]+")
+
+
+def candidate_languages():
+    value = os.getenv("OCR_LANGUAGES", "en,fr")
+    return [language.strip() for language in value.split(",") if language.strip()]
+
+
+def max_models():
+    # The default model and at least one other
+    return max(int(os.getenv("OCR_LANGUAGE_MODELS", "2")), 2)
+
+
+def strip_accents(text):
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def script_of(char):
+    name = unicodedata.name(char, "")
+    if name.startswith(("HIRAGANA", "KATAKANA")):
+        return "kana"
+    if name.startswith("CJK"):
+        return "han"
+    return name.split(" ", 1)[0].lower() or None
+
+
+def detect_language(texts, candidates):
+    """The candidate language ``texts`` are most likely written in, or None.
+
+    The script of the letters decides first (kana over han, as Japanese
+    mixes both); within the Latin script it is the count of frequent words
+    and of letters only one language writes. Cheap enough to run on every
+    job: a few hundred tokens, no model.
+    """
+    scripts = Counter()
+    words = Counter()
+    letters = Counter()
+    for text in texts:
+        for char in text:
+            if char.isalpha():
+                scripts[script_of(char)] += 1
+                letters[char.lower()] += 1
+        words.update(strip_accents(word).lower() for word in WORD.findall(text))
+    if not scripts:
+        return None
+
+    script = "kana" if scripts["kana"] else scripts.most_common(1)[0][0]
+    in_script = [language for language in candidates if LANGUAGE_SCRIPTS.get(language) == script]
+    if len(in_script) <= 1:
+        return in_script[0] if in_script else None
+
+    scores = {
+        language: sum(words[word] for word in LANGUAGE_WORDS.get(language, ()))
+        + 2 * sum(letters[letter] for letter in LANGUAGE_LETTERS.get(language, ()))
+        for language in in_script
+    }
+    best = max(in_script, key=scores.get)
+    if scores[best] < MIN_EVIDENCE or list(scores.values()).count(scores[best]) > 1:
+        return None
+    return best
+
+
+def sample_texts(tokens):
+    # Confident tokens only: misreadings are not evidence of anything
+    tokens = as_tokens(tokens)
+    return [
+        text for text, confidence in zip(tokens.texts, tokens.confidences.tolist()) if confidence >= MIN_CONFIDENCE
+    ][:SAMPLE_TOKENS]
+
+
+class LanguageModels:
+    """The models of one engine by language, behind ``run``.
+
+    ``load(language)`` initializes the engine for a language; ``model`` is
+    the default one, already loaded. Engines without ``LANGUAGE_CODES`` run
+    with ``model`` only and nothing is detected.
+    """
+
+    def __init__(self, engine, model, load, candidates=None, capacity=None):
+        from OCR_Modules.engines import engine_module
+
+        self.engine = engine
+        codes = getattr(engine_module(engine), "LANGUAGE_CODES", {})
+        if candidates is None:
+            candidates = candidate_languages()
+        self.candidates = [language for language in candidates if language in codes]
+        self.capacity = capacity or max_models()
+        self.load = load
+        self.models = OrderedDict([(DEFAULT_LANGUAGE, model)])
+        self.current = DEFAULT_LANGUAGE
+        self.failed = set()
+        self._lock = threading.Lock()
+
+    def model(self, language=None):
+        """The model for ``language`` (the current one by default), loaded
+        if needed; None if it could not be loaded."""
+        language = language or self.current
+        with self._lock:
+            if language in self.models:
+                self.models.move_to_end(language)
+                return self.models[language]
+            if language in self.failed:
+                return None
+            logger.info(f"Loading the {language} model of {self.engine}...")
+            try:
+                model = self.load(language)
+            except Exception as e:
+                # No network for the download, missing language data...
+                logger.warning(f"Could not load the {language} model of {self.engine}: {e}")
+                self.failed.add(language)
+                return None
+            self.models[language] = model
+            # The default model stays: it is the fallback and the caller holds it anyway
+            while len(self.models) > self.capacity:
+                evicted = next(name for name in self.models if name != DEFAULT_LANGUAGE)
+                del self.models[evicted]
+                logger.info(f"Unloaded the {evicted} model of {self.engine}")
+            return model
+
+    def run(self, func):
+        """``func(model)`` with the current language's model, again with a
+        better matching language's model if the result reads like one."""
+        language = self.current
+        model = self.model(language)
+        if model is None:
+            language, model = DEFAULT_LANGUAGE, self.model(DEFAULT_LANGUAGE)
+        tokens = func(model)
+        if len(self.candidates) < 2:
+            return tokens
+
+        detected = detect_language(sample_texts(tokens), self.candidates)
+        if detected is None or detected == language:
+            return tokens
+        model = self.model(detected)
+        if model is None:
+            return tokens
+        logger.info(f"{self.engine}: text reads as {detected}, not {language}; reading it again")
+        self.current = detected
+        return func(model)
+
+    def process_array(self, image, module):
+        return self.run(lambda ocr: module.process_array(image, ocr))
@@ -0,0 +1,214 @@
+import logging
+import os
+import re
+
+from OCR_Modules.tokens import OCRTokens
+
+logger = logging.getLogger(__name__)
+
+# Numeric cell formats seen in the reports: 3.85, -12, 74%, 11:51, 21.02.22
+NUMERIC_PATTERNS = (
+    re.compile(r"[-+]?\d+(?:[.,]\d+)?%?"),
+    re.compile(r"\d{1,2}:\d{2}(?::\d{2})?"),
+    re.compile(r"\d{1,2}[./-]\d{1,2}[./-]\d{2,4}"),
+)
+# Letters OCR commonly reads instead of digits
+DIGIT_CONFUSIONS = str.maketrans({"O": "0", "o": "0", "D": "0", "l": "1", "I": "1", "|": "1", "i": "1",
+                                  "S": "5", "s": "5", "B": "8", "Z": "2", "z": "2", "G": "6", "q": "9"})
+NUMERIC_CHARS = set("0123456789.,:%-+/")
+CACHE_SIZE = 4096
+# Only the first characters of a word are indexed, as in SymSpell: the
+# number of deletions stays small however long the term is
+PREFIX_LENGTH = 7
+
+
+def max_distance(length):
+    # Edits allowed for a word of this length: none for very short terms,
+    # where one edit turns most terms into another
+    if length <= 2:
+        return 0
+    if length <= 5:
+        return 1
+    return 2
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance of ``a`` and ``b``, or ``limit + 1``
+    as soon as it is known to exceed ``limit``.
+
+    Only the diagonal band of width ``limit`` is computed, so long terms
+    cost little more than short ones.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous2 = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        current = [i if i <= limit else over] + [over] * len(b)
+        within = current[0] <= limit
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cb = b[j - 1]
+            value = previous[j - 1] if ca == cb else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb and previous2[j - 2] + 1 < value:
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value <= limit:
+                within = True
+        if not within:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+def deletes(word, depth):
+    # Every string obtained by removing up to ``depth`` characters
+    variants = {word}
+    level = [word]
+    for _ in range(depth):
+        level = {w[:i] + w[i + 1 :] for w in level if len(w) > 1 for i in range(len(w))}
+        variants.update(level)
+    return variants
+
+
+def is_numeric(text):
+    return any(pattern.fullmatch(text) for pattern in NUMERIC_PATTERNS)
+
+
+def repair_numeric(text):
+    """``text`` with look-alike letters replaced by digits, if that turns it
+    into a valid number and it was mostly digits already; else ``None``."""
+    digits = sum(c.isdigit() for c in text)
+    if digits == 0 or digits < len(text) / 2:
+        return None
+    repaired = text.translate(DIGIT_CONFUSIONS).replace(" ", "")
+    if repaired != text and is_numeric(repaired):
+        return repaired
+    return None
+
+
+def looks_numeric(text):
+    return sum(c.isdigit() for c in text) > 0 and all(c in NUMERIC_CHARS or c.isdigit() for c in text)
+
+
+def lexicon_path():
+    return os.getenv("OCR_LEXICON") or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lexicon", "medical.txt"
+    )
+
+
+def read_terms(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+class Lexicon:
+    """Symmetric-delete index of a term list for fuzzy lookups.
+
+    Every term is stored under all deletions of its prefix, so a lookup only
+    generates the deletions of the query's prefix and checks the few terms
+    sharing one of them, instead of comparing against the whole list.
+    """
+
+    def __init__(self, terms):
+        self.terms = {}  # casefolded term -> spelling from the lexicon
+        self.index = {}  # deletion -> casefolded terms
+        for term in terms:
+            key = term.casefold()
+            self.terms.setdefault(key, term)
+            for variant in deletes(key[:PREFIX_LENGTH], max_distance(len(key))):
+                self.index.setdefault(variant, set()).add(key)
+        self.cache = {}
+        logger.info(f"Lexicon of {len(self.terms)} terms, {len(self.index)} index entries")
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or lexicon_path()
+        return cls(read_terms(path))
+
+    def __contains__(self, text):
+        return text.casefold() in self.terms
+
+    def lookup(self, text):
+        """Closest term to ``text`` and its distance, or ``(None, None)``
+        when nothing is close enough or two terms are equally close."""
+        key = text.casefold()
+        if key in self.cache:
+            return self.cache[key]
+        result = self._lookup(key)
+        if len(self.cache) >= CACHE_SIZE:
+            self.cache.clear()
+        self.cache[key] = result
+        return result
+
+    def _lookup(self, key):
+        if key in self.terms:
+            return self.terms[key], 0
+        limit = max_distance(len(key))
+        if limit == 0:
+            return None, None
+        candidates = set()
+        for variant in deletes(key[:PREFIX_LENGTH], limit):
+            candidates.update(self.index.get(variant, ()))
+
+        best, best_distance, tied = None, limit + 1, False
+        for candidate in candidates:
+            # The shorter of the two words sets how many edits are believable
+            allowed = min(limit, max_distance(len(candidate)))
+            distance = edit_distance(key, candidate, allowed)
+            if distance > allowed:
+                continue
+            if distance < best_distance:
+                best, best_distance, tied = candidate, distance, False
+            elif distance == best_distance:
+                tied = True
+        if best is None or tied:
+            return None, None
+        return self.terms[best], best_distance
+
+
+def correct_tokens(tokens, lexicon, yellow_threshold=0.92):
+    """Correct low-confidence tokens against ``lexicon`` and number formats.
+
+    Tokens below ``yellow_threshold`` that are one or two edits away from a
+    single lexicon term, or become a valid number once look-alike letters
+    are replaced by digits, are rewritten and raised to ``yellow_threshold``,
+    so they still show as needing review. Number-like tokens that are not
+    valid numbers are lowered below it. Returns new tokens whose
+    ``originals`` hold the text each corrected token had.
+    """
+    texts = list(tokens.texts)
+    confidences = tokens.confidences.copy()
+    originals = list(tokens.originals) if tokens.originals is not None else [None] * len(texts)
+    corrected = invalid = 0
+    for i, text in enumerate(texts):
+        if text in lexicon or is_numeric(text):
+            continue
+        if confidences[i] >= yellow_threshold:
+            if looks_numeric(text):
+                # Confidently read, but not a number the reports contain
+                confidences[i] = min(confidences[i], yellow_threshold - 0.01)
+                invalid += 1
+            continue
+
+        replacement = repair_numeric(text)
+        if replacement is None:
+            replacement, _ = lexicon.lookup(text)
+        if replacement is None:
+            continue
+        if originals[i] is None:
+            originals[i] = text
+        texts[i] = replacement
+        confidences[i] = max(confidences[i], yellow_threshold)
+        corrected += 1
+
+    if corrected or invalid:
+        logger.info(f"Lexicon corrected {corrected} token(s), {invalid} invalid number(s)")
+    if not any(o is not None for o in originals):
+        originals = None
+    return OCRTokens(tokens.boxes, confidences, texts, tokens.centers, originals)
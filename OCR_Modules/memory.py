@@ -0,0 +1,94 @@
+import logging
+import os
+import sys
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+TOP_ALLOCATIONS = 10
+
+
+def process_rss():
+    """Resident set size of this process in bytes, or None if unknown."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return None
+
+
+class MemoryTracker:
+    """RSS, and optionally traced Python allocations, after every job.
+
+    The first job sets the baseline, since it loads engines and fills
+    caches. Each time the growth over the baseline crosses another
+    ``warn_mb`` a warning is logged, with the allocation sites that grew
+    most when tracing (``OCR_MEMORY_TRACE=1``; it slows Python down).
+    """
+
+    def __init__(self, warn_mb=None, trace=None, frames=10):
+        if warn_mb is None:
+            warn_mb = float(os.getenv("OCR_MEMORY_WARN_MB", "500"))
+        if trace is None:
+            trace = os.getenv("OCR_MEMORY_TRACE", "0") != "0"
+        self.warn_mb = warn_mb
+        self.trace = trace
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.jobs = 0
+        self.baseline_rss = None
+        self.baseline_snapshot = None
+        self.warned_level = 0
+
+    def snapshot(self):
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+
+    def top_growth(self, snapshot):
+        # Allocation sites that grew the most since the baseline
+        if snapshot is None or self.baseline_snapshot is None:
+            return []
+        stats = snapshot.compare_to(self.baseline_snapshot, "lineno")
+        return [stat for stat in stats[:TOP_ALLOCATIONS] if stat.size_diff > 0]
+
+    def record(self, job_id=None):
+        """Measure after a job; returns a warning message or None."""
+        self.jobs += 1
+        rss = process_rss()
+        snapshot = self.snapshot()
+        if self.baseline_rss is None:
+            self.baseline_rss = rss
+            self.baseline_snapshot = snapshot
+            if rss is not None:
+                logger.info(f"Memory baseline after job {job_id}: RSS {rss / MB:.1f} MB")
+            return None
+        if rss is None:
+            return None
+
+        growth_mb = (rss - self.baseline_rss) / MB
+        traced = ""
+        if snapshot is not None:
+            traced = f", traced {tracemalloc.get_traced_memory()[0] / MB:.1f} MB"
+        logger.info(
+            f"Memory after job {job_id}: RSS {rss / MB:.1f} MB "
+            f"({growth_mb:+.1f} MB over {self.jobs - 1} job(s) since the baseline){traced}"
+        )
+
+        level = int(growth_mb // self.warn_mb) if self.warn_mb > 0 else 0
+        if level <= self.warned_level:
+            return None
+        self.warned_level = level
+        message = f"Memory use grew by {growth_mb:.0f} MB over {self.jobs - 1} job(s); restart the app if it keeps growing."
+        logger.warning(message)
+        for stat in self.top_growth(snapshot):
+            logger.warning(f"  {stat}")
+        return message
@@ -0,0 +1,246 @@
+import cv2
+import logging
+import math
+import numpy as np
+import os
+
+from OCR_Modules.detection import crop_box, tokens_from_lines
+from OCR_Modules.tokens import OCRTokens
+from OCR_Modules.warmup import compiled_cache_enabled
+
+logger = logging.getLogger(__name__)
+
+# Exported PP-OCR models, see OCR_Modules/onnx_models.py
+DEFAULT_MODEL_DIR = os.path.join(os.path.expanduser('~'), '.paddleocr', 'onnx')
+
+# Pre/post-processing defaults of PaddleOCR's English pipeline
+DET_LIMIT_SIDE = 960
+DET_THRESH = 0.3
+DET_BOX_THRESH = 0.6
+DET_UNCLIP_RATIO = 1.5
+DET_MAX_CANDIDATES = 1000
+REC_HEIGHT = 48
+REC_MAX_WIDTH = 320
+REC_BATCH = 6
+
+
+def model_dir():
+    return os.getenv('ONNX_MODEL_DIR', DEFAULT_MODEL_DIR)
+
+
+def model_paths(directory=None, quantized=True):
+    # Prefer the INT8 models when they have been produced
+    directory = directory or model_dir()
+    paths = {}
+    for name in ('det', 'rec'):
+        int8 = os.path.join(directory, f'{name}.int8.onnx')
+        paths[name] = int8 if quantized and os.path.exists(int8) else os.path.join(directory, f'{name}.onnx')
+    paths['dict'] = os.path.join(directory, 'dict.txt')
+    return paths
+
+
+def models_available(directory=None):
+    return all(os.path.exists(path) for path in model_paths(directory).values())
+
+
+class OnnxOCR:
+    """PP-OCR detection and recognition models running on ONNX Runtime."""
+
+    def __init__(self, directory=None, quantized=True, num_threads=None):
+        paths = model_paths(directory, quantized)
+        self.num_threads = num_threads or os.cpu_count()
+        self.det = create_session(paths['det'], num_threads)
+        self.rec = create_session(paths['rec'], num_threads)
+        self.paths = paths
+
+        with open(paths['dict'], encoding='utf-8') as f:
+            characters = [line.rstrip('\r\n') for line in f]
+        # CTC blank first, the space character last, as in PaddleOCR
+        self.characters = ['blank'] + characters + [' ']
+
+    def detect(self, image):
+        # DB text detection; returns (N, 4, 2) boxes in image coordinates
+        height, width = image.shape[:2]
+        blob = det_input(image)
+        prob = self.det.run(None, {self.det.get_inputs()[0].name: blob})[0][0, 0]
+        return db_postprocess(prob, width / blob.shape[3], height / blob.shape[2], width, height)
+
+    def recognize(self, crops):
+        # CTC recognition of text line crops; returns (texts, confidences)
+        texts, confidences = [''] * len(crops), [0.0] * len(crops)
+        for batch, blob in rec_inputs(crops):
+            probs = self.rec.run(None, {self.rec.get_inputs()[0].name: blob})[0]
+            for j, i in enumerate(batch):
+                texts[i], confidences[i] = self.ctc_decode(probs[j])
+        return texts, confidences
+
+    def ctc_decode(self, probs):
+        indices = probs.argmax(axis=1)
+        scores = probs.max(axis=1)
+        keep = indices != 0
+        keep[1:] &= indices[1:] != indices[:-1]
+        if not keep.any():
+            return '', 0.0
+        text = ''.join(self.characters[i] for i in indices[keep])
+        return text, float(scores[keep].mean())
+
+
+def create_session(path, num_threads=None):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = num_threads or os.cpu_count()
+    # Graph optimized on the first launch, tied to this machine's CPU
+    optimized = path[: -len('.onnx')] + '.opt.onnx'
+    if (
+        compiled_cache_enabled()
+        and os.path.exists(optimized)
+        and os.path.getmtime(optimized) >= os.path.getmtime(path)
+    ):
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        path = optimized
+    else:
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if compiled_cache_enabled():
+            options.optimized_model_filepath = optimized
+    return ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+
+def det_input(image):
+    # Resize so the longest side is at most DET_LIMIT_SIDE, in multiples of 32
+    height, width = image.shape[:2]
+    ratio = min(1.0, DET_LIMIT_SIDE / max(height, width))
+    resize_h = max(32, int(round(height * ratio / 32)) * 32)
+    resize_w = max(32, int(round(width * ratio / 32)) * 32)
+    resized = cv2.resize(image, (resize_w, resize_h))
+
+    blob = (resized.astype(np.float32) / 255.0 - np.float32([0.485, 0.456, 0.406])) / np.float32(
+        [0.229, 0.224, 0.225]
+    )
+    return np.ascontiguousarray(blob.transpose(2, 0, 1)[None])
+
+
+def rec_inputs(crops):
+    # Yield (crop indices, input blob) batches; similar aspect ratios are
+    # batched together to keep the padding small
+    order = np.argsort([crop.shape[1] / crop.shape[0] for crop in crops])
+    for start in range(0, len(order), REC_BATCH):
+        batch = order[start : start + REC_BATCH]
+        max_ratio = max(crops[i].shape[1] / crops[i].shape[0] for i in batch)
+        batch_width = min(REC_MAX_WIDTH, int(math.ceil(REC_HEIGHT * max_ratio)))
+        blob = np.zeros((len(batch), 3, REC_HEIGHT, batch_width), dtype=np.float32)
+        for j, i in enumerate(batch):
+            crop = crops[i]
+            width = min(batch_width, int(math.ceil(REC_HEIGHT * crop.shape[1] / crop.shape[0])))
+            resized = cv2.resize(crop, (width, REC_HEIGHT)).astype(np.float32)
+            blob[j, :, :, :width] = ((resized / 255.0 - 0.5) / 0.5).transpose(2, 0, 1)
+        yield batch, blob
+
+
+def db_postprocess(prob, scale_x, scale_y, width, height, min_size=3):
+    import pyclipper
+
+    bitmap = (prob > DET_THRESH).astype(np.uint8)
+    contours, _ = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for contour in contours[:DET_MAX_CANDIDATES]:
+        points, short_side = min_area_box(contour)
+        if short_side < min_size:
+            continue
+        if box_score(prob, points) < DET_BOX_THRESH:
+            continue
+
+        # Grow the shrunk text kernel back to the full text extent
+        area = cv2.contourArea(points)
+        length = cv2.arcLength(points, True)
+        if length == 0:
+            continue
+        offset = pyclipper.PyclipperOffset()
+        offset.AddPath(points.astype(np.int64).tolist(), pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+        expanded = offset.Execute(area * DET_UNCLIP_RATIO / length)
+        if len(expanded) != 1:
+            continue
+        points, short_side = min_area_box(np.asarray(expanded[0], dtype=np.float32).reshape(-1, 1, 2))
+        if short_side < min_size + 2:
+            continue
+
+        points[:, 0] = np.clip(np.round(points[:, 0] * scale_x), 0, width)
+        points[:, 1] = np.clip(np.round(points[:, 1] * scale_y), 0, height)
+        boxes.append(points)
+
+    if not boxes:
+        return np.zeros((0, 4, 2), dtype=np.float32)
+    boxes = np.asarray(boxes, dtype=np.float32)
+    # Reading order: top to bottom, then left to right
+    order = np.lexsort((boxes[:, 0, 0], boxes[:, 0, 1] // 10))
+    return boxes[order]
+
+
+def min_area_box(contour):
+    # Corners ordered top-left, top-right, bottom-right, bottom-left
+    rect = cv2.minAreaRect(contour)
+    points = sorted(cv2.boxPoints(rect).tolist(), key=lambda p: p[0])
+    left = sorted(points[:2], key=lambda p: p[1])
+    right = sorted(points[2:], key=lambda p: p[1])
+    box = np.asarray([left[0], right[0], right[1], left[1]], dtype=np.float32)
+    return box, min(rect[1])
+
+
+def box_score(prob, box):
+    # Mean probability inside the box
+    height, width = prob.shape
+    x1 = int(np.clip(np.floor(box[:, 0].min()), 0, width - 1))
+    x2 = int(np.clip(np.ceil(box[:, 0].max()), 0, width - 1))
+    y1 = int(np.clip(np.floor(box[:, 1].min()), 0, height - 1))
+    y2 = int(np.clip(np.ceil(box[:, 1].max()), 0, height - 1))
+    mask = np.zeros((y2 - y1 + 1, x2 - x1 + 1), dtype=np.uint8)
+    shifted = (box - np.float32([x1, y1])).astype(np.int32)
+    cv2.fillPoly(mask, [shifted], 1)
+    return cv2.mean(prob[y1 : y2 + 1, x1 : x2 + 1], mask)[0]
+
+
+def initialize_onnx(directory=None, quantized=None, num_threads=None):
+    if quantized is None:
+        quantized = os.getenv('ONNX_QUANTIZED', '1') != '0'
+    logger.info("Initializing ONNX Runtime OCR...")
+    ocr = OnnxOCR(directory, quantized, num_threads)
+    logger.info(f"ONNX models: {ocr.paths['det']}, {ocr.paths['rec']}")
+    return ocr
+
+def set_num_threads(threads):
+    # ONNX Runtime sessions keep the thread count they were created with
+    pass
+
+def fixed_threads(ocr):
+    # Leased in full for every call, see engines.engine_lease
+    return ocr.num_threads
+
+def detect_array(image, ocr):
+    # Text-line boxes only, for the shared detection stage
+    return ocr.detect(image)
+
+def recognize_boxes(image, boxes, ocr):
+    # Recognize the text inside already detected boxes
+    texts, confidences = ocr.recognize([crop_box(image, box) for box in boxes])
+    return tokens_from_lines(boxes, texts, confidences)
+
+def process_image(file_path, ocr):
+    # Load image
+    image = cv2.imread(file_path)
+    if image is None:
+        raise ValueError("Could not open image!")
+    return process_array(image, ocr)
+
+def process_array(image, ocr):
+    # OCR an already decoded BGR image, either a full page or a crop of one
+    try:
+        logger.info("Processing image with ONNX Runtime...")
+
+        boxes = detect_array(image, ocr)
+        if len(boxes) == 0:
+            return OCRTokens.empty()
+        return recognize_boxes(image, boxes, ocr)
+
+    except Exception as e:
+        logger.error(f"Error processing image: {str(e)}")
+        raise
@@ -0,0 +1,201 @@
+"""Export, quantize and verify the ONNX models used by OCR_Modules/onnxOCR.py.
+
+Usage:
+    python -m OCR_Modules.onnx_models export [--output DIR]
+    python -m OCR_Modules.onnx_models quantize [--output DIR] [images ...]
+    python -m OCR_Modules.onnx_models verify [--output DIR] [--min-agreement 0.98] [images ...]
+
+``export`` converts the PaddleOCR detection and recognition models that
+PaddleOCR itself downloads (paddle2onnx must be installed), ``quantize``
+writes INT8 copies calibrated on the given images, and ``verify`` compares
+the ONNX tokens with PaddleOCR's on the same images.
+"""
+import argparse
+import glob
+import logging
+import os
+import shutil
+import subprocess
+import sys
+
+import cv2
+import numpy as np
+
+from OCR_Modules import onnxOCR
+from OCR_Modules.detection import crop_box
+from OCR_Modules.onnxOCR import OnnxOCR, det_input, model_dir, rec_inputs
+from OCR_Modules.tokens import as_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def default_images():
+    # Source images of the test fixtures, not the rendered outputs
+    return sorted(p for p in glob.glob(os.path.join('test', '*.png')) if '_output' not in p)
+
+
+def export_models(output_dir):
+    from OCR_Modules.paddleOCR import initialize_ocr_SLANet_LCNetV2
+
+    # Let PaddleOCR resolve (and download) the models it would use itself
+    args = initialize_ocr_SLANet_LCNetV2().args
+    os.makedirs(output_dir, exist_ok=True)
+    for name, source in (('det', args.det_model_dir), ('rec', args.rec_model_dir)):
+        target = os.path.join(output_dir, f'{name}.onnx')
+        subprocess.run(
+            [
+                'paddle2onnx',
+                '--model_dir', source,
+                '--model_filename', 'inference.pdmodel',
+                '--params_filename', 'inference.pdiparams',
+                '--save_file', target,
+                '--opset_version', '11',
+                '--enable_onnx_checker', 'True',
+            ],
+            check=True,
+        )
+        logger.info(f"Exported {source} to {target}")
+    shutil.copyfile(args.rec_char_dict_path, os.path.join(output_dir, 'dict.txt'))
+
+
+def quantize_models(output_dir, images):
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class CalibrationReader(CalibrationDataReader):
+        # Feeds preprocessed inputs to the calibrator
+        def __init__(self, input_name, blobs):
+            self.input_name = input_name
+            self.blobs = iter(blobs)
+
+        def get_next(self):
+            blob = next(self.blobs, None)
+            return None if blob is None else {self.input_name: blob}
+
+    # Calibrate on real pages and on the text crops the FP32 detector finds in them
+    ocr = OnnxOCR(output_dir, quantized=False)
+    pages = [cv2.imread(path) for path in images]
+    det_blobs = [det_input(page) for page in pages]
+    crops = [crop_box(page, box) for page in pages for box in ocr.detect(page)]
+    rec_blobs = [blob for _, blob in rec_inputs(crops)]
+
+    for name, blobs in (('det', det_blobs), ('rec', rec_blobs)):
+        source = os.path.join(output_dir, f'{name}.onnx')
+        target = os.path.join(output_dir, f'{name}.int8.onnx')
+        input_name = onnx.load(source).graph.input[0].name
+        quantize_static(
+            source,
+            target,
+            CalibrationReader(input_name, blobs),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+        size_mb = os.path.getsize(target) / 1e6
+        logger.info(f"Quantized {source} to {target} ({size_mb:.1f} MB, {len(blobs)} calibration inputs)")
+
+
+def _bounds(tokens):
+    return np.concatenate([tokens.boxes.min(axis=1), tokens.boxes.max(axis=1)], axis=1)
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def compare_tokens(reference, candidate, min_iou=0.5):
+    """Drift of ``candidate`` tokens against ``reference`` tokens.
+
+    Tokens are paired greedily by box IoU. Returns the share of reference
+    tokens found (recall), the share of pairs with identical text
+    (agreement), the character error rate over the pairs and the mean
+    absolute confidence difference.
+    """
+    reference, candidate = as_tokens(reference), as_tokens(candidate)
+    if len(reference) == 0 or len(candidate) == 0:
+        return {'recall': float(len(reference) == 0), 'agreement': 0.0, 'cer': 1.0, 'conf_delta': 0.0}
+
+    a, b = _bounds(reference), _bounds(candidate)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    iou = inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+    pairs, used = [], set()
+    for i in np.argsort(-iou.max(axis=1)):
+        for j in np.argsort(-iou[i]):
+            if iou[i, j] < min_iou:
+                break
+            if j not in used:
+                used.add(j)
+                pairs.append((i, j))
+                break
+
+    if not pairs:
+        return {'recall': 0.0, 'agreement': 0.0, 'cer': 1.0, 'conf_delta': 0.0}
+    same = sum(reference.texts[i] == candidate.texts[j] for i, j in pairs)
+    errors = sum(edit_distance(reference.texts[i], candidate.texts[j]) for i, j in pairs)
+    chars = sum(len(reference.texts[i]) for i, _ in pairs)
+    delta = np.mean([abs(reference.confidences[i] - candidate.confidences[j]) for i, j in pairs])
+    return {
+        'recall': len(pairs) / len(reference),
+        'agreement': same / len(pairs),
+        'cer': errors / max(chars, 1),
+        'conf_delta': float(delta),
+    }
+
+
+def verify_models(output_dir, images, min_agreement=0.98):
+    from OCR_Modules import paddleOCR
+
+    reference_ocr = paddleOCR.initialize_ocr_SLANet_LCNetV2()
+    variants = {'fp32': OnnxOCR(output_dir, quantized=False)}
+    if os.path.exists(os.path.join(output_dir, 'det.int8.onnx')):
+        variants['int8'] = OnnxOCR(output_dir, quantized=True)
+
+    passed = True
+    for path in images:
+        image = cv2.imread(path)
+        reference = paddleOCR.process_array(image, reference_ocr)
+        for name, ocr in variants.items():
+            drift = compare_tokens(reference, onnxOCR.process_array(image, ocr))
+            ok = drift['agreement'] >= min_agreement
+            passed &= ok
+            print(
+                f"{os.path.basename(path):>12} {name:>5}  recall {drift['recall']:.3f}  "
+                f"agreement {drift['agreement']:.3f}  cer {drift['cer']:.4f}  "
+                f"conf delta {drift['conf_delta']:.4f}  {'ok' if ok else 'DRIFT'}"
+            )
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=('export', 'quantize', 'verify'))
+    parser.add_argument('images', nargs='*')
+    parser.add_argument('--output', default=model_dir())
+    parser.add_argument('--min-agreement', type=float, default=0.98)
+    args = parser.parse_args()
+    images = args.images or default_images()
+
+    if args.command == 'export':
+        export_models(args.output)
+    elif args.command == 'quantize':
+        quantize_models(args.output, images)
+    elif not verify_models(args.output, images, args.min_agreement):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import logging
+
+import cv2
+import numpy as np
+
+from OCR_Modules.tokens import as_tokens
+
+logger = logging.getLogger(__name__)
+
+BOX_COLOR = (0, 255, 0)  # BGR green
+LABEL_COLOR = (0, 0, 255)  # BGR red
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# (label, font scale, thickness) -> (label mask, left, top); labels repeat
+# across tokens and renders, e.g. "---- (0.99)"
+_label_cache = {}
+LABEL_CACHE_SIZE = 4096
+
+
+def _label_mask(label, font_scale, thickness):
+    key = (label, font_scale, thickness)
+    cached = _label_cache.get(key)
+    if cached is None:
+        (width, height), baseline = cv2.getTextSize(label, FONT, font_scale, thickness)
+        # Anti-aliased strokes reach a little past the measured box
+        pad = thickness + 1
+        mask = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+        cv2.putText(mask, label, (pad, pad + height), FONT, font_scale, 255, thickness, cv2.LINE_AA)
+        if len(_label_cache) >= LABEL_CACHE_SIZE:
+            _label_cache.clear()
+        cached = _label_cache[key] = (mask, pad, pad + height)
+    return cached
+
+
+def stamp_label(mask, label, x, y, font_scale=0.5, thickness=1):
+    # Draw the label into ``mask`` from a cached mask, as ``cv2.putText``
+    # would with (x, y) as the origin of its baseline
+    if not label:
+        return
+    label_mask, left, top = _label_mask(label, font_scale, thickness)
+    height, width = label_mask.shape
+    x0, y0 = x - left, y - top
+
+    # Clip to the canvas
+    x1, y1 = max(x0, 0), max(y0, 0)
+    x2, y2 = min(x0 + width, mask.shape[1]), min(y0 + height, mask.shape[0])
+    if x2 <= x1 or y2 <= y1:
+        return
+    target = mask[y1:y2, x1:x2]
+    np.maximum(target, label_mask[y1 - y0 : y2 - y0, x1 - x0 : x2 - x0], out=target)
+
+
+def blend_mask(canvas, mask, color=LABEL_COLOR):
+    # Paint ``color`` over ``canvas`` with ``mask`` as anti-aliased coverage
+    ys, xs = np.nonzero(mask)
+    if len(ys) == 0:
+        return
+    alpha = mask[ys, xs, None].astype(np.float32) / 255.0
+    pixels = canvas[ys, xs].astype(np.float32)
+    canvas[ys, xs] = (pixels * (1.0 - alpha) + np.array(color, np.float32) * alpha).astype(np.uint8)
+
+
+def render_overlay(image, data, scale=1.0, labels=True):
+    """Draw token boxes and ``text (confidence)`` labels on a copy of ``image``.
+
+    ``image`` is an already decoded BGR array. With ``scale`` below 1 the
+    image is downscaled first and the boxes are drawn at that resolution, so
+    the cost follows the output size. All boxes go through a single
+    ``cv2.polylines`` call.
+    """
+    tokens = as_tokens(data)
+    if scale != 1.0:
+        size = (max(int(image.shape[1] * scale), 1), max(int(image.shape[0] * scale), 1))
+        canvas = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    else:
+        canvas = image.copy()
+
+    if len(tokens) == 0:
+        return canvas
+
+    points = np.round(tokens.boxes * np.float32(scale)).astype(np.int32)
+    thickness = 2 if scale >= 0.75 else 1
+    cv2.polylines(canvas, list(points), True, BOX_COLOR, thickness)
+
+    font_scale = round(0.5 * scale, 2)
+    # Below this size the labels are unreadable and only add cost
+    if labels and font_scale >= 0.25:
+        anchors = points[:, 0].tolist()
+        confidences = tokens.confidences.tolist()
+        label_mask = np.zeros(canvas.shape[:2], dtype=np.uint8)
+        # Descenders stay above the box
+        descent = cv2.getTextSize("gy", FONT, font_scale, 1)[1] + 2
+        for (x, y), text, confidence in zip(anchors, tokens.texts, confidences):
+            stamp_label(label_mask, f"{text} ({confidence:.2f})", x, y - descent, font_scale)
+        blend_mask(canvas, label_mask)
+    return canvas
+
+
+class Overlay:
+    """Bounding-box overlay of one decoded image.
+
+    Display-sized renders are cached per size; the full-resolution image is
+    only rendered when it is exported.
+    """
+
+    def __init__(self, image, data):
+        self.image = image
+        self.tokens = as_tokens(data)
+        self._renders = {}
+
+    @property
+    def size(self):
+        return self.image.shape[1], self.image.shape[0]
+
+    def fit_scale(self, max_width, max_height):
+        # Do not upscale images
+        width, height = self.size
+        return min(max_width / width, max_height / height, 1.0)
+
+    def display(self, max_width, max_height):
+        # RGB render fitting into max_width x max_height, for the UI
+        scale = round(self.fit_scale(max_width, max_height), 3)
+        render = self._renders.get(scale)
+        if render is None:
+            render = cv2.cvtColor(render_overlay(self.image, self.tokens, scale), cv2.COLOR_BGR2RGB)
+            # Keep only the latest size: resizing the window replaces it
+            self._renders = {scale: render}
+        return render, scale
+
+    def export(self, output_path):
+        cv2.imwrite(output_path, render_overlay(self.image, self.tokens))
+        logger.info(f"Image with bounding boxes saved at: {output_path}")
+
+
+def draw_bounding_boxes(image_path, data, output_path):
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError("Could not open image!")
+    Overlay(image, data).export(output_path)
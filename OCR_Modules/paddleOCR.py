@@ -1,35 +1,141 @@
 from paddleocr import PaddleOCR
 import cv2
 import logging
+import json
 import numpy as np
-import openpyxl
-from openpyxl.styles import PatternFill
-from openpyxl.utils import get_column_letter
-import os  # Added to use os.cpu_count()
-from PIL import Image, ImageDraw, ImageFont
-
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+import os
+import shutil
+
+from OCR_Modules.detection import crop_box, tokens_from_lines
+from OCR_Modules.overlay import draw_bounding_boxes
+from OCR_Modules.tokens import OCRTokens, group_into_rows
+from OCR_Modules.warmup import compiled_cache_enabled
+from OCR_Modules.writers import save_as_xlsx
+
 logger = logging.getLogger(__name__)
 
-def initialize_ocr_SLANet_LCNetV2():
-    logger.info("Initializing PaddleOCR with SLANet-LCNetV2 (this may take a while if models need to be downloaded)...")
+# IR-optimized copies of the det/rec/cls inference models, written after the
+# first warm-up so later launches skip the IR passes
+OPTIM_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.paddleocr', 'optim')
+MODEL_ROLES = ('det', 'rec', 'cls')
+# Language -> PaddleOCR lang; Latin-script languages share one recognizer
+LANGUAGE_CODES = {
+    'en': 'en', 'fr': 'fr', 'de': 'german', 'es': 'es', 'it': 'it', 'pt': 'pt', 'ru': 'ru',
+    'ar': 'arabic', 'zh': 'ch', 'ja': 'japan', 'ko': 'korean',
+}
+
+def optim_cache_dir(lang):
+    # English models stay where earlier versions cached them
+    return OPTIM_CACHE_DIR if lang == 'en' else os.path.join(OPTIM_CACHE_DIR, lang)
+
+def cached_model_dirs(lang='en'):
+    # Model dir arguments for PaddleOCR, or None if the cache is incomplete
+    import paddle
+
+    dirs = {}
+    for role in MODEL_ROLES:
+        target = os.path.join(optim_cache_dir(lang), role)
+        try:
+            with open(os.path.join(target, 'source.json'), encoding='utf-8') as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if info.get('paddle') != paddle.__version__:
+            return None
+        dirs[f'{role}_model_dir'] = target
+    return dirs
+
+def initialize_ocr_SLANet_LCNetV2(num_threads=None, language='en'):
+    # num_threads comes from the thread budget; it is fixed for the lifetime
+    # of the predictor
+    num_threads = num_threads or os.cpu_count()
+    lang = LANGUAGE_CODES.get(language, 'en')
+    logger.info(f"Initializing PaddleOCR ({lang}) with SLANet-LCNetV2 (this may take a while if models need to be downloaded)...")
+    model_dirs = cached_model_dirs(lang) if compiled_cache_enabled() else None
+    if model_dirs:
+        logger.info(f"Using IR-optimized models from {optim_cache_dir(lang)}")
+        model_dirs['ir_optim'] = False
     return PaddleOCR(
         use_angle_cls=True,
-        lang='en',
+        lang=lang,
         use_gpu=False,
         show_log=False,
         structure_version='SLANet_LCNetV2',  # Use the latest table recognition model
-        num_threads=os.cpu_count()  # Utilize all available CPU cores
+        cpu_threads=num_threads,
+        **(model_dirs or {})
     )
 
+def cache_artifacts(ocr):
+    # Save the IR-optimized programs of the models ``ocr`` was built from
+    if not compiled_cache_enabled() or not ocr.args.ir_optim:
+        return
+    import paddle
+    from paddle import inference
+
+    cache_dir = optim_cache_dir(ocr.args.lang)
+    for role in MODEL_ROLES:
+        source = getattr(ocr.args, f'{role}_model_dir')
+        target = os.path.join(cache_dir, role)
+        staging = target + '.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+
+        # Same passes as PaddleOCR's own CPU predictor
+        config = inference.Config(
+            os.path.join(source, 'inference.pdmodel'), os.path.join(source, 'inference.pdiparams')
+        )
+        config.disable_gpu()
+        config.disable_glog_info()
+        config.delete_pass('conv_transpose_eltwiseadd_bn_fuse_pass')
+        config.delete_pass('matmul_transpose_reshape_fuse_pass')
+        config.switch_ir_optim(True)
+        config.enable_save_optim_model(True)
+        config.set_optim_cache_dir(staging)
+        inference.create_predictor(config)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(target)
+        for suffix in ('pdmodel', 'pdiparams'):
+            shutil.move(os.path.join(staging, f'_optimized.{suffix}'), os.path.join(target, f'inference.{suffix}'))
+        # Written last: marks the copy as complete
+        with open(os.path.join(target, 'source.json'), 'w', encoding='utf-8') as f:
+            json.dump({'source': source, 'paddle': paddle.__version__}, f)
+        shutil.rmtree(staging, ignore_errors=True)
+    logger.info(f"Saved IR-optimized PaddleOCR models to {cache_dir}")
+
+def set_num_threads(threads):
+    # Paddle's predictor keeps the thread count it was initialized with
+    pass
+
+def fixed_threads(ocr):
+    # Leased in full for every call, see engines.engine_lease
+    return ocr.args.cpu_threads
+
+def detect_array(image, ocr):
+    # Text-line boxes from the DB detector only, for the shared detection stage
+    dt_boxes, _ = ocr.text_detector(image)
+    if dt_boxes is None:
+        return np.zeros((0, 4, 2), dtype=np.float32)
+    return np.asarray(dt_boxes, dtype=np.float32).reshape(-1, 4, 2)
+
+def recognize_boxes(image, boxes, ocr):
+    # Angle classification and recognition of already detected boxes
+    crops = [crop_box(image, box) for box in boxes]
+    if ocr.use_angle_cls:
+        crops, _, _ = ocr.text_classifier(crops)
+    rec_res, _ = ocr.text_recognizer(crops)
+    texts, confidences = zip(*rec_res)
+    return tokens_from_lines(boxes, texts, confidences)
+
 def process_image(file_path, ocr):
+    # Load image
+    image = cv2.imread(file_path)
+    if image is None:
+        raise ValueError("Could not open image!")
+    return process_array(image, ocr)
+
+def process_array(image, ocr):
+    # OCR an already decoded BGR image, either a full page or a crop of one
     try:
-        # Load image
-        image = cv2.imread(file_path)
-        if image is None:
-            raise ValueError("Could not open image!")
-
         logger.info("Processing image...")
 
         # Perform OCR
@@ -39,15 +145,17 @@ def process_image(file_path, ocr):
             raise ValueError("No text detected in image.")
 
         # Extract text, coordinates, and confidence
-        data = []
+        bboxes, texts, confidences = [], [], []
         for line in result:
-            for word_info in line:
+            for word_info in line or []:
                 bbox, (text, confidence) = word_info
-                x = (bbox[0][0] + bbox[2][0]) / 2  # Average x-coordinate
-                y = (bbox[0][1] + bbox[2][1]) / 2  # Average y-coordinate
-                data.append({'x': x, 'y': y, 'text': text, 'confidence': confidence, 'bbox': bbox})
+                bboxes.append(bbox)
+                texts.append(text)
+                confidences.append(confidence)
 
-        return data
+        boxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4, 2)
+        centers = (boxes[:, 0] + boxes[:, 2]) / 2  # Midpoint of the diagonal
+        return OCRTokens(boxes, confidences, texts, centers)
     
     except TypeError as e:
         logger.error(f"Type error: {str(e)}. Check if the image is valid.")
@@ -56,97 +164,6 @@ def process_image(file_path, ocr):
         logger.error(f"Error processing image: {str(e)}")
         raise
 
-def group_into_rows(data, y_threshold=10):
-    # Sort data by y-coordinate
-    data_sorted = sorted(data, key=lambda k: k['y'])
-
-    # Group text into rows
-    rows = []
-    current_row = []
-    last_y = None
-
-    for item in data_sorted:
-        x = item['x']
-        y = item['y']
-        text = item['text']
-        if last_y is None or abs(y - last_y) > y_threshold:
-            if current_row:
-                rows.append(sorted(current_row, key=lambda k: k[0]))
-            current_row = [(x, text, item['confidence'])]
-            last_y = y
-        else:
-            current_row.append((x, text, item['confidence']))
-
-    # Add the last row
-    if current_row:
-        rows.append(sorted(current_row, key=lambda k: k[0]))
-
-    # Modify the return value to include confidence
-    return [[(text, confidence) for x, text, confidence in row] for row in rows]
-
-def save_as_xlsx(rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-
-    for row_index, row in enumerate(rows, start=1):
-        for col_index, cell in enumerate(row, start=1):
-            text, confidence = cell
-            ws.cell(row=row_index, column=col_index, value=text)
-
-            if confidence >= green_threshold:
-                # Green for confidence >= green_threshold
-                fill_color = '00FF00'
-            elif confidence >= yellow_threshold:
-                # Yellow for confidence >= yellow_threshold
-                fill_color = 'FFFF00'
-            else:
-                # Red for confidence below yellow_threshold
-                fill_color = 'FF0000'
-
-            fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-            ws.cell(row=row_index, column=col_index).fill = fill
-
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    wb.save(output_xlsx)
-    logger.info(f"Excel file has been saved at: {output_xlsx}")
-
-def draw_bounding_boxes(image_path, data, output_image_path):
-    image = Image.open(image_path)
-    # Convert image to RGB mode
-    image = image.convert('RGB')
-    draw = ImageDraw.Draw(image)
-    try:
-        font = ImageFont.truetype("arial.ttf", 16)  # Use a true type font
-    except:
-        font = ImageFont.load_default()
-
-    for item in data:
-        bbox = item['bbox']
-        text = item['text']
-        confidence = item['confidence']
-
-        # Draw bounding box
-        bbox_points = [(point[0], point[1]) for point in bbox]
-        draw.line(bbox_points + [bbox_points[0]], fill='green', width=2)
-
-        # Put text and confidence
-        x, y = bbox[0][0], bbox[0][1]
-        draw.text((x, y - 20), f'{text} ({confidence:.2f})', fill='red', font=font)
-
-    image.save(output_image_path)
-    logger.info(f"Image with bounding boxes saved at: {output_image_path}")
 
 if __name__ == "__main__":
     ocr_model = initialize_ocr_SLANet_LCNetV2()
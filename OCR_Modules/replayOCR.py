@@ -0,0 +1,274 @@
+"""Replay engine: recorded tokens instead of a model.
+
+Implements the engine contract (``initialize_replay``, ``process_image``,
+``process_array``, ``detect_array``, ``recognize_boxes``) by returning the
+tokens recorded for an image, after a configurable synthetic latency, so
+everything after OCR can be profiled and checked without any OCR package.
+
+Recordings are ``.npz`` token files in ``test/replay`` (``OCR_REPLAY_DIR``
+overrides it), indexed by a hash of the decoded image:
+
+    python -m OCR_Modules.replayOCR record test/*.png --engine "ONNX Runtime"
+    python -m OCR_Modules.replayOCR record test/1.png --from-outputs
+
+The recordings shipped in ``test/replay`` are real ONNX Runtime runs, with
+their misreadings. ``--from-outputs`` rebuilds synthetic tokens from the
+``_output.xlsx`` of an earlier run: its texts and confidence colours, with
+boxes laid out evenly on the image, not where the text is. They are
+recorded with engine ``outputs`` and are fine for profiling, not for any
+accuracy or layout claim. Images without a recording get deterministic
+synthetic tokens.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from OCR_Modules.detection import tokens_from_lines
+from OCR_Modules.tokens import OCRTokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLAY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test', 'replay')
+INDEX_FILE = 'index.json'
+
+# Fill colour of an output cell -> confidence it is replayed with
+FILL_CONFIDENCES = {'00FF00': 0.99, 'FFFF00': 0.95, 'FF0000': 0.85}
+
+# Synthetic documents: spirometry-like rows, a term then numbers
+SYNTHETIC_TERMS = ('CVF', 'VEMS', 'VEMS%CV', 'DEP', 'DEM75', 'DEM50', 'DEM25', 'CPT', 'VR', 'VR%CPT', 'DLCO_SB')
+SYNTHETIC_ROW_HEIGHT = 30
+SYNTHETIC_COLUMN_WIDTH = 140
+SYNTHETIC_CHAR_WIDTH = 9
+
+
+def replay_dir():
+    return os.getenv('OCR_REPLAY_DIR') or DEFAULT_REPLAY_DIR
+
+
+def image_key(image):
+    # Same pixels, same key, whatever the file was called
+    digest = hashlib.blake2b(str(image.shape).encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def synthetic_tokens(n_tokens, n_cols=7, seed=0):
+    """``n_tokens`` tokens in rows of ``n_cols``, like a long results table.
+
+    Deterministic for a given ``seed``; boxes are jittered a little so row
+    and column grouping do real work. Built with NumPy, so a 100k-token
+    document takes well under a second.
+    """
+    rng = np.random.default_rng(seed)
+    index = np.arange(n_tokens)
+    rows, cols = index // n_cols, index % n_cols
+
+    terms = rng.integers(0, len(SYNTHETIC_TERMS), size=n_tokens)
+    values = rng.uniform(0.1, 150.0, size=n_tokens).round(2)
+    texts = [
+        SYNTHETIC_TERMS[term] if col == 0 else f'{value:.2f}'
+        for term, value, col in zip(terms.tolist(), values.tolist(), cols.tolist())
+    ]
+    widths = np.fromiter((len(text) for text in texts), dtype=np.float32, count=n_tokens) * SYNTHETIC_CHAR_WIDTH
+
+    x1 = (cols * SYNTHETIC_COLUMN_WIDTH + 10 + rng.uniform(-3, 3, size=n_tokens)).astype(np.float32)
+    y1 = (rows * SYNTHETIC_ROW_HEIGHT + 6 + rng.uniform(-2, 2, size=n_tokens)).astype(np.float32)
+    x2, y2 = x1 + widths, y1 + 18
+    boxes = np.stack(
+        [np.stack([x1, y1], 1), np.stack([x2, y1], 1), np.stack([x2, y2], 1), np.stack([x1, y2], 1)], axis=1
+    )
+    # Mostly confident readings with a tail of weak ones
+    confidences = np.clip(1.0 - rng.exponential(0.03, size=n_tokens), 0.0, 1.0).astype(np.float32)
+    return OCRTokens(boxes, confidences, texts)
+
+
+def synthetic_for_image(image, key):
+    # As many synthetic rows and columns as fit on the image
+    height, width = image.shape[:2]
+    n_cols = max(width // SYNTHETIC_COLUMN_WIDTH, 1)
+    n_rows = max(height // SYNTHETIC_ROW_HEIGHT, 1)
+    return synthetic_tokens(n_rows * n_cols, n_cols, seed=int(key[:8], 16))
+
+
+def tokens_from_workbook(path, width, height):
+    """Tokens of an ``_output.xlsx``: one per non-empty cell, with the
+    confidence of its fill and a box in the matching grid cell of a
+    ``width`` x ``height`` image."""
+    import openpyxl
+
+    sheet = openpyxl.load_workbook(path).active
+    cell_width = width / max(sheet.max_column, 1)
+    cell_height = height / max(sheet.max_row, 1)
+    boxes, confidences, texts = [], [], []
+    for row in sheet.iter_rows():
+        for cell in row:
+            if cell.value is None or str(cell.value).strip() == '':
+                continue
+            text = str(cell.value).strip()
+            color = str(cell.fill.fgColor.rgb or '')[-6:]
+            x1 = (cell.column - 1) * cell_width + 4
+            y1 = (cell.row - 1) * cell_height + cell_height * 0.2
+            x2 = x1 + min(len(text) * SYNTHETIC_CHAR_WIDTH, cell_width - 8)
+            y2 = y1 + cell_height * 0.6
+            boxes.append([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+            confidences.append(FILL_CONFIDENCES.get(color, 0.99))
+            texts.append(text)
+    if not texts:
+        return OCRTokens.empty()
+    return OCRTokens(np.asarray(boxes, dtype=np.float32), np.asarray(confidences, dtype=np.float32), texts)
+
+
+class ReplayEngine:
+    """Recorded tokens by image hash, served after a synthetic delay.
+
+    The delay is ``latency_ms`` per call plus ``ms_per_token`` per returned
+    token (``OCR_REPLAY_LATENCY_MS`` / ``OCR_REPLAY_MS_PER_TOKEN``). It is a
+    sleep, which releases the GIL like the native engines do.
+    """
+
+    def __init__(self, directory=None, latency_ms=None, ms_per_token=None):
+        self.directory = directory or replay_dir()
+        if latency_ms is None:
+            latency_ms = float(os.getenv('OCR_REPLAY_LATENCY_MS', '0'))
+        if ms_per_token is None:
+            ms_per_token = float(os.getenv('OCR_REPLAY_MS_PER_TOKEN', '0'))
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.index = {}
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                self.index = json.load(f)
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def tokens(self, image):
+        key = image_key(image)
+        with self._lock:
+            tokens = self._tokens.get(key)
+        if tokens is not None:
+            return tokens
+        entry = self.index.get(key)
+        if entry is None:
+            # Not cached: any screenshot or crop would add one
+            tokens = synthetic_for_image(image, key)
+            logger.info(f'No recording for this image, replaying {len(tokens)} synthetic tokens')
+            return tokens
+        tokens = OCRTokens.load_npz(os.path.join(self.directory, entry['file']))
+        logger.info(f"Replaying {len(tokens)} tokens recorded from {entry['source']} ({entry['engine']})")
+        with self._lock:
+            self._tokens[key] = tokens
+        return tokens
+
+    def wait(self, n_tokens):
+        delay_ms = self.latency_ms + self.ms_per_token * n_tokens
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def remember(self, image, tokens):
+        # Serve ``tokens`` for ``image`` from memory, without a recording
+        key = image_key(image)
+        with self._lock:
+            self._tokens[key] = tokens
+        return key
+
+    def record(self, image, tokens, source, engine):
+        key = self.remember(image, tokens)
+        name = os.path.splitext(os.path.basename(source))[0]
+        file_name = f'{name}.{key[:8]}.npz'
+        os.makedirs(self.directory, exist_ok=True)
+        tokens.save_npz(os.path.join(self.directory, file_name))
+        self.index[key] = {'file': file_name, 'source': os.path.relpath(source), 'engine': engine}
+        with open(os.path.join(self.directory, INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+
+def initialize_replay(directory=None, latency_ms=None, ms_per_token=None):
+    logger.info('Initializing replay engine...')
+    return ReplayEngine(directory, latency_ms, ms_per_token)
+
+
+def set_num_threads(threads):
+    # Nothing to size: the synthetic latency does not depend on threads
+    pass
+
+
+def detect_array(image, ocr):
+    tokens = ocr.tokens(image)
+    ocr.wait(len(tokens))
+    return tokens.boxes
+
+
+def recognize_boxes(image, boxes, ocr):
+    # The recorded token nearest to each box, read into that box
+    tokens = ocr.tokens(image)
+    ocr.wait(len(boxes))
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+    if len(tokens) == 0 or len(boxes) == 0:
+        return OCRTokens.empty()
+    centers = boxes.mean(axis=1)
+    distances = np.linalg.norm(centers[:, None, :] - tokens.centers[None, :, :], axis=2)
+    nearest = distances.argmin(axis=1).tolist()
+    return tokens_from_lines(
+        boxes, [tokens.texts[i] for i in nearest], tokens.confidences[nearest].tolist()
+    )
+
+
+def process_image(file_path, ocr):
+    image = cv2.imread(file_path)
+    if image is None:
+        raise ValueError('Could not open image!')
+    return process_array(image, ocr)
+
+
+def process_array(image, ocr):
+    tokens = ocr.tokens(image)
+    ocr.wait(len(tokens))
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record token streams for the replay engine.')
+    parser.add_argument('--dir', help=f'recordings directory (default: {replay_dir()})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record')
+    record.add_argument('images', nargs='+')
+    source = record.add_mutually_exclusive_group(required=True)
+    source.add_argument('--engine', help='OCR the images with this engine')
+    source.add_argument('--from-outputs', action='store_true', help="synthetic tokens from each image's _output.xlsx (profiling only)")
+    args = parser.parse_args()
+
+    replay = ReplayEngine(args.dir)
+    module = ocr = None
+    if args.engine:
+        from OCR_Modules.engines import engine_module, load_engine
+
+        module = engine_module(args.engine)
+        ocr = load_engine(args.engine)
+
+    for path in args.images:
+        image = cv2.imread(path)
+        if image is None:
+            logger.warning(f'Skipping {path}: not an image')
+            continue
+        if module is not None:
+            tokens, engine = module.process_array(image, ocr), args.engine
+        else:
+            workbook = os.path.splitext(path)[0] + '_output.xlsx'
+            if not os.path.exists(workbook):
+                logger.warning(f'Skipping {path}: {workbook} not found')
+                continue
+            tokens, engine = tokens_from_workbook(workbook, image.shape[1], image.shape[0]), 'outputs'
+        replay.record(image, tokens, path, engine)
+        print(f'{path}: {len(tokens)} tokens')
+
+
+if __name__ == '__main__':
+    main()
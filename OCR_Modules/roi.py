@@ -0,0 +1,66 @@
+import logging
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _upscale(crop):
+    return cv2.resize(crop, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC), 2.0
+
+
+def _binarize(crop):
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR), 1.0
+
+
+def _sharpen(crop):
+    kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+    return cv2.filter2D(crop, -1, kernel), 1.0
+
+
+# Preprocessing choices offered for region re-OCR. Each returns the processed
+# crop and the factor it was scaled by.
+PREPROCESSING = {
+    "None": lambda crop: (crop, 1.0),
+    "Upscale 2x": _upscale,
+    "Binarize (Otsu)": _binarize,
+    "Sharpen": _sharpen,
+}
+
+
+def clamp_region(region, shape):
+    # Order the corners and clip them to the image bounds
+    height, width = shape[:2]
+    x1, y1, x2, y2 = region
+    x1, x2 = sorted((int(round(x1)), int(round(x2))))
+    y1, y2 = sorted((int(round(y1)), int(round(y2))))
+    return max(x1, 0), max(y1, 0), min(x2, width), min(y2, height)
+
+
+def ocr_region(image, region, process_array, ocr, preprocessing="None"):
+    """Run ``process_array`` on a crop of ``image``.
+
+    Only the crop is preprocessed and sent to the engine, so the cost follows
+    the size of the region rather than the page. Returns the tokens mapped
+    back to page coordinates and the clamped region.
+    """
+    x1, y1, x2, y2 = clamp_region(region, image.shape)
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        raise ValueError("Selected region is too small.")
+
+    start = time.perf_counter()
+    crop = image[y1:y2, x1:x2]  # view, no copy
+    crop, scale = PREPROCESSING[preprocessing](crop)
+    tokens = process_array(np.ascontiguousarray(crop), ocr)
+    tokens = tokens.shifted(x1, y1, scale)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Re-OCR of region {(x1, y1, x2, y2)} found {len(tokens)} tokens "
+        f"in {elapsed_ms:.1f} ms"
+    )
+    return tokens, (x1, y1, x2, y2)
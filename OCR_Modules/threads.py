@@ -0,0 +1,75 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadBudget:
+    """Shares a fixed number of CPU threads between engines and workers.
+
+    Every running OCR call leases an explicit thread count, so concurrent jobs
+    (or several engines on one image) never ask for more threads than there
+    are cores. A call that does not ask for a count gets ``share``, its part
+    of the budget when ``jobs`` run at once (``OCR_PARALLEL_JOBS``).
+    """
+
+    def __init__(self, total=None, jobs=None):
+        if total is None:
+            total = int(os.getenv("OCR_THREAD_BUDGET", "0")) or os.cpu_count() or 1
+        if jobs is None:
+            jobs = int(os.getenv("OCR_PARALLEL_JOBS", "2"))
+        self.total = total
+        self.share = self.plan(jobs)[1]
+        self.leases = {}
+        self._cond = threading.Condition()
+
+    @property
+    def available(self):
+        return self.total - sum(self.leases.values())
+
+    def plan(self, queue_depth, max_workers=None):
+        """Choose ``(workers, threads_per_worker)`` for ``queue_depth`` jobs.
+
+        A deep queue is served by many single-threaded workers, which scale
+        almost linearly; a short one by a few wide workers so a single job
+        still uses every core.
+        """
+        limit = min(self.total, max_workers or self.total)
+        workers = max(1, min(queue_depth, limit))
+        threads = max(1, self.total // workers)
+        return workers, threads
+
+    def acquire(self, name, threads=None, blocking=True, exact=False):
+        # Grant up to ``threads`` (default: the share), never less than one.
+        # ``exact`` waits for all of them: engines whose thread count is
+        # fixed when they are built use that many whatever they are granted
+        wanted = min(threads or self.share, self.total)
+        needed = wanted if exact else 1
+        with self._cond:
+            while blocking and self.available < needed:
+                self._cond.wait()
+            granted = max(1, min(wanted, self.available))
+            self.leases[name] = self.leases.get(name, 0) + granted
+            logger.debug(
+                f"Thread budget: {name} leased {granted} thread(s), "
+                f"{self.available}/{self.total} left"
+            )
+            return granted
+
+    def release(self, name, threads):
+        with self._cond:
+            self.leases[name] -= threads
+            if self.leases[name] <= 0:
+                del self.leases[name]
+            self._cond.notify_all()
+
+    @contextmanager
+    def lease(self, name, threads=None, exact=False):
+        granted = self.acquire(name, threads, exact=exact)
+        try:
+            yield granted
+        finally:
+            self.release(name, granted)
+
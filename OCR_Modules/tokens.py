@@ -0,0 +1,240 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class OCRTokens:
+    """Columnar container for the words returned by an OCR engine.
+
+    Boxes are stored as an (N, 4, 2) float32 array, confidences as (N,)
+    float32 and word centers as (N, 2) float32, with the recognized text kept
+    in a plain list. Slicing with a ``slice`` returns views of the same
+    buffers; integer arrays and boolean masks return compact copies.
+
+    ``originals`` is an optional list holding, for tokens changed by
+    post-correction, the text the engine actually read (``None`` elsewhere).
+    """
+
+    __slots__ = ("boxes", "confidences", "centers", "texts", "originals")
+
+    def __init__(self, boxes, confidences, texts, centers=None, originals=None):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+        self.confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        self.texts = list(texts)
+        if centers is None:
+            # Mean of the four corners, matching EasyOCR/Tesseract centers
+            centers = self.boxes.mean(axis=1)
+        self.centers = np.asarray(centers, dtype=np.float32).reshape(-1, 2)
+        self.originals = None if originals is None else list(originals)
+
+        n = len(self.texts)
+        if self.originals is not None and len(self.originals) != n:
+            raise ValueError(f"Token originals have {len(self.originals)} entries for {n} texts")
+        if not (len(self.boxes) == len(self.confidences) == len(self.centers) == n):
+            raise ValueError(
+                f"Token arrays have mismatched lengths: boxes={len(self.boxes)}, "
+                f"confidences={len(self.confidences)}, centers={len(self.centers)}, "
+                f"texts={n}"
+            )
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 4, 2)), np.empty(0), [], np.empty((0, 2)))
+
+    @classmethod
+    def from_records(cls, records):
+        # Accepts the legacy list of {'x', 'y', 'text', 'confidence', 'bbox'} dicts
+        if isinstance(records, cls):
+            return records
+        records = list(records)
+        if not records:
+            return cls.empty()
+        boxes = np.array(
+            [[(p[0], p[1]) for p in item["bbox"]] for item in records],
+            dtype=np.float32,
+        )
+        confidences = [item["confidence"] for item in records]
+        centers = [(item["x"], item["y"]) for item in records]
+        texts = [item["text"] for item in records]
+        return cls(boxes, confidences, texts, centers)
+
+    @property
+    def x(self):
+        return self.centers[:, 0]
+
+    @property
+    def y(self):
+        return self.centers[:, 1]
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.record(int(key))
+        if isinstance(key, slice):
+            # Basic slicing keeps NumPy views: no pixel-sized copies
+            return OCRTokens._wrap(
+                self.boxes[key],
+                self.confidences[key],
+                self.texts[key],
+                self.centers[key],
+                None if self.originals is None else self.originals[key],
+            )
+        return self.take(key)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def __repr__(self):
+        return f"OCRTokens(n={len(self)})"
+
+    @classmethod
+    def _wrap(cls, boxes, confidences, texts, centers, originals=None):
+        # Skip validation/conversion when the arrays are already well-formed
+        obj = cls.__new__(cls)
+        obj.boxes = boxes
+        obj.confidences = confidences
+        obj.texts = texts
+        obj.centers = centers
+        obj.originals = originals
+        return obj
+
+    def record(self, i):
+        # Dict view of a single token, for callers that still expect the old format
+        x, y = self.centers[i]
+        return {
+            "x": float(x),
+            "y": float(y),
+            "text": self.texts[i],
+            "confidence": float(self.confidences[i]),
+            "bbox": [tuple(p) for p in self.boxes[i].tolist()],
+        }
+
+    def take(self, indices):
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        index_list = indices.tolist()
+        return OCRTokens._wrap(
+            self.boxes[indices],
+            self.confidences[indices],
+            [self.texts[i] for i in index_list],
+            self.centers[indices],
+            None if self.originals is None else [self.originals[i] for i in index_list],
+        )
+
+    def shifted(self, dx, dy, scale=1.0):
+        # Map coordinates measured on a crop (resized by ``scale``) back to the page
+        offset = np.array([dx, dy], dtype=np.float32)
+        return OCRTokens._wrap(
+            self.boxes / np.float32(scale) + offset,
+            self.confidences,
+            self.texts,
+            self.centers / np.float32(scale) + offset,
+            self.originals,
+        )
+
+    def in_region(self, region):
+        # Mask of tokens whose center lies inside (x1, y1, x2, y2)
+        x1, y1, x2, y2 = region
+        x, y = self.x, self.y
+        return (x >= x1) & (x <= x2) & (y >= y1) & (y <= y2)
+
+    @classmethod
+    def concatenate(cls, parts):
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        originals = None
+        if any(p.originals is not None for p in parts):
+            originals = [
+                o for p in parts for o in (p.originals if p.originals is not None else [None] * len(p))
+            ]
+        return cls._wrap(
+            np.concatenate([p.boxes for p in parts]),
+            np.concatenate([p.confidences for p in parts]),
+            [t for p in parts for t in p.texts],
+            np.concatenate([p.centers for p in parts]),
+            originals,
+        )
+
+    def save_npz(self, path):
+        arrays = {}
+        if self.originals is not None:
+            arrays["corrected"] = np.array([o is not None for o in self.originals])
+            arrays["originals"] = np.array([o or "" for o in self.originals], dtype=np.str_)
+        np.savez_compressed(
+            path,
+            boxes=self.boxes,
+            confidences=self.confidences,
+            centers=self.centers,
+            texts=np.array(self.texts, dtype=np.str_),
+            **arrays,
+        )
+        logger.info(f"Tokens saved at: {path}")
+
+    @classmethod
+    def load_npz(cls, path):
+        with np.load(path, allow_pickle=False) as npz:
+            originals = None
+            if "originals" in npz:
+                originals = [
+                    o if corrected else None
+                    for o, corrected in zip(npz["originals"].tolist(), npz["corrected"].tolist())
+                ]
+            return cls(
+                npz["boxes"], npz["confidences"], npz["texts"].tolist(), npz["centers"], originals
+            )
+
+
+def as_tokens(data):
+    """Return ``data`` as OCRTokens, converting legacy dict lists if needed."""
+    if isinstance(data, OCRTokens):
+        return data
+    return OCRTokens.from_records(data)
+
+
+def replace_region(tokens, new_tokens, region):
+    """Drop the tokens centered inside ``region`` and append ``new_tokens``.
+
+    Returns the merged tokens and the indices of the kept tokens in the
+    original container, in merged order.
+    """
+    kept = np.flatnonzero(~tokens.in_region(region))
+    return OCRTokens.concatenate([tokens.take(kept), new_tokens]), kept
+
+
+def group_row_indices(tokens, y_threshold=10):
+    # A row starts at the topmost remaining token and takes every token whose
+    # center lies within y_threshold below it; each row is then ordered by x.
+    tokens = as_tokens(tokens)
+    n = len(tokens)
+    if n == 0:
+        return []
+
+    order = np.argsort(tokens.y, kind="stable")
+    ys = tokens.y[order]
+    xs = tokens.x
+
+    rows = []
+    start = 0
+    while start < n:
+        end = int(np.searchsorted(ys, ys[start] + y_threshold, side="right"))
+        row = order[start:end]
+        rows.append(row[np.argsort(xs[row], kind="stable")])
+        start = end
+    return rows
+
+
+def group_into_rows(data, y_threshold=10):
+    tokens = as_tokens(data)
+    texts = tokens.texts
+    confidences = tokens.confidences.tolist()
+    return [
+        [(texts[i], confidences[i]) for i in row.tolist()]
+        for row in group_row_indices(tokens, y_threshold)
+    ]
@@ -0,0 +1,119 @@
+import contextvars
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Set per job/stage; copied onto every log record by JobContextFilter
+JOB_ID = contextvars.ContextVar("job_id", default=None)
+ENGINE = contextvars.ContextVar("engine", default=None)
+STAGE = contextvars.ContextVar("stage", default=None)
+# Stage name -> milliseconds spent, for the current job
+TIMINGS = contextvars.ContextVar("timings", default=None)
+
+
+def new_job_id():
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def job_context(engine=None, job_id=None):
+    """Tag every record logged inside the block with a job ID and engine."""
+    job_id = job_id or new_job_id()
+    job_token = JOB_ID.set(job_id)
+    engine_token = ENGINE.set(engine)
+    timings_token = TIMINGS.set({})
+    try:
+        yield job_id
+    finally:
+        TIMINGS.reset(timings_token)
+        ENGINE.reset(engine_token)
+        JOB_ID.reset(job_token)
+
+
+@contextmanager
+def stage(name):
+    """Tag records with the stage name and log how long the stage took."""
+    token = STAGE.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timings = TIMINGS.get()
+        if timings is not None:
+            timings[name] = round(timings.get(name, 0) + elapsed_ms, 1)
+        logger.info(f"Stage {name} took {elapsed_ms:.1f} ms", extra={"duration_ms": round(elapsed_ms, 1)})
+        STAGE.reset(token)
+
+
+def job_timings():
+    # Copy of the stage durations recorded so far in this job
+    return dict(TIMINGS.get() or {})
+
+
+def run_in_stage(name, func, *args, **kwargs):
+    with stage(name):
+        return func(*args, **kwargs)
+
+
+class JobContextFilter(logging.Filter):
+    """Copy the job context onto records.
+
+    Runs on the logging thread, before the record is queued, so the context
+    variables are those of the code that logged.
+    """
+
+    def filter(self, record):
+        for name, var in (("job_id", JOB_ID), ("engine", ENGINE), ("stage", STAGE)):
+            if getattr(record, name, None) is None:
+                setattr(record, name, var.get())
+        if not hasattr(record, "duration_ms"):
+            record.duration_ms = None
+        return True
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps message and traceback apart.
+
+    The stock handler folds the traceback into the message; formatters on
+    the listener side still find it in ``exc_text`` here.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, with the job fields when they are set."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "source": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        for name in ("job_id", "engine", "stage", "duration_ms"):
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
@@ -0,0 +1,452 @@
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+from OCR_Modules.engines import EngineUnavailable, engine_lease, engine_module, load_engine
+from OCR_Modules.frames import read_frames
+from OCR_Modules.grid import build_layout, layout_to_grid
+from OCR_Modules.languages import LanguageModels
+from OCR_Modules.lexicon import correct_tokens
+from OCR_Modules.threads import ThreadBudget
+from OCR_Modules.tokens import as_tokens
+from OCR_Modules.tracing import JOB_ID, job_context, job_timings, stage
+from OCR_Modules.warmup import warm_up
+from OCR_Modules.writers import write_outputs
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".dcm", ".dicom"}
+
+# inotify flags, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_candidate(path):
+    # Images only; skip our own outputs and hidden/temporary files
+    name = os.path.basename(path)
+    root, ext = os.path.splitext(name)
+    return ext.lower() in IMAGE_EXTENSIONS and not name.startswith(".") and "_output" not in root
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Append-only JSON Lines record of every file the watcher handled.
+
+    Each line holds path, content hash, engine, status and output paths; the
+    latest line for a path wins. A file whose content was already processed
+    with the same engine is never processed again, even if it was renamed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.latest = {}  # path -> latest record
+        self.done = set()  # (sha256, engine)
+        self._lock = threading.Lock()
+        lines = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        # Torn last line after a crash
+                        continue
+        if lines > 2 * len(self.latest) + 100:
+            self._compact()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _apply(self, record):
+        self.latest[record["path"]] = record
+        if record["status"] == "done":
+            self.done.add((record["sha256"], record["engine"]))
+
+    def _compact(self):
+        # Keep only the latest record per path
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            for record in self.latest.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(self.path + ".tmp", self.path)
+
+    def is_done(self, digest, engine):
+        return (digest, engine) in self.done
+
+    def unchanged(self, path, stat, engine):
+        # Finished before and untouched since: no need to hash it again
+        record = self.latest.get(path)
+        return (
+            record is not None
+            and record["engine"] == engine
+            and record["status"] in ("done", "duplicate")
+            and record.get("size") == stat.st_size
+            and record.get("mtime") == stat.st_mtime
+        )
+
+    def record(self, path, digest, engine, status, outputs=None, error=None, stat=None):
+        record = {
+            "path": path,
+            "sha256": digest,
+            "engine": engine,
+            "status": status,
+            "size": stat.st_size if stat else None,
+            "mtime": stat.st_mtime if stat else None,
+            "outputs": outputs or {},
+            "error": error,
+            "time": time.time(),
+        }
+        with self._lock:
+            self._apply(record)
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class InotifySource:
+    """New or finished files in a folder, from Linux inotify."""
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+        self.folder = folder
+        self.overflowed = False
+
+    def read(self, timeout):
+        # File names reported within ``timeout`` seconds
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths, offset = [], 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: the caller rescans the folder
+                self.overflowed = True
+            elif name:
+                paths.append(os.path.join(self.folder, os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """New or changed files in a folder, found by rescanning it."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.seen = {}  # path -> (size, mtime)
+        self.overflowed = False
+
+    def read(self, timeout):
+        time.sleep(timeout)
+        paths, seen = [], {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                seen[entry.path] = (stat.st_size, stat.st_mtime)
+                if self.seen.get(entry.path) != seen[entry.path]:
+                    paths.append(entry.path)
+        self.seen = seen
+        return paths
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """OCR every image dropped into ``folder`` with a pool of warm workers.
+
+    Files are handed to the workers once their size and modification time
+    have not changed for ``settle`` seconds, so partial writes are never
+    read. The queue between watcher and workers is bounded and only holds
+    paths; each worker decodes one image at a time. With a ``lexicon``,
+    low-confidence tokens are corrected before the table is built; with a
+    ``history``, every document is recorded in it.
+    """
+
+    def __init__(
+        self,
+        folder,
+        output_dir=None,
+        engine="PaddleOCR",
+        formats=("xlsx",),
+        workers=2,
+        settle=2.0,
+        poll_interval=1.0,
+        green_threshold=0.97,
+        yellow_threshold=0.92,
+        tesseract_path=None,
+        use_inotify=None,
+        budget=None,
+        lexicon=None,
+        history=None,
+    ):
+        self.folder = os.path.abspath(folder)
+        self.output_dir = os.path.abspath(output_dir or folder)
+        self.engine = engine
+        self.formats = list(formats)
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.thresholds = (green_threshold, yellow_threshold)
+        self.tesseract_path = tesseract_path
+        self.lexicon = lexicon
+        self.history = history
+        self.budget = budget or ThreadBudget()
+        # Many narrow or few wide workers, from the expected concurrency
+        self.n_workers, self.worker_threads = self.budget.plan(workers, max_workers=workers)
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith("linux")
+        self.use_inotify = use_inotify
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.manifest = Manifest(os.path.join(self.output_dir, ".ocr_manifest.jsonl"))
+        self.jobs = queue.Queue(maxsize=2 * self.n_workers)
+        self.pending = {}  # path -> (size, mtime, time of last change)
+        self.ready = deque()
+        # Paths handed to the workers and not finished yet; the watcher adds,
+        # the workers remove
+        self.queued = set()
+        self._queued_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.processed = 0
+        self.load_error = None
+
+    def _open_source(self):
+        if self.use_inotify:
+            try:
+                source = InotifySource(self.folder)
+                logger.info(f"Watching {self.folder} with inotify")
+                return source
+            except (OSError, AttributeError, TypeError) as e:
+                logger.warning(f"inotify unavailable ({e}), falling back to polling")
+        logger.info(f"Watching {self.folder} by polling every {self.poll_interval:.1f} s")
+        return PollingSource(self.folder)
+
+    def scan(self):
+        # Everything already in the folder; finished files are skipped later
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    self.touch(entry.path)
+
+    def touch(self, path):
+        if not is_candidate(path):
+            return
+        with self._queued_lock:
+            if path in self.queued:
+                return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.pending.pop(path, None)
+            return
+        previous = self.pending.get(path)
+        signature = (stat.st_size, stat.st_mtime)
+        if previous is None or previous[:2] != signature:
+            self.pending[path] = signature + (time.monotonic(),)
+
+    def _debounce(self):
+        # Move files that stopped changing from pending to ready
+        now = time.monotonic()
+        for path, (size, mtime, changed) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime) != (size, mtime):
+                self.pending[path] = (stat.st_size, stat.st_mtime, now)
+            elif now - changed >= self.settle and stat.st_size > 0:
+                with self._queued_lock:
+                    if path in self.queued:
+                        # Still being processed: queued again once it is done
+                        continue
+                    self.queued.add(path)
+                del self.pending[path]
+                self.ready.append(path)
+
+    def _dispatch(self):
+        while self.ready:
+            try:
+                self.jobs.put_nowait(self.ready[0])
+            except queue.Full:
+                return
+            self.ready.popleft()
+
+    def run(self):
+        loaded = [threading.Event() for _ in range(self.n_workers)]
+        workers = [
+            threading.Thread(target=self._worker, args=(event,), name=f"ocr-watch-{i}", daemon=True)
+            for i, event in enumerate(loaded)
+        ]
+        for worker in workers:
+            worker.start()
+        # Watch only once every worker has its engine: a broken setup stops here
+        for event in loaded:
+            event.wait()
+        if self.load_error is not None:
+            self.stopped.set()
+            for worker in workers:
+                worker.join()
+            self.manifest.close()
+            raise EngineUnavailable(f"Could not load {self.engine}: {self.load_error}") from self.load_error
+        logger.info(
+            f"{self.n_workers} {self.engine} worker(s) x {self.worker_threads} thread(s), "
+            f"outputs in {self.output_dir}"
+        )
+
+        source = self._open_source()
+        self.scan()
+        try:
+            while not self.stopped.is_set():
+                timeout = min(self.poll_interval, self.settle / 2) if self.pending else self.poll_interval
+                for path in source.read(timeout):
+                    self.touch(path)
+                if source.overflowed:
+                    source.overflowed = False
+                    self.scan()
+                self._debounce()
+                self._dispatch()
+        finally:
+            source.close()
+            self.stopped.set()
+            for _ in workers:
+                # Wake idle workers so they can exit
+                try:
+                    self.jobs.put_nowait(None)
+                except queue.Full:
+                    pass
+            for worker in workers:
+                worker.join()
+            self.manifest.close()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _worker(self, loaded):
+        try:
+            module = engine_module(self.engine)
+            # Models by language, starting from the default one
+            ocr = LanguageModels(
+                self.engine,
+                load_engine(self.engine, self.worker_threads, self.tesseract_path),
+                lambda language: load_engine(self.engine, self.worker_threads, self.tesseract_path, language),
+            )
+            warm_up(self.engine, lambda image: ocr.process_array(image, module))
+        except Exception as e:
+            logger.error(f"{threading.current_thread().name}: could not load {self.engine}: {e}", exc_info=True)
+            self.load_error = e
+            return
+        finally:
+            loaded.set()
+        while not self.stopped.is_set():
+            try:
+                path = self.jobs.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if path is None:
+                break
+            try:
+                with engine_lease(self.budget, self.engine, module, ocr.model(), self.worker_threads) as threads:
+                    module.set_num_threads(threads)
+                    self.process_file(path, module, ocr)
+            finally:
+                with self._queued_lock:
+                    self.queued.discard(path)
+
+    def process_file(self, path, module, ocr):
+        with job_context(self.engine):
+            self._process_file(path, module, ocr)
+
+    def _process_file(self, path, module, ocr):
+        try:
+            stat = os.stat(path)
+            if self.manifest.unchanged(path, stat, self.engine):
+                return
+            digest = file_digest(path)
+        except FileNotFoundError:
+            return
+        if self.manifest.is_done(digest, self.engine):
+            logger.info(f"Skipping {path}: same content already processed")
+            self.manifest.record(path, digest, self.engine, "duplicate", stat=stat)
+            return
+
+        start = time.perf_counter()
+        self.manifest.record(path, digest, self.engine, "processing", stat=stat)
+        try:
+            # One pass per frame of multi-frame TIFF/DICOM files, each with its own outputs
+            outputs = {}
+            for frame, image in read_frames(path):
+                with stage("ocr"):
+                    tokens = ocr.process_array(image, module)
+                    del image
+                if self.lexicon is not None:
+                    with stage("lexicon"):
+                        tokens = correct_tokens(as_tokens(tokens), self.lexicon, self.thresholds[1])
+                with stage("layout"):
+                    layout = build_layout(tokens)
+                    rows = layout_to_grid(layout)
+                base_filename = os.path.splitext(os.path.basename(frame))[0]
+                output_base = os.path.join(self.output_dir, base_filename + "_output")
+                with stage("outputs"):
+                    frame_outputs = write_outputs(self.formats, rows, output_base, *self.thresholds, layout=layout)
+                if frame == path:
+                    outputs = frame_outputs
+                else:
+                    outputs.update({f"{name}:{base_filename}": output for name, output in frame_outputs.items()})
+                if self.history is not None:
+                    job_id = JOB_ID.get() if frame == path else f"{JOB_ID.get()}:{base_filename}"
+                    self.history.record(
+                        layout, frame, self.engine, job_id=job_id, output_base=output_base, timings=job_timings()
+                    )
+        except Exception as e:
+            logger.error(f"Failed to process {path}: {e}", exc_info=True)
+            self.manifest.record(path, digest, self.engine, "failed", error=str(e), stat=stat)
+            return
+        self.manifest.record(path, digest, self.engine, "done", outputs, stat=stat)
+        self.processed += 1
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Processed {path} in {elapsed_ms:.0f} ms ({self.jobs.qsize()} queued)",
+            extra={"duration_ms": round(elapsed_ms, 1)},
+        )
@@ -0,0 +1,170 @@
+import csv
+import json
+import logging
+import os
+import time
+
+import openpyxl
+from openpyxl.comments import Comment
+from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter
+
+logger = logging.getLogger(__name__)
+
+GREEN = '00FF00'
+YELLOW = 'FFFF00'
+RED = 'FF0000'
+
+# name -> (file suffix, writer function, whether it needs per-cell boxes).
+# Writers also get ``notes``, the lexicon correction of every cell or None.
+WRITERS = {}
+
+
+def register_writer(name, suffix, needs_boxes=False):
+    def decorator(func):
+        WRITERS[name] = (suffix, func, needs_boxes)
+        return func
+    return decorator
+
+
+def confidence_color(confidence, green_threshold=0.97, yellow_threshold=0.92):
+    if confidence >= green_threshold:
+        # Green for confidence >= green_threshold
+        return GREEN
+    elif confidence >= yellow_threshold:
+        # Yellow for confidence >= yellow_threshold
+        return YELLOW
+    # Red for confidence below yellow_threshold
+    return RED
+
+
+def confidence_level(confidence, green_threshold=0.97, yellow_threshold=0.92):
+    return {GREEN: 'green', YELLOW: 'yellow', RED: 'red'}[
+        confidence_color(confidence, green_threshold, yellow_threshold)
+    ]
+
+
+@register_writer('xlsx', '.xlsx')
+def save_as_xlsx(rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92, boxes=None, notes=None):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+
+    fills = {
+        color: PatternFill(start_color=color, end_color=color, fill_type='solid')
+        for color in (GREEN, YELLOW, RED)
+    }
+    for row_index, row in enumerate(rows, start=1):
+        for col_index, cell in enumerate(row, start=1):
+            if cell is None:
+                # Empty grid cell: leave it blank and unfilled
+                continue
+            text, confidence = cell
+            ws_cell = ws.cell(row=row_index, column=col_index, value=text)
+            ws_cell.fill = fills[confidence_color(confidence, green_threshold, yellow_threshold)]
+            if notes and notes[row_index - 1][col_index - 1]:
+                ws_cell.comment = Comment(f"Corrected: {notes[row_index - 1][col_index - 1]}", 'OCR')
+
+    # Auto-adjust column widths
+    for column in ws.columns:
+        max_length = 0
+        column_letter = get_column_letter(column[0].column)
+        for cell in column:
+            if cell.value is not None and len(str(cell.value)) > max_length:
+                max_length = len(str(cell.value))
+        adjusted_width = (max_length + 2)
+        ws.column_dimensions[column_letter].width = adjusted_width
+
+    wb.save(output_xlsx)
+    logger.info(f"Excel file has been saved at: {output_xlsx}")
+
+
+@register_writer('csv', '.csv')
+def save_as_csv(rows, output_csv, green_threshold=0.97, yellow_threshold=0.92, boxes=None, notes=None):
+    # Same layout as the test/*_output.csv fixtures: text only, blanks kept
+    with open(output_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow(['' if cell is None else cell[0] for cell in row])
+    logger.info(f"CSV file has been saved at: {output_csv}")
+
+
+@register_writer('jsonl', '.jsonl', needs_boxes=True)
+def save_as_jsonl(rows, output_jsonl, green_threshold=0.97, yellow_threshold=0.92, boxes=None, notes=None):
+    # One JSON object per non-empty cell
+    with open(output_jsonl, 'w', encoding='utf-8') as f:
+        for row_index, row in enumerate(rows):
+            for col_index, cell in enumerate(row):
+                if cell is None:
+                    continue
+                text, confidence = cell
+                record = {
+                    'row': row_index,
+                    'col': col_index,
+                    'text': text,
+                    'confidence': round(confidence, 4),
+                    'level': confidence_level(confidence, green_threshold, yellow_threshold),
+                    'bbox': boxes[row_index][col_index] if boxes else None,
+                }
+                if notes and notes[row_index][col_index]:
+                    record['correction'] = notes[row_index][col_index]
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+    logger.info(f"JSON Lines file has been saved at: {output_jsonl}")
+
+
+@register_writer('parquet', '.parquet')
+def save_as_parquet(rows, output_parquet, green_threshold=0.97, yellow_threshold=0.92, boxes=None, notes=None):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+
+    # One text column and one confidence column per table column
+    n_cols = max((len(row) for row in rows), default=0)
+    columns = {'row': list(range(len(rows)))}
+    for col_index in range(n_cols):
+        cells = [row[col_index] if col_index < len(row) else None for row in rows]
+        columns[f'col{col_index + 1}'] = pa.array(
+            [None if cell is None else cell[0] for cell in cells], type=pa.string()
+        )
+        columns[f'col{col_index + 1}_confidence'] = pa.array(
+            [None if cell is None else cell[1] for cell in cells], type=pa.float32()
+        )
+
+    pq.write_table(pa.table(columns), output_parquet)
+    logger.info(f"Parquet file has been saved at: {output_parquet}")
+
+
+def write_outputs(formats, rows, output_base, green_threshold=0.97, yellow_threshold=0.92, layout=None,
+                  atomic=False):
+    """Write ``rows`` in every requested format.
+
+    Each file is ``output_base`` plus the writer's suffix. With ``atomic``,
+    files are written as ``output_base.part<suffix>`` and renamed when
+    complete, so an existing output is never a partial one. Returns a dict
+    of format name to written path and logs what each writer cost.
+    """
+    boxes = notes = None
+    if layout is not None:
+        from OCR_Modules.grid import cell_boxes, cell_notes
+
+        if any(WRITERS[name][2] for name in formats):
+            boxes = cell_boxes(layout)
+        notes = cell_notes(layout)
+
+    outputs = {}
+    for name in formats:
+        suffix, writer, _ = WRITERS[name]
+        path = output_base + suffix
+        start = time.perf_counter()
+        if atomic:
+            partial = output_base + '.part' + suffix
+            writer(rows, partial, green_threshold, yellow_threshold, boxes=boxes, notes=notes)
+            os.replace(partial, path)
+        else:
+            writer(rows, path, green_threshold, yellow_threshold, boxes=boxes, notes=notes)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"{name} writer took {elapsed_ms:.1f} ms")
+        outputs[name] = path
+    return outputs
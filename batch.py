@@ -0,0 +1,78 @@
+"""OCR a set of images in one run that can be resumed after a crash.
+
+Usage: python batch.py IMAGE_OR_FOLDER... --output DIR [--engine PaddleOCR]
+                       [--formats xlsx,csv] [--workers 2] [--fresh]
+                       [--lexicon FILE | --no-lexicon] [--no-history]
+
+Progress is journaled in DIR/.ocr_batch_journal.jsonl. Running the same
+command again skips finished files and only redoes what was interrupted.
+"""
+import argparse
+import os
+import sys
+
+from utils import (ensure_locale, handle_uncaught_exception, resource_path,
+                   set_tessdata_prefix, setup_logging)
+
+ensure_locale()
+
+os.environ["PADDLE_OCR_BASE_DIR"] = resource_path("./models/paddleocr")
+os.environ["EASYOCR_MODULE_PATH"] = resource_path("./models/easyocr")
+
+setup_logging()
+set_tessdata_prefix()
+
+from OCR_Modules.batch import BatchRun, collect_images
+from OCR_Modules.engines import ENGINE_MODULES
+from OCR_Modules.history import History
+from OCR_Modules.lexicon import Lexicon
+from OCR_Modules.writers import WRITERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR a set of images, resumable after a crash.")
+    parser.add_argument("inputs", nargs="+", help="images or folders of images")
+    parser.add_argument("--output", required=True, help="output directory")
+    parser.add_argument("--engine", default="PaddleOCR", choices=list(ENGINE_MODULES))
+    parser.add_argument("--formats", default="xlsx", help=f"comma separated, from {', '.join(WRITERS)}")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--green", type=int, default=97)
+    parser.add_argument("--yellow", type=int, default=92)
+    parser.add_argument("--fresh", action="store_true", help="ignore the journal and process every file")
+    parser.add_argument(
+        "--lexicon",
+        default=os.getenv("OCR_LEXICON") or resource_path("lexicon/medical.txt"),
+        help="term list for correcting low-confidence tokens",
+    )
+    parser.add_argument("--no-lexicon", action="store_true", help="keep the engine's text as read")
+    parser.add_argument("--no-history", action="store_true", help="do not record documents in the history database")
+    args = parser.parse_args()
+
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in WRITERS]
+    if unknown:
+        parser.error(f"unknown output format(s): {', '.join(unknown)}")
+
+    journal_path = os.path.join(os.path.abspath(args.output), ".ocr_batch_journal.jsonl")
+    if args.fresh and os.path.exists(journal_path):
+        os.remove(journal_path)
+
+    batch = BatchRun(
+        collect_images(args.inputs),
+        args.output,
+        engine=args.engine,
+        formats=formats,
+        workers=args.workers,
+        green_threshold=args.green / 100,
+        yellow_threshold=args.yellow / 100,
+        lexicon=None if args.no_lexicon else Lexicon.load(args.lexicon),
+        history=None if args.no_history else History(),
+        journal_path=journal_path,
+    )
+    counts = batch.run()
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    sys.excepthook = handle_uncaught_exception
+    main()
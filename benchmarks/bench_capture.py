@@ -0,0 +1,66 @@
+"""Screen capture latency, and capture-to-OCR latency for one engine.
+
+Usage: python -m benchmarks.bench_capture [repeats] [engine]
+
+Needs a display; on a headless Linux machine run it under Xvfb:
+    xvfb-run -s "-screen 0 1920x1080x24" python -m benchmarks.bench_capture 20 Tesseract
+"""
+import statistics
+import sys
+import time
+
+import cv2
+
+from screenshot import grab_screen
+
+
+def timed(func, repeats):
+    times = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, times
+
+
+def report(name, times):
+    print(f"{name:>16}: median {statistics.median(times):8.2f} ms  max {max(times):8.2f} ms")
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    engine = sys.argv[2] if len(sys.argv) > 2 else None
+
+    frame, times = timed(grab_screen, repeats)
+    height, width = frame.shape[:2]
+    print(f"screen {width}x{height}")
+    report("grab", times)
+
+    # A quarter of the screen, as a typical selection
+    region = (width // 4, height // 4, width // 2, height // 2)
+
+    def crop():
+        x1, y1, x2, y2 = region
+        return cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGRA2BGR)
+
+    selection, times = timed(crop, repeats)
+    report("crop + convert", times)
+
+    if engine:
+        from OCR_Modules.engines import engine_module, load_engine
+
+        module = engine_module(engine)
+        ocr = load_engine(engine)
+        module.process_array(selection, ocr)  # warm up
+
+        def capture_to_ocr():
+            x1, y1, x2, y2 = region
+            return module.process_array(cv2.cvtColor(grab_screen()[y1:y2, x1:x2], cv2.COLOR_BGRA2BGR), ocr)
+
+        _, times = timed(capture_to_ocr, repeats)
+        report(f"capture + {engine}", times)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Image handoff to worker processes: pickling versus the shared-memory ring.
+
+Usage: python -m benchmarks.bench_handoff [images] [--size 3000x2000] [--workers 2] [--slots 4]
+
+The producer sends ``images`` BGR images to the workers, which only read
+them (a strided checksum) and report back; the time is the handoff. The
+producer reuses one decoded image: with pickling it goes through the job
+queue as an array, with the ring it is copied into a free slot and only
+its handle is queued. Workers are started with ``spawn``, as on Windows
+and macOS.
+"""
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from OCR_Modules.handoff import ImageRing
+
+
+def checksum(image):
+    return int(image[::97, ::89].sum())
+
+
+def pickle_worker(jobs, results):
+    while True:
+        image = jobs.get()
+        if image is None:
+            return
+        results.put(checksum(image))
+
+
+def ring_worker(ring, jobs, results):
+    while True:
+        handle = jobs.get()
+        if handle is None:
+            break
+        image = ring.view(handle)
+        value = checksum(image)
+        del image
+        ring.release(handle)
+        results.put(value)
+    ring.close()
+
+
+def run(context, target, args, jobs, results, send, count, n_workers):
+    workers = [context.Process(target=target, args=args) for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    start = time.perf_counter()
+    produce = 0.0
+    for _ in range(count):
+        t = time.perf_counter()
+        jobs.put(send())
+        produce += time.perf_counter() - t
+    values = [results.get() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    for _ in workers:
+        jobs.put(None)
+    for worker in workers:
+        worker.join()
+    return elapsed, produce, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("images", nargs="?", type=int, default=50)
+    parser.add_argument("--size", default="3000x2000", help="WIDTHxHEIGHT")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--slots", type=int, default=4)
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.split("x"))
+    image = np.random.default_rng(0).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    expected = checksum(image)
+    context = multiprocessing.get_context("spawn")
+    print(f"{args.images} images of {width}x{height} ({image.nbytes / 1024 / 1024:.1f} MB), {args.workers} workers")
+
+    jobs, results = context.Queue(maxsize=args.slots), context.Queue()
+    timings = {
+        "pickle": run(context, pickle_worker, (jobs, results), jobs, results, lambda: image, args.images, args.workers)
+    }
+    with ImageRing(args.slots, image.nbytes, context=context) as ring:
+        jobs, results = context.Queue(), context.Queue()
+        timings["shared ring"] = run(
+            context, ring_worker, (ring, jobs, results), jobs, results, lambda: ring.put(image), args.images, args.workers
+        )
+
+    for name, (elapsed, produce, values) in timings.items():
+        assert all(value == expected for value in values), name
+        print(
+            f"{name:>12}: {elapsed * 1000 / args.images:7.2f} ms/image, "
+            f"{args.images / elapsed:7.1f} images/s, producer {produce * 1000 / args.images:6.2f} ms/image"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cost of lexicon post-correction per token.
+
+Usage: python -m benchmarks.bench_lexicon [tokens]
+
+Tokens are lexicon terms and numbers with random OCR-style errors, all
+below the yellow threshold so every one goes through the lookup.
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from OCR_Modules.lexicon import Lexicon, correct_tokens
+from OCR_Modules.tokens import OCRTokens
+
+CONFUSIONS = {"0": "O", "1": "l", "5": "S", "8": "B", "O": "0", "I": "l", "V": "Y"}
+
+
+def misread(text, rng):
+    # One substituted, dropped or confused character
+    i = rng.randrange(len(text))
+    roll = rng.random()
+    if roll < 0.4 and text[i] in CONFUSIONS:
+        return text[:i] + CONFUSIONS[text[i]] + text[i + 1 :]
+    if roll < 0.7 and len(text) > 3:
+        return text[:i] + text[i + 1 :]
+    return text[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1 :]
+
+
+def synthetic_tokens(terms, n, seed=0):
+    rng = random.Random(seed)
+    texts = [
+        misread(rng.choice(terms) if rng.random() < 0.5 else f"{rng.uniform(0, 20):.2f}", rng)
+        for _ in range(n)
+    ]
+    boxes = np.zeros((n, 4, 2), dtype=np.float32)
+    return OCRTokens(boxes, np.full(n, 0.5, dtype=np.float32), texts)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    start = time.perf_counter()
+    lexicon = Lexicon.load()
+    print(f"index of {len(lexicon.terms)} terms built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    tokens = synthetic_tokens(list(lexicon.terms.values()), n)
+    unique = sorted(set(tokens.texts))
+    start = time.perf_counter()
+    for text in unique:
+        lexicon.lookup(text)
+    elapsed = time.perf_counter() - start
+    print(f"uncached lookup: {elapsed / len(unique) * 1e6:8.2f} us/token ({len(unique)} distinct)")
+
+    start = time.perf_counter()
+    corrected = correct_tokens(tokens, lexicon)
+    elapsed = time.perf_counter() - start
+    changed = sum(o is not None for o in corrected.originals or ())
+    print(f"correct_tokens:  {elapsed / n * 1e6:8.2f} us/token ({n} tokens, {changed} corrected)")
+
+
+if __name__ == "__main__":
+    main()
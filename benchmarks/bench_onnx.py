@@ -0,0 +1,64 @@
+"""Latency and accuracy drift of the ONNX Runtime backend against PaddleOCR.
+
+Usage: python -m benchmarks.bench_onnx [repeats] [images ...]
+
+Runs PaddleOCR, the FP32 ONNX models and (if present) the INT8 ONNX models
+on each image (default: the test/ fixtures) and reports the median latency
+and the drift of the ONNX tokens from PaddleOCR's.
+"""
+import os
+import statistics
+import sys
+import time
+
+import cv2
+
+from OCR_Modules import onnxOCR, paddleOCR
+from OCR_Modules.onnx_models import compare_tokens, default_images
+
+
+def timed(func, image, ocr, repeats):
+    tokens, samples = None, []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tokens = func(image, ocr)
+        samples.append(time.perf_counter() - start)
+    return tokens, statistics.median(samples) * 1000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    images = sys.argv[2:] or default_images()
+
+    variants = {"paddle": (paddleOCR.process_array, paddleOCR.initialize_ocr_SLANet_LCNetV2())}
+    variants["onnx-fp32"] = (onnxOCR.process_array, onnxOCR.initialize_onnx(quantized=False))
+    if os.path.exists(onnxOCR.model_paths()["det"].replace(".onnx", ".int8.onnx")):
+        variants["onnx-int8"] = (onnxOCR.process_array, onnxOCR.initialize_onnx(quantized=True))
+
+    totals = {name: [] for name in variants}
+    for path in images:
+        image = cv2.imread(path)
+        print(os.path.basename(path))
+        reference = None
+        for name, (func, ocr) in variants.items():
+            func(image, ocr)  # warm-up
+            tokens, elapsed_ms = timed(func, image, ocr, repeats)
+            totals[name].append(elapsed_ms)
+            if reference is None:
+                reference = tokens
+                print(f"  {name:>10}: {elapsed_ms:8.1f} ms  {len(tokens):4d} tokens")
+                continue
+            drift = compare_tokens(reference, tokens)
+            print(
+                f"  {name:>10}: {elapsed_ms:8.1f} ms  {len(tokens):4d} tokens  "
+                f"recall {drift['recall']:.3f}  agreement {drift['agreement']:.3f}  "
+                f"cer {drift['cer']:.4f}  conf delta {drift['conf_delta']:.4f}"
+            )
+
+    print("median over images")
+    for name, samples in totals.items():
+        print(f"  {name:>10}: {statistics.median(samples):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Post-OCR pipeline cost on replayed tokens, no OCR engine needed.
+
+Usage: python -m benchmarks.bench_pipeline [tokens ...] [--latency MS] [--formats xlsx,csv]
+
+Each size is a synthetic table from the replay engine (default 1k, 10k and
+100k tokens). Stages run as in the app: lexicon correction, grouping into
+rows and columns, then the output writers, the token sidecar and the
+history record in parallel on a pool like the GUI's output stage.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from OCR_Modules import replayOCR
+from OCR_Modules.grid import build_layout, cell_boxes, layout_to_grid
+from OCR_Modules.history import History
+from OCR_Modules.lexicon import Lexicon, correct_tokens
+from OCR_Modules.writers import write_outputs
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(n_tokens, ocr, lexicon, formats, tmp):
+    # The replay engine serves the synthetic document like a recording
+    image = np.full((8, 8, 3), n_tokens % 256, dtype=np.uint8)
+    ocr.remember(image, replayOCR.synthetic_tokens(n_tokens))
+
+    timings = {}
+    tokens, timings["engine"] = timed(replayOCR.process_array, image, ocr)
+    tokens, timings["lexicon"] = timed(correct_tokens, tokens, lexicon)
+    layout, timings["layout"] = timed(build_layout, tokens)
+    rows, timings["grid"] = timed(layout_to_grid, layout)
+    _, timings["cell boxes"] = timed(cell_boxes, layout)
+
+    output_base = os.path.join(tmp, f"bench_{n_tokens}_output")
+    history = History(os.path.join(tmp, "history.sqlite3"))
+    tasks = {
+        "outputs": lambda: write_outputs(formats, rows, output_base, 0.97, 0.92, layout=layout),
+        "tokens": lambda: layout["tokens"].save_npz(output_base + "_tokens.npz"),
+        "history": lambda: history.record(layout, "bench", "Replay", job_id=f"bench-{n_tokens}"),
+    }
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = {name: pool.submit(timed, task) for name, task in tasks.items()}
+        for name, future in futures.items():
+            timings[name] = future.result()[1]
+    timings["output stage"] = (time.perf_counter() - start) * 1000
+    history.close()
+    return len(rows), timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--latency", type=float, default=0.0, help="synthetic engine latency per call, ms")
+    parser.add_argument("--formats", default="xlsx,csv,jsonl")
+    args = parser.parse_args()
+
+    ocr = replayOCR.initialize_replay(latency_ms=args.latency)
+    lexicon = Lexicon.load()
+    formats = args.formats.split(",")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_tokens in args.sizes:
+            n_rows, timings = run(n_tokens, ocr, lexicon, formats, tmp)
+            print(f"{n_tokens} tokens, {n_rows} rows")
+            for name, ms in timings.items():
+                print(f"{name:>14}: {ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
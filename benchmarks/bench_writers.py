@@ -0,0 +1,61 @@
+"""Per-writer cost of the output formats on a synthetic table.
+
+Usage: python -m benchmarks.bench_writers [rows] [cols]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from OCR_Modules.writers import WRITERS
+
+
+def synthetic_rows(n_rows, n_cols, blank_ratio=0.1, seed=0):
+    rng = random.Random(seed)
+    return [
+        [
+            None
+            if rng.random() < blank_ratio
+            else (f"{rng.uniform(0, 100):.2f}", rng.uniform(0.8, 1.0))
+            for _ in range(n_cols)
+        ]
+        for _ in range(n_rows)
+    ]
+
+
+def synthetic_boxes(rows, cell_width=90, cell_height=30):
+    return [
+        [
+            None
+            if cell is None
+            else [c * cell_width, r * cell_height, (c + 1) * cell_width, (r + 1) * cell_height]
+            for c, cell in enumerate(row)
+        ]
+        for r, row in enumerate(rows)
+    ]
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_cols = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    rows = synthetic_rows(n_rows, n_cols)
+    boxes = synthetic_boxes(rows)
+
+    print(f"{n_rows} rows x {n_cols} columns")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (suffix, writer, _) in WRITERS.items():
+            path = os.path.join(tmp, "bench_output" + suffix)
+            start = time.perf_counter()
+            try:
+                writer(rows, path, boxes=boxes)
+            except ImportError as e:
+                print(f"{name:>8}: skipped ({e})")
+                continue
+            elapsed = time.perf_counter() - start
+            size_kb = os.path.getsize(path) / 1024
+            print(f"{name:>8}: {elapsed * 1000:9.1f} ms  {size_kb:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
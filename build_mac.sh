@@ -8,6 +8,7 @@ pyinstaller --noconfirm --onedir --windowed \
 --add-data "icons:icons" \
 --add-data "models:models" \
 --add-data "simfang.ttf:." \
+--add-data "lexicon:lexicon" \
 --add-binary "$TESS_BIN:models/tesseract" \
 --add-data "$TESS_DATA:models/tesseract/tessdata" \
 --collect-all paddle \
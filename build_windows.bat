@@ -14,6 +14,7 @@ pyinstaller --noconfirm --onefile --windowed ^
 --add-data "icons;icons" ^
 --add-data "models;models" ^
 --add-data "simfang.ttf;." ^
+--add-data "lexicon;lexicon" ^
 --add-data "!TESS_PATH!;models/tesseract" ^
 --collect-all paddle ^
 --collect-all paddleocr ^
@@ -0,0 +1,247 @@
+import bisect
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+from OCR_Modules.writers import confidence_color
+
+MIN_COLUMN_WIDTH = 60
+MAX_COLUMN_WIDTH = 240
+CELL_PADDING = 6
+HEADER_FILL = "#F0F0F0"
+HOVER_OUTLINE = "#1E64C8"
+
+
+def column_name(index):
+    # 0 -> A, 25 -> Z, 26 -> AA, as in a spreadsheet
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+class GridView(ttk.Frame):
+    """Scrollable, spreadsheet-like view of ``(text, confidence)`` rows.
+
+    Only the cells inside the viewport have canvas items. They come from a
+    pool that is reused on every scroll and resize, so drawing costs the
+    same for a table of ten rows or ten thousand.
+
+    ``on_cell(row, col)`` is called with the hovered cell, or the clicked
+    one once the pointer leaves the grid; both are None without a cell.
+    """
+
+    def __init__(self, parent, rows, green_threshold=0.97, yellow_threshold=0.92, on_cell=None):
+        super().__init__(parent)
+        self.rows = rows
+        self.thresholds = (green_threshold, yellow_threshold)
+        self.on_cell = on_cell
+        self.hovered = None
+        self.selected = None
+
+        self.font = tkfont.nametofont("TkDefaultFont")
+        self.char_width = max(self.font.measure("0"), 1)
+        self.row_height = self.font.metrics("linespace") + CELL_PADDING
+        self.header_width = self.font.measure(str(len(rows))) + 2 * CELL_PADDING
+
+        # Column widths from the longest text, capped; x offsets of every column
+        n_cols = max((len(row) for row in rows), default=0)
+        lengths = [0] * n_cols
+        for row in rows:
+            for col, cell in enumerate(row):
+                if cell is not None and len(cell[0]) > lengths[col]:
+                    lengths[col] = len(cell[0])
+        self.widths = [
+            min(max(length * self.char_width + 2 * CELL_PADDING, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH)
+            for length in lengths
+        ]
+        self.offsets = [self.header_width]
+        for width in self.widths:
+            self.offsets.append(self.offsets[-1] + width)
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0)
+        y_scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        x_scroll = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.xview)
+        self.canvas.configure(
+            xscrollcommand=x_scroll.set,
+            yscrollcommand=y_scroll.set,
+            xscrollincrement=self.char_width,
+            yscrollincrement=self.row_height,
+            scrollregion=(0, 0, self.offsets[-1] + 1, (len(rows) + 1) * self.row_height + 1),
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        # (rectangle, text) item pairs, shown or hidden as the viewport needs
+        self._cells = []
+        self._headers = []
+        self._hover = self.canvas.create_rectangle(0, 0, 0, 0, outline=HOVER_OUTLINE, width=2, state="hidden")
+        self._selection = self.canvas.create_rectangle(0, 0, 0, 0, outline=HOVER_OUTLINE, width=3, state="hidden")
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.canvas.bind("<Leave>", self._on_leave)
+        self.canvas.bind("<ButtonPress-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Shift-MouseWheel>", self._on_wheel)
+        # X11 reports the wheel as buttons 4 and 5
+        self.canvas.bind("<Button-4>", lambda event: self._scroll(-3))
+        self.canvas.bind("<Button-5>", lambda event: self._scroll(3))
+
+    def set_thresholds(self, green_threshold, yellow_threshold):
+        self.thresholds = (green_threshold, yellow_threshold)
+        self.redraw()
+
+    def xview(self, *args):
+        self.canvas.xview(*args)
+        self.redraw()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def _scroll(self, units, horizontal=False):
+        if horizontal:
+            self.canvas.xview_scroll(units, "units")
+        else:
+            self.canvas.yview_scroll(units, "units")
+        self.redraw()
+
+    def _on_wheel(self, event):
+        # The delta scale differs per platform; only its sign is used
+        units = -3 if event.delta > 0 else 3
+        self._scroll(units, horizontal=bool(event.state & 0x1))
+
+    def _place(self, pool, index, x1, y1, x2, y2, fill, text):
+        if index == len(pool):
+            tag = "header" if pool is self._headers else "cell"
+            pool.append(
+                (
+                    self.canvas.create_rectangle(0, 0, 0, 0, outline="#BFBFBF", tags=tag),
+                    self.canvas.create_text(0, 0, anchor="w", font=self.font, tags=tag),
+                )
+            )
+        rect, label = pool[index]
+        self.canvas.coords(rect, x1, y1, x2, y2)
+        self.canvas.itemconfigure(rect, fill=fill, state="normal")
+        # Canvas text is not clipped, so it is cut to the cell width
+        fits = max(int((x2 - x1 - 2 * CELL_PADDING) // self.char_width), 1)
+        if len(text) > fits:
+            text = text[: max(fits - 1, 0)] + "…"
+        self.canvas.coords(label, x1 + CELL_PADDING, (y1 + y2) / 2)
+        self.canvas.itemconfigure(label, text=text, state="normal")
+
+    def visible_range(self):
+        # First/last rows and columns inside the viewport
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        right = left + self.canvas.winfo_width()
+        bottom = top + self.canvas.winfo_height()
+        first_row = max(int(top // self.row_height) - 1, 0)
+        last_row = min(int(bottom // self.row_height), len(self.rows))
+        first_col = max(bisect.bisect_right(self.offsets, left) - 1, 0)
+        last_col = min(bisect.bisect_right(self.offsets, right), len(self.widths))
+        return first_row, last_row, first_col, last_col, left, top
+
+    def redraw(self):
+        first_row, last_row, first_col, last_col, left, top = self.visible_range()
+        green, yellow = self.thresholds
+        height = self.row_height
+
+        used = 0
+        for row_index in range(first_row, last_row):
+            row = self.rows[row_index]
+            y1 = (row_index + 1) * height
+            for col in range(first_col, min(last_col, len(row))):
+                cell = row[col]
+                fill = "#FFFFFF" if cell is None else "#" + confidence_color(cell[1], green, yellow)
+                text = "" if cell is None else cell[0]
+                self._place(self._cells, used, self.offsets[col], y1, self.offsets[col + 1], y1 + height, fill, text)
+                used += 1
+        for rect, label in self._cells[used:]:
+            self.canvas.itemconfigure(rect, state="hidden")
+            self.canvas.itemconfigure(label, state="hidden")
+
+        # Row numbers and column letters stay at the viewport edges
+        headers = 0
+        for col in range(first_col, last_col):
+            self._place(
+                self._headers, headers, self.offsets[col], top, self.offsets[col + 1], top + height,
+                HEADER_FILL, column_name(col),
+            )
+            headers += 1
+        for row_index in range(first_row, last_row):
+            y1 = (row_index + 1) * height
+            self._place(
+                self._headers, headers, left, y1, left + self.header_width, y1 + height,
+                HEADER_FILL, str(row_index + 1),
+            )
+            headers += 1
+        self._place(self._headers, headers, left, top, left + self.header_width, top + height, HEADER_FILL, "")
+        headers += 1
+        for rect, label in self._headers[headers:]:
+            self.canvas.itemconfigure(rect, state="hidden")
+            self.canvas.itemconfigure(label, state="hidden")
+
+        self._outline(self._selection, self.selected)
+        self._outline(self._hover, self.hovered)
+        # Cells scrolled under the headers must not cover them, nor the
+        # headers the corner
+        self.canvas.tag_raise("header")
+        for item in self._headers[headers - 1]:
+            self.canvas.tag_raise(item)
+
+    def _outline(self, item, cell):
+        if cell is None:
+            self.canvas.itemconfigure(item, state="hidden")
+            return
+        row, col = cell
+        y1 = (row + 1) * self.row_height
+        self.canvas.coords(item, self.offsets[col], y1, self.offsets[col + 1], y1 + self.row_height)
+        self.canvas.itemconfigure(item, state="normal")
+        # Above the cells, below the headers the table scrolls under
+        self.canvas.tag_raise(item)
+        self.canvas.tag_raise("header")
+
+    def cell_at(self, x, y):
+        # Cell under a viewport point, or None over the headers or past the table
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        if x < self.header_width or y < self.row_height:
+            return None
+        row = int((top + y) // self.row_height) - 1
+        col = bisect.bisect_right(self.offsets, left + x) - 1
+        if not 0 <= row < len(self.rows) or not 0 <= col < len(self.rows[row]):
+            return None
+        if self.rows[row][col] is None:
+            return None
+        return row, col
+
+    def _notify(self):
+        if self.on_cell is not None:
+            cell = self.hovered or self.selected
+            self.on_cell(*(cell or (None, None)))
+
+    def _on_motion(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell != self.hovered:
+            self.hovered = cell
+            self._outline(self._hover, cell)
+            self._notify()
+
+    def _on_leave(self, event):
+        if self.hovered is not None:
+            self.hovered = None
+            self._outline(self._hover, None)
+            self._notify()
+
+    def _on_click(self, event):
+        cell = self.cell_at(event.x, event.y)
+        self.selected = None if cell == self.selected else cell
+        self._outline(self._selection, self.selected)
+        self._notify()
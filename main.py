@@ -42,18 +42,31 @@ from utils import ensure_locale
 
 ensure_locale()
 
-import logging
+import contextvars
 import os
 import site
 import time
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox
 
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 
+from OCR_Modules.cascade import cascade_tiers, format_stats, run_cascade
+from OCR_Modules.detection import (DETECTOR_PREFERENCE, DetectionCache,
+                                   recognize)
+from OCR_Modules.engines import EngineUnavailable, engine_lease, engine_module, load_engine
+from OCR_Modules.frames import is_multi_frame
+from OCR_Modules.grid import build_layout, layout_to_grid, update_region
+from OCR_Modules.languages import LanguageModels
+from OCR_Modules.memory import MemoryTracker
+from OCR_Modules.threads import ThreadBudget
+from OCR_Modules.tokens import as_tokens
+from OCR_Modules.tracing import (ENGINE, JOB_ID, job_context, job_timings,
+                                 run_in_stage, stage)
 from screenshot import capture_screenshot
-from utils import (ErrorSessionHandler, get_tessbin_path, get_tessdata_path,
-                   handle_uncaught_exception, logger)
+from utils import (handle_uncaught_exception, logger, open_file,
+                   set_tessdata_prefix, setup_logging)
 
 if site.USER_SITE is None:
     # Set a fallback value.
@@ -62,19 +75,10 @@ if site.USER_SITE is None:
 
 os.environ["PADDLE_OCR_BASE_DIR"] = resource_path("./models/paddleocr")
 os.environ["EASYOCR_MODULE_PATH"] = resource_path("./models/easyocr")
-os.environ["TESSDATA_PREFIX"] = get_tessdata_path()
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s] [%(levelname)8s] [%(filename)s:%(lineno)d] %(message)s",
-    handlers=[
-        ErrorSessionHandler(
-            "errors.log", when="midnight", backupCount=7, encoding="utf-8"
-        ),
-        logging.StreamHandler(),
-    ],
-)
+# Log through a queue; file and console I/O run on a listener thread
+setup_logging()
+set_tessdata_prefix()
 
 
 class OCRApp:
@@ -89,8 +93,57 @@ class OCRApp:
         self.ocr_engine.set("PaddleOCR")
         self.green_threshold = tk.IntVar(value=97)
         self.yellow_threshold = tk.IntVar(value=92)
+        self.output_formats = {
+            "xlsx": tk.BooleanVar(value=True),
+            "csv": tk.BooleanVar(value=False),
+            "jsonl": tk.BooleanVar(value=False),
+            "parquet": tk.BooleanVar(value=False),
+        }
         self.output_directory = None
-        self.ocr_models = {"PaddleOCR": None, "Tesseract": None, "EasyOCR": None}
+        self.ocr_models = {
+            "PaddleOCR": None,
+            "Tesseract": None,
+            "EasyOCR": None,
+            "ONNX Runtime": None,
+        }
+        if os.getenv("OCR_REPLAY", "0") != "0":
+            # Recorded tokens instead of a model, for profiling the pipeline
+            self.ocr_models["Replay"] = None
+        # Per engine: its models by language, the loaded one above as default
+        self.language_models = {}
+        # Tokens, rows and output paths of the last job, kept so threshold
+        # changes can be re-applied without running OCR again
+        self.last_job = None
+        # Detect text boxes once per image and only re-run recognition when
+        # switching engines
+        self.shared_detection = tk.BooleanVar(value=False)
+        self.detection_cache = DetectionCache()
+        # Correct low-confidence tokens against the medical lexicon; the
+        # index is built on first use
+        self.lexicon_correction = tk.BooleanVar(value=True)
+        self.lexicon = None
+        # Per-tier statistics of the last cascade run
+        self.last_cascade_stats = []
+        # Recent screenshots and their tokens, created on first use
+        self.screenshot_cache = None
+        # (path, BGR image, capture time) of a screenshot awaiting OCR
+        self.captured_image = None
+        # Result grid and the image canvas its cells are highlighted on
+        self.grid_view = None
+        self.image_canvas = None
+        # SQLite history of every processed document, opened on first use
+        self.history = None
+        # CPU threads shared by every OCR call, so concurrent jobs and engines
+        # do not oversubscribe the cores
+        self.thread_budget = ThreadBudget()
+        # Icons decoded and resized once, shared by every screen
+        self.icons = {}
+        # RSS (and traced allocations with OCR_MEMORY_TRACE=1) after every job
+        self.memory = MemoryTracker()
+        # Small pool for the independent output writers of a job
+        self.output_pool = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="ocr-output"
+        )
         # Remove loading_status and loading screen
         self.setup_ui()
         self.preload_engines_with_progress()
@@ -118,19 +171,23 @@ class OCRApp:
             self.loading_progress["value"] = idx - 1
             self.root.update()
             try:
-                if engine == "PaddleOCR":
-                    from OCR_Modules.paddleOCR import \
-                        initialize_ocr_SLANet_LCNetV2
-
-                    self.ocr_models[engine] = initialize_ocr_SLANet_LCNetV2()
-                elif engine == "Tesseract":
-                    from OCR_Modules.tesseractOCR import initialize_tesseract
-
-                    self.ocr_models[engine] = initialize_tesseract(get_tessbin_path())
-                elif engine == "EasyOCR":
-                    from OCR_Modules.easyOCR import initialize_easyocr
-
-                    self.ocr_models[engine] = initialize_easyocr()
+                # Engines with a fixed thread count are built for one job's share
+                self.ocr_models[engine] = load_engine(
+                    engine,
+                    num_threads=self.thread_budget.share,
+                )
+                self.language_models[engine] = LanguageModels(
+                    engine,
+                    self.ocr_models[engine],
+                    lambda language, engine=engine: load_engine(
+                        engine,
+                        num_threads=self.thread_budget.share,
+                        language=language,
+                    ),
+                )
+            except EngineUnavailable as e:
+                # Optional backend whose models have not been exported
+                logger.info(f"{engine} not loaded: {e}")
             except Exception as e:
                 logger.error(f"Error preloading {engine}: {str(e)}", exc_info=True)
                 errors.append(f"{engine}: {str(e)}")
@@ -146,6 +203,27 @@ class OCRApp:
         self.status_label.config(
             text="OCR engines loaded successfully. You can now upload an image."
         )
+        # First inference is much slower than later ones; pay for it now
+        threading.Thread(
+            target=self.warm_up_engines, name="engine-warmup", daemon=True
+        ).start()
+
+    def warm_up_engines(self):
+        from OCR_Modules.warmup import warm_up
+
+        for engine, ocr in self.ocr_models.items():
+            if ocr is None:
+                continue
+            try:
+                warm_up(engine, lambda image, engine=engine: self.ocr_array(engine, image))
+                # Persist optimized models so later launches start warm
+                module = self.get_engine_module(engine)
+                if hasattr(module, "cache_artifacts"):
+                    with engine_lease(self.thread_budget, engine, module, ocr):
+                        module.cache_artifacts(ocr)
+            except Exception as e:
+                logger.warning(f"{engine} warm-up failed: {e}", exc_info=True)
+        logger.info("Engine warm-up finished.")
 
     def setup_ui(self):
         # Main frame
@@ -157,16 +235,12 @@ class OCRApp:
         self.center_frame.pack(expand=True)
 
         # Logo
-        logo_img = Image.open(resource_path("icons/icon.png"))
-        logo_img = logo_img.resize((100, 100), Image.LANCZOS)
-        self.logo_photo = ImageTk.PhotoImage(logo_img)
+        self.logo_photo = self.icon("icon.png", 100)
         self.logo_label = ttk.Label(self.center_frame, image=self.logo_photo)
         self.logo_label.pack(pady=(20, 10))
 
         # Output Directory Selection
-        folder_icon = Image.open(resource_path("icons/folder.png"))
-        folder_icon = folder_icon.resize((20, 20), Image.LANCZOS)
-        self.folder_icon_photo = ImageTk.PhotoImage(folder_icon)
+        self.folder_icon_photo = self.icon("folder.png", 20)
         output_dir_button = ttk.Button(
             self.center_frame,
             text="Select Output Directory",
@@ -182,7 +256,7 @@ class OCRApp:
         ocr_dropdown = ttk.Combobox(
             self.center_frame, textvariable=self.ocr_engine, state="readonly", width=30
         )
-        ocr_dropdown["values"] = ("PaddleOCR", "Tesseract", "EasyOCR")
+        ocr_dropdown["values"] = tuple(self.ocr_models) + ("Cascade",)
         ocr_dropdown.pack(pady=(0, 20))
 
         # Confidence Thresholds
@@ -219,10 +293,39 @@ class OCRApp:
         yellow_dropdown.grid(row=1, column=1, padx=5, pady=5)
         yellow_dropdown.bind("<<ComboboxSelected>>", self.update_thresholds)
 
+        # Output Formats
+        formats_frame = ttk.Frame(self.center_frame)
+        formats_frame.pack(pady=(0, 20))
+        formats_label = ttk.Label(formats_frame, text="Output Formats:")
+        formats_label.pack(side=tk.LEFT, padx=5)
+        for name, label in (
+            ("xlsx", "Excel"),
+            ("csv", "CSV"),
+            ("jsonl", "JSON Lines"),
+            ("parquet", "Parquet"),
+        ):
+            ttk.Checkbutton(
+                formats_frame, text=label, variable=self.output_formats[name]
+            ).pack(side=tk.LEFT, padx=5)
+
+        # Shared detection stage
+        shared_detection_check = ttk.Checkbutton(
+            self.center_frame,
+            text="Detect text once, re-run only recognition when switching engines",
+            variable=self.shared_detection,
+        )
+        shared_detection_check.pack(pady=(0, 10))
+
+        # Lexicon post-correction
+        lexicon_check = ttk.Checkbutton(
+            self.center_frame,
+            text="Correct low-confidence medical terms and numbers",
+            variable=self.lexicon_correction,
+        )
+        lexicon_check.pack(pady=(0, 20))
+
         # Upload Button
-        upload_icon = Image.open(resource_path("icons/upload.png"))
-        upload_icon = upload_icon.resize((20, 20), Image.LANCZOS)
-        self.upload_icon_photo = ImageTk.PhotoImage(upload_icon)
+        self.upload_icon_photo = self.icon("upload.png", 20)
         self.upload_button = ttk.Button(
             self.center_frame,
             text="Upload Image",
@@ -234,9 +337,7 @@ class OCRApp:
         self.upload_button.pack(pady=(0, 10))
 
         # Screenshot Button
-        screenshot_icon = Image.open(resource_path("icons/screenshot.png"))
-        screenshot_icon = screenshot_icon.resize((20, 20), Image.LANCZOS)
-        self.screenshot_icon_photo = ImageTk.PhotoImage(screenshot_icon)
+        self.screenshot_icon_photo = self.icon("screenshot.png", 20)
         self.screenshot_button = ttk.Button(
             self.center_frame,
             text="Screenshot",
@@ -245,7 +346,16 @@ class OCRApp:
             command=self.take_screenshot,
             width=20,
         )
-        self.screenshot_button.pack(pady=(0, 20))
+        self.screenshot_button.pack(pady=(0, 10))
+
+        # History of processed documents
+        self.history_button = ttk.Button(
+            self.center_frame,
+            text="Search History",
+            command=self.open_history,
+            width=20,
+        )
+        self.history_button.pack(pady=(0, 20))
 
         # Status Label
         self.status_label = ttk.Label(self.center_frame, text="")
@@ -264,6 +374,14 @@ class OCRApp:
             length=300,  # Explicit length for better macOS visibility
         )
 
+    def icon(self, name, size):
+        photo = self.icons.get((name, size))
+        if photo is None:
+            image = Image.open(resource_path(os.path.join("icons", name)))
+            photo = ImageTk.PhotoImage(image.resize((size, size), Image.LANCZOS))
+            self.icons[(name, size)] = photo
+        return photo
+
     def select_output_directory(self):
         try:
             directory = filedialog.askdirectory()
@@ -284,6 +402,274 @@ class OCRApp:
         if self.green_threshold.get() < self.yellow_threshold.get():
             self.yellow_threshold.set(self.green_threshold.get())
 
+        # Re-colour the displayed result in place
+        if self.last_job and self.middle_frame.winfo_ismapped():
+            self.reapply_thresholds()
+
+    def remember_job(
+        self,
+        file_path,
+        layout,
+        rows,
+        output_base,
+        output_image_path,
+        image,
+    ):
+        self.last_job = {
+            "job_id": JOB_ID.get(),
+            "engine": ENGINE.get(),
+            "timings": job_timings(),
+            "file_path": file_path,
+            "image": image,  # Decoded once, reused for overlays and region re-OCR
+            "overlay": None,
+            "tokens": layout["tokens"],
+            "layout": layout,
+            "rows": rows,
+            "output_base": output_base,
+            "outputs": {},
+            "output_image_path": output_image_path,
+            "tokens_path": None,
+        }
+
+    def output_settings(self):
+        # Read the Tk variables up front so output tasks never touch them
+        formats = [name for name, var in self.output_formats.items() if var.get()]
+        green_thresh = self.green_threshold.get() / 100.0
+        yellow_thresh = self.yellow_threshold.get() / 100.0
+        return formats or ["xlsx"], green_thresh, yellow_thresh
+
+    def save_tokens_sidecar(self, job):
+        # Keep the tokens on disk next to the outputs as well
+        tokens_path = job["output_base"] + "_tokens.npz"
+        try:
+            job["tokens"].save_npz(tokens_path)
+            job["tokens_path"] = tokens_path
+        except Exception as e:
+            logger.warning(f"Could not save token sidecar {tokens_path}: {e}")
+
+    def record_history(self, job):
+        from OCR_Modules.history import History
+
+        # Re-running outputs for the same job replaces its entry
+        if self.history is None:
+            self.history = History()
+        self.history.record(
+            job["layout"],
+            job["file_path"],
+            job["engine"],
+            job_id=job["job_id"],
+            output_base=job["output_base"],
+            timings=job["timings"],
+        )
+
+    def open_history(self):
+        from OCR_Modules.history import History
+
+        if self.history is None:
+            self.history = History()
+
+        dialog = ttk.Toplevel(self.root)
+        dialog.title("Search History")
+        dialog.transient(self.root)
+        dialog.geometry("900x500")
+
+        text = tk.StringVar()
+        below = tk.StringVar()
+        above = tk.StringVar()
+        engine = tk.StringVar(value="All")
+
+        form = ttk.Frame(dialog, padding=10)
+        form.pack(fill="x")
+        ttk.Label(form, text="Text:").grid(row=0, column=0, padx=5, sticky="e")
+        text_entry = ttk.Entry(form, textvariable=text, width=25)
+        text_entry.grid(row=0, column=1, padx=5)
+        ttk.Label(form, text="Value below:").grid(row=0, column=2, padx=5, sticky="e")
+        ttk.Entry(form, textvariable=below, width=8).grid(row=0, column=3, padx=5)
+        ttk.Label(form, text="above:").grid(row=0, column=4, padx=5, sticky="e")
+        ttk.Entry(form, textvariable=above, width=8).grid(row=0, column=5, padx=5)
+        ttk.Label(form, text="Engine:").grid(row=0, column=6, padx=5, sticky="e")
+        ttk.Combobox(
+            form,
+            textvariable=engine,
+            values=["All"] + list(self.ocr_models) + ["Cascade"],
+            state="readonly",
+            width=14,
+        ).grid(row=0, column=7, padx=5)
+
+        columns = ("date", "engine", "source", "row")
+        tree = ttk.Treeview(dialog, columns=columns, show="headings")
+        for column, heading, width in (
+            ("date", "Date", 130),
+            ("engine", "Engine", 100),
+            ("source", "Source", 300),
+            ("row", "Matched row", 340),
+        ):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor="w")
+        tree.pack(fill="both", expand=True, padx=10)
+        status = ttk.Label(dialog, text="")
+        status.pack(pady=5)
+        results = {}
+
+        def number(var):
+            value = var.get().strip().replace(",", ".")
+            return float(value) if value else None
+
+        def search(event=None):
+            try:
+                found = self.history.search(
+                    text.get().strip() or None,
+                    below=number(below),
+                    above=number(above),
+                    engine=None if engine.get() == "All" else engine.get(),
+                )
+            except ValueError:
+                status.config(text="Values must be numbers.")
+                return
+            tree.delete(*tree.get_children())
+            results.clear()
+            for result in found:
+                created = time.strftime("%Y-%m-%d %H:%M", time.localtime(result["created"]))
+                item = tree.insert(
+                    "",
+                    "end",
+                    values=(created, result["engine"], result["source"], result["row_text"] or ""),
+                )
+                results[item] = result
+            status.config(text=f"{len(found)} document(s). Double-click to open the Excel output.")
+
+        def open_result(event):
+            item = tree.focus()
+            if item not in results:
+                return
+            result = results[item]
+            xlsx = (result["output_base"] or "") + ".xlsx"
+            path = xlsx if os.path.exists(xlsx) else result["source"]
+            if not os.path.exists(path):
+                status.config(text=f"{path} no longer exists.")
+                return
+            open_file(path)
+
+        ttk.Button(form, text="Search", command=search).grid(row=0, column=8, padx=5)
+        text_entry.bind("<Return>", search)
+        tree.bind("<Double-1>", open_result)
+        text_entry.focus_set()
+        search()
+
+    def on_ui_thread(self, func, *args):
+        if threading.current_thread() is threading.main_thread():
+            func(*args)
+        else:
+            self.root.after(0, func, *args)
+
+    def run_output_stage(self, draw_image=True, record=True):
+        from OCR_Modules.writers import write_outputs
+
+        # The output files and the annotated image are independent: produce
+        # them in parallel and show each one as soon as it is ready
+        job = self.last_job
+        formats, green_thresh, yellow_thresh = self.output_settings()
+        start = time.perf_counter()
+
+        tasks = {
+            "outputs": (
+                write_outputs,
+                (formats, job["rows"], job["output_base"], green_thresh, yellow_thresh),
+                {"layout": job["layout"]},
+            ),
+        }
+        if record:
+            # New tokens only: a threshold change leaves both as they are
+            tasks["tokens"] = (self.save_tokens_sidecar, (job,), {})
+            tasks["history"] = (self.record_history, (job,), {})
+        if draw_image:
+            # Only the display-sized overlay is rendered here; the full
+            # resolution image is exported on request
+            panel_size = (
+                max(self.left_frame.winfo_width(), 400),
+                max(self.left_frame.winfo_height(), 400),
+            )
+            tasks["image"] = (self.prepare_overlay, (job, panel_size), {})
+
+        self.on_ui_thread(self.show_result_layout, draw_image)
+        # The grid view draws from the in-memory rows, no task needed
+        self.on_ui_thread(self.show_grid_panel, green_thresh, yellow_thresh)
+        pending = set(tasks)
+
+        def on_done(name, future):
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            pending.discard(name)
+            try:
+                result = future.result()
+                logger.info(f"Output task '{name}' finished after {elapsed_ms:.1f} ms")
+                if name == "outputs":
+                    job["outputs"] = result
+                    message = f"Output saved: {', '.join(result.values())}"
+                    if job.get("note"):
+                        message += f"\n{job['note']}"
+                    self.status_label.config(text=message)
+                elif name == "image" and job is self.last_job:
+                    self.show_image_panel()
+            except Exception as e:
+                logger.error(f"Output task '{name}' failed: {e}", exc_info=True)
+                self.status_label.config(
+                    text=f"Error writing output. {e}\nCheck log for details."
+                )
+            if not pending:
+                logger.info(f"Output stage finished in {elapsed_ms:.1f} ms")
+                warning = self.memory.record(job["job_id"])
+                if warning:
+                    self.status_label.config(
+                        text=self.status_label.cget("text") + f"\n{warning}"
+                    )
+
+        for name, (func, args, kwargs) in tasks.items():
+            # Each task runs in a copy of this thread's job context
+            context = contextvars.copy_context()
+            future = self.output_pool.submit(
+                context.run, run_in_stage, name, func, *args, **kwargs
+            )
+            future.add_done_callback(
+                lambda f, name=name: self.on_ui_thread(on_done, name, f)
+            )
+
+    def prepare_overlay(self, job, panel_size):
+        from OCR_Modules.overlay import Overlay
+
+        job["overlay"] = Overlay(job["image"], job["tokens"])
+        job["overlay"].display(*panel_size)
+
+    def export_annotated_image(self):
+        # Render the full-resolution overlay only when asked for
+        job = self.last_job
+        if not job or job["overlay"] is None:
+            return
+
+        def on_done(future):
+            try:
+                future.result()
+                self.status_label.config(
+                    text=f"Image with bounding boxes saved: {job['output_image_path']}"
+                )
+                messagebox.showinfo(
+                    "Export Annotated Image",
+                    f"Saved to {job['output_image_path']}",
+                    parent=self.root,
+                )
+            except Exception as e:
+                logger.error(f"Annotated image export failed: {e}", exc_info=True)
+                messagebox.showerror(
+                    "Export Annotated Image", f"Export failed. {e}", parent=self.root
+                )
+
+        future = self.output_pool.submit(job["overlay"].export, job["output_image_path"])
+        future.add_done_callback(lambda f: self.on_ui_thread(on_done, f))
+
+    def reapply_thresholds(self):
+        # Only the fills change: rewrite outputs and recolour the grid, keep the
+        # image, the token sidecar and the history entry
+        self.run_output_stage(draw_image=False, record=False)
+
     def reset_ui(self):
         if sys.platform == "darwin":
             self.root.update_idletasks()
@@ -295,7 +681,12 @@ class OCRApp:
         self.middle_frame.pack_forget()
         self.right_frame.pack_forget()
 
-        # Clear images from frames
+        # Clear images from frames and release the last job's image,
+        # overlay renders and rows
+        self.grid_view = None
+        self.image_canvas = None
+        self.last_job = None
+        self.captured_image = None
         for widget in self.left_frame.winfo_children():
             widget.destroy()
         for widget in self.middle_frame.winfo_children():
@@ -314,7 +705,12 @@ class OCRApp:
 
     def select_image(self):
         file_path = filedialog.askopenfilename(
-            filetypes=[("Image files", ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tiff"))]
+            filetypes=[
+                (
+                    "Image files",
+                    ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tif", "*.tiff", "*.dcm", "*.dicom"),
+                )
+            ]
         )
         if file_path:
             logger.info(f"Selected image: {file_path}")
@@ -323,17 +719,24 @@ class OCRApp:
             self.process_image(file_path)
 
     def take_screenshot(self):
+        import cv2
+
         try:
             self.root.attributes("-alpha", 0.0)
             self.root.update_idletasks()
             self.root.update()
 
-            screenshot = capture_screenshot(root_win=self.root)
-
-            self.root.attributes("-alpha", 1.0)
-            self.root.focus_force()
-            self.root.lift()
+            try:
+                screenshot = capture_screenshot(root_win=self.root)
+            finally:
+                self.root.attributes("-alpha", 1.0)
+                self.root.focus_force()
+                self.root.lift()
+            captured = time.perf_counter()
             self.reset_ui()
+            if screenshot is None:
+                self.status_label.config(text="Screenshot cancelled.")
+                return
 
             # Determine the output directory
             if self.output_directory:
@@ -348,10 +751,11 @@ class OCRApp:
             # Save the screenshot image
             base_filename = "screenshot"
             screenshot_path = os.path.join(output_dir, base_filename + ".png")
-            screenshot.save(screenshot_path)
+            cv2.imwrite(screenshot_path, screenshot)
 
-            # Process the image
+            # Process the image; the capture is handed over already decoded
             self.is_screenshot = True  # Indicate that this is a screenshot
+            self.captured_image = (screenshot_path, screenshot, captured)
             self.process_image(screenshot_path)
         except Exception as e:
             logger.error(f"Screenshot failed: {e}", exc_info=True)
@@ -398,14 +802,12 @@ class OCRApp:
             ocr_engine = self.ocr_engine.get()
             self.loading_status.set("Processing image, please wait...")
             self.root.update()
-            if ocr_engine == "PaddleOCR":
-                self.process_with_paddleocr(file_path)
-            elif ocr_engine == "Tesseract":
-                self.process_with_tesseract(file_path)
-            elif ocr_engine == "EasyOCR":
-                self.process_with_easyocr(file_path)
+            if is_multi_frame(file_path):
+                self.process_frames(ocr_engine, file_path)
             else:
-                raise ValueError("Please select an OCR engine.")
+                with job_context(ocr_engine) as job_id:
+                    logger.info(f"Job {job_id}: {file_path} with {ocr_engine}")
+                    self.process_with_engine(ocr_engine, file_path)
         except Exception as e:
             logger.error(f"Error processing image: {str(e)}", exc_info=True)
             self.status_label.config(
@@ -418,72 +820,19 @@ class OCRApp:
                 self.loading_frame.destroy()
             self.root.update()
 
-    def process_with_paddleocr(self, file_path):
-        from OCR_Modules.paddleOCR import \
-            draw_bounding_boxes as paddle_draw_bounding_boxes
-        from OCR_Modules.paddleOCR import \
-            group_into_rows as paddle_group_into_rows
-        from OCR_Modules.paddleOCR import process_image as paddle_process_image
-        from OCR_Modules.paddleOCR import save_as_xlsx as paddle_save_as_xlsx
-
-        data = paddle_process_image(file_path, self.ocr_models["PaddleOCR"])
-
-        if not data:
-            raise ValueError("No data extracted from image.")
-
-        # Group data into rows
-        rows = paddle_group_into_rows(data)
-
-        if not rows:
-            raise ValueError("No rows extracted from image.")
-
-        # Determine the output directory
-        if self.output_directory:
-            output_dir = self.output_directory
-        else:
-            if self.is_screenshot:
-                # For screenshots, default to Desktop
-                output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
-            else:
-                # For uploaded images, use the same directory as the image
-                output_dir = os.path.dirname(file_path)
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
-        # Create the output filenames
-        base_filename = os.path.splitext(os.path.basename(file_path))[0]
-        output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
-        output_image_path = os.path.join(
-            output_dir, base_filename + "_output_image.jpg"
-        )
-
-        # Get thresholds from dropdowns
-        green_thresh = self.green_threshold.get() / 100.0
-        yellow_thresh = self.yellow_threshold.get() / 100.0
-
-        paddle_save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
-
-        paddle_draw_bounding_boxes(file_path, data, output_image_path)
-
-        self.status_label.config(text=f"Excel file saved: {output_xlsx}")
-        self.display_results(output_image_path, output_xlsx)
-
-    def process_with_tesseract(self, file_path):
+    def process_with_engine(self, ocr_engine, file_path):
+        if ocr_engine not in self.ocr_models and ocr_engine != "Cascade":
+            raise ValueError("Please select an OCR engine.")
+        # One body for every engine, Cascade and Replay included
         try:
-            from OCR_Modules.tesseractOCR import \
-                draw_bounding_boxes as tesseract_draw_bounding_boxes
-            from OCR_Modules.tesseractOCR import \
-                group_into_rows as tesseract_group_into_rows
-            from OCR_Modules.tesseractOCR import \
-                process_image as tesseract_process_image
-            from OCR_Modules.tesseractOCR import \
-                save_as_xlsx as tesseract_save_as_xlsx
-
-            data = tesseract_process_image(file_path, self.ocr_models["Tesseract"])
+            data, image = self.run_ocr(ocr_engine, file_path)
 
             if not data:
                 raise ValueError("No data extracted from image.")
 
-            rows = tesseract_group_into_rows(data)
+            # Group data into a table, keeping empty cells in place
+            layout = build_layout(data)
+            rows = layout_to_grid(layout)
 
             if not rows:
                 raise ValueError("No rows extracted from data.")
@@ -502,135 +851,388 @@ class OCRApp:
             os.makedirs(output_dir, exist_ok=True)
             # Create the output filenames
             base_filename = os.path.splitext(os.path.basename(file_path))[0]
-            output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
-            output_image_path = os.path.join(
-                output_dir, base_filename + "_output_image.jpg"
+            output_base = os.path.join(output_dir, base_filename + "_output")
+            output_image_path = output_base + "_image.jpg"
+
+            self.remember_job(
+                file_path,
+                layout,
+                rows,
+                output_base,
+                output_image_path,
+                image,
             )
+            if ocr_engine == "Cascade":
+                # Per-tier statistics are shown with the saved outputs
+                self.last_job["note"] = format_stats(self.last_cascade_stats)
 
-            # Get thresholds from dropdowns
-            green_thresh = self.green_threshold.get() / 100.0
-            yellow_thresh = self.yellow_threshold.get() / 100.0
-
-            tesseract_save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
-
-            tesseract_draw_bounding_boxes(file_path, data, output_image_path)
-
-            self.status_label.config(text=f"Excel file saved: {output_xlsx}")
-            self.display_results(output_image_path, output_xlsx)
+            # Write outputs, annotated image and preview in parallel
+            self.run_output_stage()
         except ValueError as ve:
-            logger.error(f"Tesseract processing error: {str(ve)}", exc_info=True)
+            logger.error(f"{ocr_engine} processing error: {str(ve)}", exc_info=True)
             self.status_label.config(
                 text=f"Error: {str(ve)}\nPlease try a different image or OCR engine."
             )
         except Exception as e:
             logger.error(
-                f"Unexpected error in Tesseract processing: {str(e)}", exc_info=True
+                f"Unexpected error in {ocr_engine} processing: {str(e)}", exc_info=True
             )
             self.status_label.config(
                 text=f"Unexpected error: {str(e)}\nPlease try a different image or OCR engine."
             )
 
-    def process_with_easyocr(self, file_path):
-        try:
-            from OCR_Modules.easyOCR import \
-                draw_bounding_boxes as easyocr_draw_bounding_boxes
-            from OCR_Modules.easyOCR import \
-                group_into_rows as easyocr_group_into_rows
-            from OCR_Modules.easyOCR import \
-                process_image as easyocr_process_image
-            from OCR_Modules.easyOCR import \
-                save_as_xlsx as easyocr_save_as_xlsx
+    def process_frames(self, ocr_engine, file_path):
+        from OCR_Modules.frames import frame_path, iter_frames
+
+        # One job per frame of a TIFF/DICOM file, decoded only when its turn
+        # comes; outputs are named after the frame (scan_frame02_output.xlsx)
+        for index, count, image in iter_frames(file_path):
+            path = frame_path(file_path, index, count)
+            if count > 1:
+                self.loading_status.set(f"Processing frame {index + 1} of {count}...")
+            with job_context(ocr_engine) as job_id:
+                logger.info(
+                    f"Job {job_id}: frame {index + 1} of {count} of {file_path} with {ocr_engine}"
+                )
+                # Handed over already decoded, like a screen capture
+                self.captured_image = (path, image, None)
+                self.process_with_engine(ocr_engine, path)
 
-            data = easyocr_process_image(file_path, self.ocr_models["EasyOCR"])
+    def show_result_layout(self, draw_image=True):
+        try:
+            if draw_image:
+                self.reorganize_layout()
+                # Clear the previous image and show a placeholder until it is ready
+                self.image_canvas = None
+                for widget in self.left_frame.winfo_children():
+                    widget.destroy()
+                ttk.Label(self.left_frame, text="Rendering...").pack(expand=True)
+            for widget in self.right_frame.winfo_children():
+                widget.destroy()
 
-            if not data:
-                raise ValueError("No data extracted from image.")
+            # Setup the sidebar
+            self.setup_sidebar()
+        except Exception as e:
+            logger.error(f"Results display failed: {e}", exc_info=True)
+            self.status_label.config(
+                text=f"Error displaying results. {e}\nCheck log for details."
+            )
 
-            rows = easyocr_group_into_rows(data)
+    def show_image_panel(self):
+        # Display image with bounding boxes; drag on it to re-OCR a region
+        for widget in self.left_frame.winfo_children():
+            widget.destroy()
+        image_canvas = self.display_overlay(self.last_job["overlay"], self.left_frame)
+        if image_canvas is not None:
+            self.enable_region_selection(image_canvas)
+            # Drawn once the canvas is laid out and its scale known
+            if self.grid_view is not None:
+                image_canvas.highlight = self.grid_view.selected
+        self.image_canvas = image_canvas
+
+    def show_grid_panel(self, green_thresh, yellow_thresh):
+        from grid_view import GridView
+
+        job = self.last_job
+        if self.grid_view is not None and self.grid_view.rows is job["rows"]:
+            # Same rows, new thresholds: only the visible fills change
+            self.grid_view.set_thresholds(green_thresh, yellow_thresh)
+            return
 
-            if not rows:
-                raise ValueError("No rows extracted from data.")
+        for widget in self.middle_frame.winfo_children():
+            widget.destroy()
+        # Cell rectangles in image pixels, for highlighting the source of a cell
+        job["cell_boxes"] = None
+        self.grid_view = GridView(
+            self.middle_frame,
+            job["rows"],
+            green_thresh,
+            yellow_thresh,
+            on_cell=self.highlight_cell,
+        )
+        self.grid_view.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
-            # Determine the output directory
-            if self.output_directory:
-                output_dir = self.output_directory
-            else:
-                if self.is_screenshot:
-                    # For screenshots, default to Desktop
-                    output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
-                else:
-                    # For uploaded images, use the same directory as the image
-                    output_dir = os.path.dirname(file_path)
-            # Ensure output directory exists
-            os.makedirs(output_dir, exist_ok=True)
-            # Create the output filenames
-            base_filename = os.path.splitext(os.path.basename(file_path))[0]
-            output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
-            output_image_path = os.path.join(
-                output_dir, base_filename + "_output_image.jpg"
-            )
+    def highlight_cell(self, row, col):
+        # Outline the source box of a grid cell on the image panel
+        canvas = self.image_canvas
+        if canvas is None or not canvas.winfo_exists():
+            return
+        canvas.delete("cell_highlight")
+        canvas.highlight = None
+        if row is None or not hasattr(canvas, "view"):
+            return
 
-            # Get thresholds from dropdowns
-            green_thresh = self.green_threshold.get() / 100.0
-            yellow_thresh = self.yellow_threshold.get() / 100.0
+        from OCR_Modules.grid import cell_boxes
 
-            easyocr_save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
+        job = self.last_job
+        if job.get("cell_boxes") is None:
+            job["cell_boxes"] = cell_boxes(job["layout"])
+        box = job["cell_boxes"][row][col]
+        if box is None:
+            return
+        canvas.highlight = (row, col)
+        scale, offset_x, offset_y = canvas.view
+        x1, y1, x2, y2 = box
+        canvas.create_rectangle(
+            x1 * scale + offset_x - 2,
+            y1 * scale + offset_y - 2,
+            x2 * scale + offset_x + 2,
+            y2 * scale + offset_y + 2,
+            outline="#1E64C8",
+            width=3,
+            tags="cell_highlight",
+        )
 
-            easyocr_draw_bounding_boxes(file_path, data, output_image_path)
+    def enable_region_selection(self, canvas):
+        selection = {"start": None, "rect": None}
 
-            self.status_label.config(text=f"Excel file saved: {output_xlsx}")
-            self.display_results(output_image_path, output_xlsx)
-        except ValueError as ve:
-            logger.error(f"EasyOCR processing error: {str(ve)}", exc_info=True)
-            self.status_label.config(
-                text=f"Error: {str(ve)}\nPlease try a different image or OCR engine."
-            )
-        except Exception as e:
-            logger.error(
-                f"Unexpected error in EasyOCR processing: {str(e)}", exc_info=True
+        def on_press(event):
+            selection["start"] = (event.x, event.y)
+            selection["rect"] = canvas.create_rectangle(
+                event.x, event.y, event.x, event.y, outline="red", width=2
             )
-            self.status_label.config(
-                text=f"Unexpected error: {str(e)}\nPlease try a different image or OCR engine."
+
+        def on_drag(event):
+            if selection["rect"] is not None:
+                x0, y0 = selection["start"]
+                canvas.coords(selection["rect"], x0, y0, event.x, event.y)
+
+        def on_release(event):
+            if selection["rect"] is None or not hasattr(canvas, "view"):
+                return
+            (x0, y0), rect = selection["start"], selection["rect"]
+            selection["rect"] = None
+            if abs(event.x - x0) < 5 or abs(event.y - y0) < 5:
+                canvas.delete(rect)
+                return
+
+            # Map the canvas rectangle back to full-resolution image pixels
+            scale, offset_x, offset_y = canvas.view
+            region = (
+                (min(x0, event.x) - offset_x) / scale,
+                (min(y0, event.y) - offset_y) / scale,
+                (max(x0, event.x) - offset_x) / scale,
+                (max(y0, event.y) - offset_y) / scale,
             )
+            self.ask_region_options(region, lambda: canvas.delete(rect))
+
+        canvas.bind("<ButtonPress-1>", on_press)
+        canvas.bind("<B1-Motion>", on_drag)
+        canvas.bind("<ButtonRelease-1>", on_release)
+
+    def ask_region_options(self, region, on_close):
+        from OCR_Modules.roi import PREPROCESSING
+
+        dialog = ttk.Toplevel(self.root)
+        dialog.title("Re-OCR Region")
+        dialog.transient(self.root)
+
+        loaded = [name for name, model in self.ocr_models.items() if model is not None]
+        selected = self.ocr_engine.get()
+        # Cascade is not a single engine: default to its most accurate tier
+        if selected not in loaded and loaded:
+            selected = (cascade_tiers(loaded) or loaded)[-1]
+        engine = tk.StringVar(value=selected)
+        preprocessing = tk.StringVar(value="None")
+
+        ttk.Label(dialog, text="OCR Engine:").grid(row=0, column=0, padx=10, pady=5, sticky="e")
+        ttk.Combobox(
+            dialog,
+            textvariable=engine,
+            values=loaded,
+            state="readonly",
+            width=20,
+        ).grid(row=0, column=1, padx=10, pady=5)
+        ttk.Label(dialog, text="Preprocessing:").grid(row=1, column=0, padx=10, pady=5, sticky="e")
+        ttk.Combobox(
+            dialog,
+            textvariable=preprocessing,
+            values=list(PREPROCESSING),
+            state="readonly",
+            width=20,
+        ).grid(row=1, column=1, padx=10, pady=5)
+
+        def close():
+            on_close()
+            dialog.destroy()
+
+        def run():
+            close()
+            self.reocr_region(region, engine.get(), preprocessing.get())
 
-    def display_results(self, image_path, excel_path):
+        ttk.Button(dialog, text="Re-OCR", command=run).grid(row=2, column=1, padx=10, pady=10, sticky="e")
+        ttk.Button(dialog, text="Cancel", command=close).grid(row=2, column=0, padx=10, pady=10, sticky="w")
+        dialog.protocol("WM_DELETE_WINDOW", close)
+
+    def reocr_region(self, region, engine, preprocessing):
+        # Use main thread for macOS UI operations
         if sys.platform == "darwin":
-            self.root.after(0, self._safe_display_results, image_path, excel_path)
+            self.root.after(0, self._reocr_region_thread, region, engine, preprocessing)
         else:
-            self._safe_display_results(image_path, excel_path)
+            threading.Thread(
+                target=self._reocr_region_thread, args=(region, engine, preprocessing)
+            ).start()
 
-    def _safe_display_results(self, image_path, excel_path):
-        try:
-            self.reorganize_layout()
+    def _reocr_region_thread(self, region, engine, preprocessing):
+        with job_context(engine):
+            self._reocr_region(region, engine, preprocessing)
 
-            # Clear previous images
-            for widget in self.left_frame.winfo_children():
-                widget.destroy()
-            for widget in self.middle_frame.winfo_children():
-                widget.destroy()
-            for widget in self.right_frame.winfo_children():
-                widget.destroy()
+    def _reocr_region(self, region, engine, preprocessing):
+        try:
+            from OCR_Modules.roi import ocr_region
+
+            job = self.last_job
+            if self.ocr_models.get(engine) is None:
+                raise ValueError(f"{engine} is not loaded.")
+            new_tokens, region = ocr_region(
+                job["image"],
+                region,
+                lambda crop, ocr: self.ocr_array(engine, crop),
+                self.ocr_models[engine],
+                preprocessing,
+            )
+            new_tokens = self.apply_lexicon(new_tokens)
+
+            # Replace the tokens inside the region and regenerate only its rows
+            layout, first, removed, band_rows = update_region(job["layout"], new_tokens, region)
+            job["layout"] = layout
+            job["tokens"] = layout["tokens"]
+            job["rows"] = job["rows"][:first] + band_rows + job["rows"][first + removed :]
+            self.run_output_stage()
+        except Exception as e:
+            logger.error(f"Region re-OCR failed: {e}", exc_info=True)
+            message = f"Region re-OCR failed. {e}"
+            self.root.after(
+                0,
+                lambda: messagebox.showerror("Re-OCR Region", message, parent=self.root),
+            )
 
-            # Display image with bounding boxes
-            self.display_image(image_path, self.left_frame)
+    def run_ocr(self, engine, file_path):
+        import cv2
 
-            # Display Excel image
-            excel_image_path = os.path.splitext(excel_path)[0] + "_excel_image.png"
-            self.generate_excel_image(excel_path, excel_image_path)
+        # Decode once; the image is kept for the overlay and region re-OCR.
+        # A fresh screen capture is used as is.
+        captured, self.captured_image = self.captured_image, None
+        if captured is not None and captured[0] == file_path:
+            _, image, captured_at = captured
+        else:
+            image = cv2.imread(file_path)
+            captured_at = None
+        if image is None:
+            raise ValueError("Could not open image!")
+
+        shared = self.shared_detection.get()
+        if engine == "Cascade":
+            with stage("ocr"):
+                data = self.run_cascade(image, shared)
+            return self.apply_lexicon(data), image
+        if not self.is_screenshot:
+            with stage("ocr"):
+                data = self.ocr_array(engine, image, shared=shared)
+            return self.apply_lexicon(data), image
+
+        from OCR_Modules.dedup import ScreenshotCache
+
+        # Near-identical snips reuse the tokens of a recent one
+        if self.screenshot_cache is None:
+            self.screenshot_cache = ScreenshotCache()
+        data = self.screenshot_cache.lookup(image, engine)
+        if data is None:
+            with stage("ocr"):
+                data = self.ocr_array(engine, image, shared=shared)
+            self.screenshot_cache.add(image, engine, data)
+        data = self.apply_lexicon(data)
+        if captured_at is not None:
+            latency_ms = (time.perf_counter() - captured_at) * 1000
+            logger.info(
+                f"Capture to OCR result: {latency_ms:.0f} ms",
+                extra={"duration_ms": round(latency_ms, 1)},
+            )
+        return data, image
 
-            # Add padding to the middle frame
-            padding_frame = ttk.Frame(self.middle_frame, padding=20)
-            padding_frame.pack(fill=tk.BOTH, expand=True)
-            self.display_image(excel_image_path, padding_frame)
+    def apply_lexicon(self, data):
+        # Raw engine tokens stay in the caches; corrections are applied on top
+        if not self.lexicon_correction.get():
+            return data
+        from OCR_Modules.lexicon import Lexicon, correct_tokens
 
-            # Setup the sidebar
-            self.setup_sidebar()
-        except Exception as e:
-            logger.error(f"Results display failed: {e}", exc_info=True)
-            self.status_label.config(
-                text=f"Error displaying results. {e}\nCheck log for details."
+        if self.lexicon is None:
+            path = os.getenv("OCR_LEXICON") or resource_path("lexicon/medical.txt")
+            try:
+                self.lexicon = Lexicon.load(path)
+            except OSError as e:
+                logger.warning(f"Lexicon correction disabled, could not read {path}: {e}")
+                self.lexicon_correction.set(False)
+                return data
+        with stage("lexicon"):
+            return correct_tokens(
+                as_tokens(data), self.lexicon, self.yellow_threshold.get() / 100.0
             )
 
+    def ocr_array(self, engine, image, threads=None, shared=False):
+        # Every engine call runs under a lease from the thread budget
+        module = self.get_engine_module(engine)
+        if self.ocr_models.get(engine) is None:
+            raise ValueError(f"{engine} is not loaded.")
+        # Read again with another language's model if the text calls for it
+        models = self.language_models[engine]
+        with engine_lease(
+            self.thread_budget, engine, module, self.ocr_models[engine], threads
+        ) as granted:
+            module.set_num_threads(granted)
+            if shared:
+                return models.run(
+                    lambda ocr: self.detect_and_recognize(engine, image, granted, ocr)
+                )
+            return models.process_array(image, module)
+
+    def recognize_array(self, engine, image, boxes, threads=None):
+        # Recognition only, for boxes found earlier
+        module = self.get_engine_module(engine)
+        ocr = self.language_models[engine].model() or self.ocr_models[engine]
+        with engine_lease(self.thread_budget, engine, module, ocr, threads) as granted:
+            module.set_num_threads(granted)
+            return recognize(image, boxes, engine, module, ocr)
+
+    def run_cascade(self, image, shared=False):
+        # Cheapest loaded engine on the whole page, weak tokens re-read by
+        # the slower ones
+        tiers = cascade_tiers(
+            [name for name, model in self.ocr_models.items() if model is not None]
+        )
+        tokens, self.last_cascade_stats = run_cascade(
+            image,
+            tiers,
+            self.yellow_threshold.get() / 100.0,
+            lambda engine, image: self.ocr_array(engine, image, shared=shared),
+            self.recognize_array,
+        )
+        return tokens
+
+    def detect_and_recognize(self, engine, image, threads=1, ocr=None):
+        # Boxes come from the best loaded detector and are cached per image,
+        # so only recognition runs with the selected engine
+        detector = next(
+            name for name in DETECTOR_PREFERENCE if self.ocr_models.get(name) is not None
+        )
+        detector_module = self.get_engine_module(detector)
+        detector_module.set_num_threads(threads)
+        boxes = self.detection_cache.boxes(
+            image,
+            detector,
+            lambda image: detector_module.detect_array(image, self.ocr_models[detector]),
+        )
+        return recognize(
+            image,
+            boxes,
+            engine,
+            self.get_engine_module(engine),
+            self.ocr_models[engine] if ocr is None else ocr,
+        )
+
+    def get_engine_module(self, engine):
+        return engine_module(engine)
+
     def reorganize_layout(self):
         if sys.platform == "darwin" and not self.root.winfo_exists():
             return
@@ -659,9 +1261,7 @@ class OCRApp:
         top_inner_frame.pack(anchor="center")
 
         # Add small logo
-        small_logo_img = Image.open(resource_path("icons/icon.png"))
-        small_logo_img = small_logo_img.resize((50, 50), Image.LANCZOS)
-        self.small_logo_photo = ImageTk.PhotoImage(small_logo_img)
+        self.small_logo_photo = self.icon("icon.png", 50)
         logo_label = ttk.Label(top_inner_frame, image=self.small_logo_photo)
         logo_label.pack(side=tk.LEFT, padx=(10, 5))
 
@@ -670,7 +1270,7 @@ class OCRApp:
         ocr_dropdown = ttk.Combobox(
             top_inner_frame, textvariable=self.ocr_engine, state="readonly", width=20
         )
-        ocr_dropdown["values"] = ("PaddleOCR", "Tesseract", "EasyOCR")
+        ocr_dropdown["values"] = tuple(self.ocr_models) + ("Cascade",)
         ocr_dropdown.pack(side=tk.LEFT, padx=(0, 10))
         upload_button = ttk.Button(
             top_inner_frame, text="Upload Image", command=self.select_image
@@ -678,11 +1278,7 @@ class OCRApp:
         upload_button.pack(side=tk.LEFT, padx=(0, 10))
 
         # Add Screenshot Button with Icon
-        screenshot_icon = Image.open(
-            resource_path(os.path.join("icons", "screenshoticon.png"))
-        )
-        screenshot_icon = screenshot_icon.resize((30, 30), Image.LANCZOS)
-        self.screenshot_icon_photo = ImageTk.PhotoImage(screenshot_icon)
+        self.screenshot_icon_photo = self.icon("screenshoticon.png", 30)
         screenshot_button = ttk.Button(
             top_inner_frame,
             image=self.screenshot_icon_photo,
@@ -691,9 +1287,7 @@ class OCRApp:
         screenshot_button.pack(side=tk.LEFT, padx=(0, 10))
 
         # Add Home Button with Icon
-        home_icon = Image.open(resource_path(os.path.join("icons", "home.png")))
-        home_icon = home_icon.resize((30, 30), Image.LANCZOS)
-        self.home_icon_photo = ImageTk.PhotoImage(home_icon)
+        self.home_icon_photo = self.icon("home.png", 30)
         home_button = ttk.Button(
             top_inner_frame, image=self.home_icon_photo, command=self.reset_ui
         )
@@ -704,111 +1298,40 @@ class OCRApp:
         self.middle_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.right_frame.pack(side=tk.RIGHT, fill=tk.Y)
 
-    def display_image(self, image_path, panel):
+    def display_overlay(self, overlay, panel):
         try:
-            image = Image.open(image_path)
-
-            # Create a canvas to display the image
+            # Create a canvas to display the overlay
             canvas = tk.Canvas(panel, bg="white")
             canvas.pack(fill=tk.BOTH, expand=True)
 
-            # Function to resize the image when the panel size changes
-            def resize_image(event):
-                # Get the size of the canvas
-                canvas_width = event.width
-                canvas_height = event.height
-
-                # Calculate the scaling factor
-                width_ratio = canvas_width / image.width
-                height_ratio = canvas_height / image.height
-                scale_factor = min(
-                    width_ratio, height_ratio, 1.0
-                )  # Do not upscale images
-
-                new_width = int(image.width * scale_factor)
-                new_height = int(image.height * scale_factor)
-
-                resized_image = image.resize((new_width, new_height), Image.LANCZOS)
-                photo = ImageTk.PhotoImage(resized_image)
+            # Re-render at display resolution when the panel size changes
+            def resize_overlay(event):
+                render, scale_factor = overlay.display(event.width, event.height)
+                photo = ImageTk.PhotoImage(Image.fromarray(render))
 
                 canvas.delete("all")
                 canvas.create_image(
-                    canvas_width / 2, canvas_height / 2, image=photo, anchor="center"
+                    event.width / 2, event.height / 2, image=photo, anchor="center"
                 )
                 canvas.image = photo  # Keep a reference
+                # Scale and offset for mapping canvas points back to the image
+                canvas.view = (
+                    scale_factor,
+                    (event.width - render.shape[1]) / 2,
+                    (event.height - render.shape[0]) / 2,
+                )
+                # The highlighted cell follows the new scale
+                if getattr(canvas, "highlight", None) is not None:
+                    self.highlight_cell(*canvas.highlight)
 
-            # Bind the resize event to the function
-            canvas.bind("<Configure>", resize_image)
+            canvas.bind("<Configure>", resize_overlay)
+            return canvas
         except Exception as e:
             logger.error(f"Image display failed: {e}", exc_info=True)
             self.status_label.config(
                 text=f"Error displaying image. {e}\nCheck log for details."
             )
 
-    def generate_excel_image(self, excel_path, output_image_path):
-        try:
-            from openpyxl import load_workbook
-            from PIL import Image, ImageDraw, ImageFont
-
-            wb = load_workbook(excel_path)
-            ws = wb.active
-
-            # Increase cell size and font size
-            cell_width = 90
-            cell_height = 30
-            font_size = 80
-            border_size = 40  # Increased border size
-
-            max_col = ws.max_column
-            max_row = ws.max_row
-            image_width = cell_width * max_col + 2 * border_size
-            image_height = cell_height * max_row + 2 * border_size
-
-            image = Image.new("RGB", (image_width, image_height), "white")
-            draw = ImageDraw.Draw(image)
-            try:
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except:
-                font = ImageFont.load_default()
-
-            for row in ws.iter_rows():
-                for cell in row:
-                    col_idx = cell.column - 1
-                    row_idx = cell.row - 1
-                    x1 = col_idx * cell_width + border_size
-                    y1 = row_idx * cell_height + border_size
-                    x2 = x1 + cell_width
-                    y2 = y1 + cell_height
-
-                    # Draw cell background
-                    fill_color = "FFFFFF"  # Default fill
-                    if cell.fill and cell.fill.fgColor:
-                        if cell.fill.fgColor.type == "rgb":
-                            fill_color = cell.fill.fgColor.rgb[-6:]
-                        elif cell.fill.fgColor.type == "indexed":
-                            fill_color = "FFFFFF"  # Handle indexed colors as white
-
-                    draw.rectangle(
-                        [x1, y1, x2, y2], fill=f"#{fill_color}", outline="black"
-                    )
-
-                    # Draw cell text
-                    text = str(cell.value) if cell.value is not None else ""
-                    bbox = font.getbbox(text)
-                    text_width = bbox[2] - bbox[0]
-                    text_height = bbox[3] - bbox[1]
-                    text_x = x1 + (cell_width - text_width) / 2
-                    text_y = y1 + (cell_height - text_height) / 2
-                    draw.text((text_x, text_y), text, fill="black", font=font)
-
-            image.save(output_image_path)
-        except Exception as e:
-            logger.error(f"Excel image generation failed: {e}", exc_info=True)
-            self.status_label.config(
-                text=f"Error generating preview. {e}\nCheck log for details."
-            )
-            raise
-
     def setup_sidebar(self):
         # Sidebar content
         sidebar_frame = ttk.Frame(self.right_frame, padding=10)
@@ -821,21 +1344,9 @@ class OCRApp:
         accuracy_label.pack(pady=(0, 10))
 
         # Icons for accuracy levels
-        green_icon = Image.open(
-            resource_path(os.path.join("icons", "green_circle.png"))
-        )
-        green_icon = green_icon.resize((20, 20), Image.LANCZOS)
-        self.green_icon_photo = ImageTk.PhotoImage(green_icon)
-
-        yellow_icon = Image.open(
-            resource_path(os.path.join("icons", "yellow_circle.png"))
-        )
-        yellow_icon = yellow_icon.resize((20, 20), Image.LANCZOS)
-        self.yellow_icon_photo = ImageTk.PhotoImage(yellow_icon)
-
-        red_icon = Image.open(resource_path(os.path.join("icons", "red_circle.png")))
-        red_icon = red_icon.resize((20, 20), Image.LANCZOS)
-        self.red_icon_photo = ImageTk.PhotoImage(red_icon)
+        self.green_icon_photo = self.icon("green_circle.png", 20)
+        self.yellow_icon_photo = self.icon("yellow_circle.png", 20)
+        self.red_icon_photo = self.icon("red_circle.png", 20)
 
         # Green Threshold Label
         green_frame = ttk.Frame(sidebar_frame)
@@ -867,6 +1378,43 @@ class OCRApp:
         )
         red_label_text.pack(side=tk.LEFT, padx=5)
 
+        # Threshold controls, re-applied to the current result without OCR
+        options = [str(i) for i in range(80, 101)]
+        thresholds_frame = ttk.Frame(sidebar_frame)
+        thresholds_frame.pack(pady=(10, 0), anchor="w")
+        ttk.Label(thresholds_frame, text="Green (> %):").grid(
+            row=0, column=0, padx=5, pady=2, sticky="e"
+        )
+        green_dropdown = ttk.Combobox(
+            thresholds_frame,
+            textvariable=self.green_threshold,
+            values=options,
+            state="readonly",
+            width=5,
+        )
+        green_dropdown.grid(row=0, column=1, padx=5, pady=2)
+        green_dropdown.bind("<<ComboboxSelected>>", self.update_thresholds)
+        ttk.Label(thresholds_frame, text="Yellow (> %):").grid(
+            row=1, column=0, padx=5, pady=2, sticky="e"
+        )
+        yellow_dropdown = ttk.Combobox(
+            thresholds_frame,
+            textvariable=self.yellow_threshold,
+            values=options,
+            state="readonly",
+            width=5,
+        )
+        yellow_dropdown.grid(row=1, column=1, padx=5, pady=2)
+        yellow_dropdown.bind("<<ComboboxSelected>>", self.update_thresholds)
+
+        # Full-resolution annotated image, rendered only on request
+        export_button = ttk.Button(
+            sidebar_frame,
+            text="Export Annotated Image",
+            command=self.export_annotated_image,
+        )
+        export_button.pack(pady=(10, 0), fill="x")
+
         # Divider
         separator = ttk.Separator(sidebar_frame, orient="horizontal")
         separator.pack(fill="x", pady=10)
@@ -876,9 +1424,7 @@ class OCRApp:
         disclaimer_frame.pack(pady=(10, 10))
 
         # Info Icon
-        info_icon = Image.open(resource_path(os.path.join("icons", "info.png")))
-        info_icon = info_icon.resize((20, 20), Image.LANCZOS)
-        self.info_icon_photo = ImageTk.PhotoImage(info_icon)
+        self.info_icon_photo = self.icon("info.png", 20)
 
         disclaimer_title_frame = ttk.Frame(disclaimer_frame)
         disclaimer_title_frame.pack(anchor="w")
@@ -895,9 +1441,10 @@ class OCRApp:
 
         # Enhanced Disclaimer Text
         disclaimer_text = (
-            "Note: When the input image contains a table with missing data in some rows or columns, "
-            "the extracted data may not align perfectly in the output Excel file. "
-            "Empty cells might cause subsequent data to shift positions, resulting in misaligned columns. "
+            "Note: Columns are inferred from the positions of the recognized text, and cells "
+            "with no text are left blank in the output Excel file. "
+            "Headers spanning several columns or unusually skewed scans may still be placed "
+            "in a neighbouring column. "
             "Please review the Excel output carefully and adjust as needed."
         )
         disclaimer_message = ttk.Label(
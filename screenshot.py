@@ -1,27 +1,60 @@
-import time
-import tkinter as tk
-import sys
+import logging
 import os
 import subprocess
+import sys
 import tempfile
+import time
+import tkinter as tk
+
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance, ImageTk
+
+logger = logging.getLogger(__name__)
+
 
+def grab_screen():
+    """Grab the primary screen once, as an (H, W, 4) BGRA array.
 
-import pyautogui
-from PIL import Image, ImageDraw, ImageEnhance, ImageTk
+    With mss installed (XShm on X11, BitBlt on Windows) the array is a view
+    of the grabbed buffer, not a copy. Otherwise Pillow's ImageGrab is used.
+    """
+    try:
+        import mss
+    except ImportError:
+        mss = None
+    if mss is not None:
+        with mss.mss() as sct:
+            shot = sct.grab(sct.monitors[1])
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+    from PIL import ImageGrab
+
+    return cv2.cvtColor(np.asarray(ImageGrab.grab()), cv2.COLOR_RGB2BGRA)
 
 
 class SnipTool(tk.Toplevel):
-    def __init__(self, parent, screenshot):
+    def __init__(self, parent, frame):
         super().__init__(parent)
         self.parent = parent
         self.attributes("-topmost", True)
         self.attributes("-fullscreen", True)
 
-        # Use the provided screenshot instead of capturing a new one
-        self.screenshot = screenshot
-        self.screen_width, self.screen_height = self.screenshot.size
-
-        # Create a darkened version of the screenshot
+        # The grabbed BGRA frame; selections are returned in its pixels
+        self.frame = frame
+        frame_height, frame_width = frame.shape[:2]
+        self.screen_width = self.winfo_screenwidth()
+        self.screen_height = self.winfo_screenheight()
+        # Frame pixels per screen pixel (above 1 on HiDPI displays)
+        self.scale_x = frame_width / self.screen_width
+        self.scale_y = frame_height / self.screen_height
+
+        # Display copy of the frame, decoded once, and its darkened version
+        self.screenshot = Image.frombuffer(
+            "RGB", (frame_width, frame_height), np.ascontiguousarray(frame), "raw", "BGRX", 0, 1
+        )
+        if self.screenshot.size != (self.screen_width, self.screen_height):
+            self.screenshot = self.screenshot.resize((self.screen_width, self.screen_height))
         self.dark_screenshot = ImageEnhance.Brightness(self.screenshot).enhance(0.3)
         self.tk_dark = ImageTk.PhotoImage(self.dark_screenshot)
 
@@ -37,6 +70,9 @@ class SnipTool(tk.Toplevel):
         self.image_on_canvas = self.canvas.create_image(
             0, 0, anchor="nw", image=self.tk_dark
         )
+        # Undimmed selection, drawn over the dark screenshot
+        self.selection_image = self.canvas.create_image(0, 0, anchor="nw")
+        self.tk_selection = None
 
         # Variables for selection
         self.start_x = None
@@ -48,6 +84,8 @@ class SnipTool(tk.Toplevel):
         self.canvas.bind("<ButtonPress-1>", self.on_button_press)
         self.canvas.bind("<B1-Motion>", self.on_mouse_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_button_release)
+        self.bind("<Escape>", lambda event: self.destroy())
+        self.focus_force()
 
     def on_button_press(self, event):
         self.start_x = event.x
@@ -62,50 +100,75 @@ class SnipTool(tk.Toplevel):
         )
 
     def on_mouse_drag(self, event):
+        if self.rect is None:
+            return
         self.canvas.coords(self.rect, self.start_x, self.start_y, event.x, event.y)
         x1 = min(self.start_x, event.x)
         y1 = min(self.start_y, event.y)
         x2 = max(self.start_x, event.x)
         y2 = max(self.start_y, event.y)
-        mask = Image.new("L", (self.screen_width, self.screen_height), 0)
-        draw = ImageDraw.Draw(mask)
-        draw.rectangle((x1, y1, x2, y2), fill=255)
-        composite = self.dark_screenshot.copy()
-        composite.paste(self.screenshot, mask=mask)
-        self.tk_composite = ImageTk.PhotoImage(composite)
-        self.canvas.itemconfig(self.image_on_canvas, image=self.tk_composite)
+        if x2 <= x1 or y2 <= y1:
+            return
+        # Only the selected area is redrawn, not the whole screen
+        self.tk_selection = ImageTk.PhotoImage(self.screenshot.crop((x1, y1, x2, y2)))
+        self.canvas.itemconfig(self.selection_image, image=self.tk_selection)
+        self.canvas.coords(self.selection_image, x1, y1)
+        self.canvas.tag_raise(self.rect)
 
     def on_button_release(self, event):
+        if self.rect is None:
+            return
         x1 = min(self.start_x, event.x)
         y1 = min(self.start_y, event.y)
         x2 = max(self.start_x, event.x)
         y2 = max(self.start_y, event.y)
-        self.selection = (x1, y1, x2, y2)
+        if x2 > x1 and y2 > y1:
+            self.selection = (
+                round(x1 * self.scale_x),
+                round(y1 * self.scale_y),
+                round(x2 * self.scale_x),
+                round(y2 * self.scale_y),
+            )
         self.destroy()
 
 
-def select_region(parent, screenshot):
-    snip = SnipTool(parent, screenshot)
+def select_region(parent, frame):
+    snip = SnipTool(parent, frame)
     parent.wait_window(snip)
     return snip.selection
 
+
+def capture_with_screencapture():
+    # macOS: the system tool does the interactive selection
+    screenshot_path = os.path.join(tempfile.gettempdir(), "screenshot.png")
+    if os.path.exists(screenshot_path):
+        os.remove(screenshot_path)
+    subprocess.call(["screencapture", "-ix", screenshot_path])
+    if not os.path.exists(screenshot_path):
+        return None
+    return cv2.imread(screenshot_path)
+
+
 def capture_screenshot(root_win):
-    # Capture the screenshot of the entire screen
-    if sys.platform == "win32":
-        screenshot = pyautogui.screenshot().convert("RGB")
-        region = select_region(root_win, screenshot)
-        if region:
-            x1, y1, x2, y2 = region
-            snip_img = screenshot.crop((x1, y1, x2, y2))
-        return snip_img
-    else:
-        temp_dir = tempfile.gettempdir()
-        screenshot_path = os.path.join(temp_dir, 'screenshot.png')
-        subprocess.call(['screencapture', '-ix', screenshot_path])
-        image = Image.open(screenshot_path)
-        return image
+    """Let the user select a screen region.
+
+    Returns the selection as a BGR array, as the OCR engines expect, or
+    None if the selection was cancelled.
+    """
+    if sys.platform == "darwin":
+        return capture_with_screencapture()
 
+    start = time.perf_counter()
+    frame = grab_screen()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Screen grabbed in {elapsed_ms:.1f} ms ({frame.shape[1]}x{frame.shape[0]})")
 
+    region = select_region(root_win, frame)
+    if not region:
+        return None
+    x1, y1, x2, y2 = region
+    # The crop is a view of the frame; only the selection is converted
+    return cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGRA2BGR)
 
 
 # Example integration
@@ -121,9 +184,9 @@ if __name__ == "__main__":
 
         # Now take the screenshot
         snip_img = capture_screenshot(root)
-        if snip_img:
-            snip_img.save("snip_from_app.png")
-            snip_img.show()
+        if snip_img is not None:
+            cv2.imwrite("snip_from_app.png", snip_img)
+            Image.fromarray(cv2.cvtColor(snip_img, cv2.COLOR_BGR2RGB)).show()
         root.deiconify()
 
     btn = tk.Button(root, text="Select Region", command=do_snip)
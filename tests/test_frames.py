@@ -0,0 +1,29 @@
+"""Frames of multi-frame files, as the BGR images the engines read."""
+import numpy as np
+import pytest
+
+from OCR_Modules.frames import read_frames
+
+tifffile = pytest.importorskip("tifffile")
+
+
+def rgb_pages(count=2, height=12, width=20):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(count, height, width, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("planarconfig", ["contig", "separate"])
+def test_rgb_tiff_frames(tmp_path, planarconfig):
+    pages = rgb_pages()
+    path = str(tmp_path / "scan.tif")
+    with tifffile.TiffWriter(path) as tif:
+        for page in pages:
+            # Separate planes are stored as (samples, H, W)
+            data = np.moveaxis(page, -1, 0) if planarconfig == "separate" else page
+            tif.write(data, photometric="rgb", planarconfig=planarconfig)
+
+    frames = list(read_frames(path))
+    assert [frame for frame, _ in frames] == [str(tmp_path / "scan_frame1.tif"), str(tmp_path / "scan_frame2.tif")]
+    for page, (_, image) in zip(pages, frames):
+        # RGB pages come back as BGR
+        np.testing.assert_array_equal(image, page[:, :, ::-1])
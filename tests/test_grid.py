@@ -0,0 +1,56 @@
+"""Grid reconstruction checked cell by cell against the reference CSVs.
+
+The tokens are the ONNX Runtime runs recorded in ``test/replay``; the
+``test/*_output.csv`` files are the tables as printed on the images, blanks
+in place, with accents dropped as the English models read them.
+"""
+import os
+
+import cv2
+import pytest
+
+from OCR_Modules.grid import build_layout, compare_with_csv, layout_to_grid
+from OCR_Modules.replayOCR import ReplayEngine, image_key
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test")
+
+
+def cell(text):
+    return (text, 0.99)
+
+
+def recorded_grid(name):
+    engine = ReplayEngine(latency_ms=0, ms_per_token=0)
+    image = cv2.imread(os.path.join(TEST_DIR, name + ".png"))
+    assert image is not None
+    # Synthetic tokens would make the comparison meaningless
+    assert image_key(image) in engine.index
+    return layout_to_grid(build_layout(engine.tokens(image)))
+
+
+@pytest.mark.parametrize(
+    "name, minimum",
+    [
+        # Clean ruled table: only misreadings ("CVmax", "KCO SB") differ
+        ("1", 0.95),
+        # The detector reads neighbouring cells ("0,22 187,41") as one box
+        # and the "----" cells as noise, so most columns collapse; this
+        # guards the layout against regressions, it is no accuracy figure
+        ("2", 0.25),
+    ],
+)
+def test_grid_matches_reference(name, minimum):
+    grid = recorded_grid(name)
+    assert compare_with_csv(grid, os.path.join(TEST_DIR, name + "_output.csv")) >= minimum
+
+
+def test_blank_cells_count(tmp_path):
+    reference = tmp_path / "reference.csv"
+    reference.write_text("CVF,3.85,,74\nHb,,14.60,\n", encoding="utf-8")
+
+    exact = [[cell("CVF"), cell("3.85"), None, cell("74")], [cell("Hb"), None, cell("14.60"), None]]
+    assert compare_with_csv(exact, reference) == 1.0
+
+    # Left-packed: the same texts, in the wrong columns
+    packed = [[cell("CVF"), cell("3.85"), cell("74"), None], [cell("Hb"), cell("14.60"), None, None]]
+    assert compare_with_csv(packed, reference) == pytest.approx(3 / 7)
@@ -0,0 +1,48 @@
+"""Overlay labels drawn from cached masks, checked against ``cv2.putText``."""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from OCR_Modules.overlay import FONT, Overlay, render_overlay, stamp_label
+from OCR_Modules.replayOCR import ReplayEngine
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test")
+
+
+@pytest.mark.parametrize(
+    "x, y",
+    [
+        (10, 50),
+        # Partly outside the canvas: clipped like putText clips
+        (-15, 12),
+        (330, 118),
+    ],
+)
+def test_stamp_label_matches_puttext(x, y):
+    label = "VEMs/CVF(%) gy, -17,88 (0.87)"
+    stamped = np.zeros((120, 400), dtype=np.uint8)
+    stamp_label(stamped, label, x, y, 1.0, 1)
+    # Twice: the second stamp comes from the cache
+    stamp_label(stamped, label, x, y, 1.0, 1)
+
+    expected = np.zeros_like(stamped)
+    cv2.putText(expected, label, (x, y), FONT, 1.0, 255, 1, cv2.LINE_AA)
+    np.testing.assert_array_equal(stamped, expected)
+
+
+def test_overlay_renders_recorded_tokens(tmp_path):
+    image = cv2.imread(os.path.join(TEST_DIR, "1.png"))
+    tokens = ReplayEngine(latency_ms=0, ms_per_token=0).tokens(image)
+
+    render = render_overlay(image, tokens)
+    assert render.shape == image.shape
+    assert not np.array_equal(render, image)
+
+    overlay = Overlay(image, tokens)
+    display, scale = overlay.display(image.shape[1] // 2, image.shape[0] // 2)
+    assert display.shape[1] <= image.shape[1] // 2
+    output_path = str(tmp_path / "1_output_image.jpg")
+    overlay.export(output_path)
+    assert cv2.imread(output_path).shape == image.shape
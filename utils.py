@@ -1,8 +1,11 @@
+import atexit
 import datetime
+import glob
 import locale
 import logging
 import logging.handlers
 import os
+import queue
 import subprocess
 import sys
 from pathlib import Path
@@ -49,6 +52,50 @@ class ErrorSessionHandler(logging.handlers.TimedRotatingFileHandler):
         super().emit(header_record)
 
 
+LOG_FORMAT = "[%(asctime)s] [%(levelname)8s] [%(filename)s:%(lineno)d] %(message)s"
+
+
+def setup_logging(log_file="errors.log", json_file=None, level=logging.INFO):
+    """Log through a queue so file and console I/O run on a listener thread.
+
+    Records go to ``log_file`` (with the error session header) and the
+    console, and with ``json_file`` (default: ``OCR_LOG_JSON`` from .env)
+    also to a JSON Lines file carrying job ID, engine, stage and duration.
+    Returns the started listener; it is stopped, and the queue drained, at exit.
+    """
+    from OCR_Modules.tracing import (JobContextFilter, JsonLinesFormatter,
+                                     LogQueueHandler)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        ErrorSessionHandler(log_file, when="midnight", backupCount=7, encoding="utf-8"),
+        logging.StreamHandler(),
+    ]
+    json_file = json_file or os.getenv("OCR_LOG_JSON")
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    if json_file:
+        json_handler = logging.handlers.TimedRotatingFileHandler(
+            json_file, when="midnight", backupCount=7, encoding="utf-8"
+        )
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LogQueueHandler(log_queue)
+    queue_handler.addFilter(JobContextFilter())
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
 def handle_uncaught_exception(exc_type, exc_value, exc_traceback):
     """Handles uncaught exceptions"""
     logger.error("Uncaught exception", exc_info=(exc_type, exc_value, exc_traceback))
@@ -64,6 +111,16 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def open_file(path):
+    """Open ``path`` with the default application of the platform"""
+    if sys.platform == "win32":
+        os.startfile(path)
+    elif sys.platform == "darwin":
+        subprocess.Popen(["open", path])
+    else:
+        subprocess.Popen(["xdg-open", path])
+
+
 def get_tessbin_path():
     # Frozen application path (PyInstaller)
     if getattr(sys, "frozen", False):
@@ -132,6 +189,19 @@ def get_tessbin_path():
             "TESS_BINARY_PATH=C:\\path\\to\\tesseract.exe"
         )
 
+    elif sys.platform.startswith("linux"):
+        if tess_bin := which("tesseract"):
+            return tess_bin
+
+        for path in ["/usr/bin/tesseract", "/usr/local/bin/tesseract"]:
+            if os.path.exists(path):
+                return path
+
+        raise FileNotFoundError(
+            "Tesseract not found. Install with 'sudo apt install tesseract-ocr' or "
+            "set TESS_BINARY_PATH=/path/to/tesseract in .env file"
+        )
+
     else:
         raise RuntimeError(f"Unsupported platform: {sys.platform}")
 
@@ -189,9 +259,38 @@ def get_tessdata_path():
             "Reinstall Tesseract with language data or set TESSDATA_PREFIX in .env file"
         )
 
+    elif sys.platform.startswith("linux"):
+        # Debian/Ubuntu keep it under the Tesseract version, newest last
+        versioned = sorted(glob.glob("/usr/share/tesseract-ocr/*/tessdata"))
+        common_paths = versioned[::-1] + [
+            "/usr/share/tesseract-ocr/tessdata",
+            "/usr/share/tessdata",
+            "/usr/local/share/tessdata",
+        ]
+        for path in common_paths:
+            if os.path.exists(path):
+                return path
+
+        raise FileNotFoundError(
+            "Tessdata not found. Install with 'sudo apt install tesseract-ocr' "
+            "or set TESSDATA_PREFIX in .env file"
+        )
+
     else:
         raise RuntimeError(f"Unsupported platform: {sys.platform}")
 
+
+def set_tessdata_prefix():
+    """Point Tesseract at its language data, if it is installed.
+
+    A missing Tesseract only matters once it is selected, where loading
+    the engine reports it.
+    """
+    try:
+        os.environ["TESSDATA_PREFIX"] = get_tessdata_path()
+    except (FileNotFoundError, RuntimeError) as e:
+        logger.warning(f"Tesseract language data not set up: {e}")
+
 def ensure_locale():
     """Nuclear option for ttkbootstrap locale conflicts"""
     try:
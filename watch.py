@@ -0,0 +1,88 @@
+"""Watch a folder and OCR every image dropped into it.
+
+Usage: python watch.py FOLDER [--output DIR] [--engine PaddleOCR]
+                       [--formats xlsx,csv] [--workers 2] [--settle 2.0] [--poll]
+                       [--lexicon FILE | --no-lexicon] [--no-history]
+
+Progress is kept in DIR/.ocr_manifest.jsonl, so a restart never processes
+a finished file again.
+"""
+import argparse
+import os
+import signal
+import sys
+
+from utils import (ensure_locale, handle_uncaught_exception, resource_path,
+                   set_tessdata_prefix, setup_logging)
+
+ensure_locale()
+
+os.environ["PADDLE_OCR_BASE_DIR"] = resource_path("./models/paddleocr")
+os.environ["EASYOCR_MODULE_PATH"] = resource_path("./models/easyocr")
+
+setup_logging()
+set_tessdata_prefix()
+
+from OCR_Modules.engines import ENGINE_MODULES, EngineUnavailable
+from OCR_Modules.history import History
+from OCR_Modules.lexicon import Lexicon
+from OCR_Modules.watcher import FolderWatcher
+from OCR_Modules.writers import WRITERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a folder and OCR every image dropped into it.")
+    parser.add_argument("folder")
+    parser.add_argument("--output", help="output directory (default: the watched folder)")
+    parser.add_argument("--engine", default="PaddleOCR", choices=list(ENGINE_MODULES))
+    parser.add_argument("--formats", default="xlsx", help=f"comma separated, from {', '.join(WRITERS)}")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds a file must be unchanged")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    parser.add_argument("--green", type=int, default=97)
+    parser.add_argument("--yellow", type=int, default=92)
+    parser.add_argument(
+        "--lexicon",
+        default=os.getenv("OCR_LEXICON") or resource_path("lexicon/medical.txt"),
+        help="term list for correcting low-confidence tokens",
+    )
+    parser.add_argument("--no-lexicon", action="store_true", help="keep the engine's text as read")
+    parser.add_argument("--no-history", action="store_true", help="do not record documents in the history database")
+    args = parser.parse_args()
+
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in WRITERS]
+    if unknown:
+        parser.error(f"unknown output format(s): {', '.join(unknown)}")
+    lexicon = None
+    if not args.no_lexicon:
+        try:
+            lexicon = Lexicon.load(args.lexicon)
+        except OSError as e:
+            parser.error(f"cannot read the lexicon {args.lexicon}: {e.strerror or e} (or pass --no-lexicon)")
+
+    watcher = FolderWatcher(
+        args.folder,
+        args.output,
+        engine=args.engine,
+        formats=formats,
+        workers=args.workers,
+        settle=args.settle,
+        green_threshold=args.green / 100,
+        yellow_threshold=args.yellow / 100,
+        use_inotify=False if args.poll else None,
+        lexicon=lexicon,
+        history=None if args.no_history else History(),
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+    except EngineUnavailable as e:
+        sys.exit(f"{e}\nNothing was processed; check the engine's setup or pick another with --engine.")
+
+
+if __name__ == "__main__":
+    sys.excepthook = handle_uncaught_exception
+    main()